@@ -7,3 +7,4 @@ class ApiConfig(AppConfig):
     def ready(self):
         import api.signals # Bildirim sinyalleri
         import api.signals_limits # Kota sinyalleri (YENİ)
+        import api.signals_cache # Önbellek / müsaitlik motoru sinyalleri
@@ -1,31 +1,99 @@
+import asyncio
 import json
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+
+from api.services.notification import NotificationService
+
 
 class NotificationConsumer(AsyncWebsocketConsumer):
+    """
+    🔔 ws/notifications/?cursor=<son görülen cursor>
+
+    Frame'ler:
+    - Tek bildirim: bildirim payload'ı (id, type, title, message, link, created_at, cursor)
+    - {'frame': 'batch', 'notifications': [...]}: Kısa pencerede gelen canlı bildirimler
+    - {'frame': 'catch_up', 'notifications': [...], 'has_more': bool}: Bağlantı kopukken
+      kaçırılanlar. has_more=true ise istemci listeyi /notifications/ üzerinden yenilemeli
+    - {'frame': 'resync'}: Cursor geçersiz, istemci listeyi yenilemeli
+    """
+
     async def connect(self):
         # Kullanıcı login olmuş mu? (Channels Auth Middleware ile gelecek)
         self.user = self.scope['user']
-        
+
         if self.user.is_anonymous:
             await self.close()
         else:
             # Kullanıcıya özel oda: user_ID
             self.room_group_name = f'user_{self.user.id}'
-            
+            self.pending = []
+            self.flush_task = None
+            self.replayed_ids = set()
+
             await self.channel_layer.group_add(
                 self.room_group_name,
                 self.channel_name
             )
             await self.accept()
 
+            # Handler'lar sırayla çalışır: catch-up sırasında gelen canlı mesajlar
+            # kuyrukta bekler, catch-up'ta gönderilmişse send_notification'da elenir
+            query = parse_qs(self.scope.get('query_string', b'').decode())
+            cursor = query.get('cursor', [None])[0]
+            if cursor:
+                await self.catch_up(cursor)
+
     async def disconnect(self, close_code):
         if hasattr(self, 'room_group_name'):
              await self.channel_layer.group_discard(
                 self.room_group_name,
                 self.channel_name
             )
+        if getattr(self, 'flush_task', None):
+            self.flush_task.cancel()
+
+    async def catch_up(self, cursor):
+        """Kaçırılan bildirimleri DB'den tek sorguyla alıp tek frame'de gönder"""
+        limit = getattr(settings, 'NOTIFICATION_WS_CATCHUP_LIMIT', 200)
+        try:
+            missed, has_more = await database_sync_to_async(NotificationService.missed_since)(
+                self.user.id, cursor, limit
+            )
+        except ValueError:
+            await self.send(text_data=json.dumps({'frame': 'resync'}))
+            return
+
+        self.replayed_ids = {m['id'] for m in missed}
+        await self.send(text_data=json.dumps({
+            'frame': 'catch_up',
+            'notifications': missed,
+            'has_more': has_more
+        }))
 
     async def send_notification(self, event):
-        # Redis'ten gelen mesajı WebSocket'e ilet
+        # Redis'ten gelen mesajı biriktir; pencere sonunda tek frame olarak ilet
         message = event['message']
-        await self.send(text_data=json.dumps(message))
+        if message.get('id') in self.replayed_ids:
+            return
+        self.pending.append(message)
+        if self.flush_task is not None:
+            return
+        self.flush_task = asyncio.ensure_future(self.delayed_flush())
+
+    async def delayed_flush(self):
+        await asyncio.sleep(getattr(settings, 'NOTIFICATION_WS_BATCH_WINDOW', 0.05))
+        self.flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        messages, self.pending = self.pending, []
+        if not messages:
+            return
+        if len(messages) == 1:
+            await self.send(text_data=json.dumps(messages[0]))
+        else:
+            await self.send(text_data=json.dumps({'frame': 'batch', 'notifications': messages}))
@@ -0,0 +1,74 @@
+"""
+🔎 Ortak Filter Backend'leri
+AgencyModelViewSet'lerde filter_backends listesine eklenerek kullanılır
+"""
+from rest_framework.filters import BaseFilterBackend, SearchFilter
+
+from api.services import search, tags
+
+
+class TagFilterBackend(BaseFilterBackend):
+    """
+    🏷️ Çoklu tag filtresi (GIN index'li JSON tags alanı)
+
+    ?tags=VIP,Kurumsal                  -> ikisi de olanlar (AND)
+    ?tags=VIP,Kurumsal&tags_match=any   -> herhangi biri olanlar (OR)
+
+    View'da `tag_field` ile alan adı değiştirilebilir (varsayılan 'tags').
+    """
+    tags_param = 'tags'
+    match_param = 'tags_match'
+
+    def get_tags(self, request):
+        values = []
+        for raw in request.query_params.getlist(self.tags_param):
+            values.extend(raw.split(','))
+        return values
+
+    def filter_queryset(self, request, queryset, view):
+        values = self.get_tags(request)
+        if not values:
+            return queryset
+        return tags.filter_queryset(
+            queryset,
+            request.user.current_agency_id,
+            values,
+            match_all=request.query_params.get(self.match_param, 'all') != 'any',
+            field=getattr(view, 'tag_field', tags.TAG_FIELD)
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.tags_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Virgülle ayrılmış tag listesi',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.match_param,
+                'required': False,
+                'in': 'query',
+                'description': "'all' (varsayılan, AND) veya 'any' (OR)",
+                'schema': {'type': 'string', 'enum': ['all', 'any']},
+            },
+        ]
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    🔎 ?search= için full-text + trigram arama (bkz. api/services/search.py)
+
+    SearchFilter'ın `ILIKE '%q%'` sorguları index kullanamaz; bu backend
+    search_vector (GIN) ve başlık trigram index'i üzerinden eşleştirir.
+    View'da `search_title_field` (trigram ile bakılacak başlık alanı) tanımlı olmalı.
+    Postgres dışında (dev/test) view'ın search_fields'ı ile SearchFilter gibi çalışır.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        title_field = getattr(view, 'search_title_field', None)
+        text = ' '.join(self.get_search_terms(request))
+        if not text or not title_field or not search.is_supported():
+            return super().filter_queryset(request, queryset, view)
+        return search.filter_queryset(queryset, text, title_field)
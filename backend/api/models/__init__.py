@@ -1,7 +1,7 @@
 from apps.core.models import BaseModel
-from apps.agencies.models import Agency, AgencyRole, AgencyAwareModel, Client
-from apps.users.models import User, AgencyMembership, Notification, AuditLog
-from apps.projects.models import Project, Location, File, Expense, ExpenseCategory, ShootingDay, CallSheet
+from apps.agencies.models import Agency, AgencyRole, AgencyAwareModel, AgencyVersion, Client, DashboardSnapshot, Tag
+from apps.users.models import User, AgencyMembership, Notification, NotificationOutbox, AuditLog
+from apps.projects.models import Project, Location, Blob, File, FileUpload, StorageUsage, StorageReservation, Expense, ExpenseCategory, ShootingDay, CallSheet
 from apps.tasks.models import Task
 from apps.equipment.models import Equipment, EquipmentCategory, EquipmentReservation
 
@@ -0,0 +1,216 @@
+"""
+📄 Keyset (Cursor) Pagination
+
+PageNumberPagination her sayfada COUNT(*) + OFFSET taraması yapar; büyük
+ajanslarda derin sayfalar saniyeler sürer. KeysetPagination ise:
+- COUNT yapmaz, page_size + 1 satır çeker (sonraki sayfa var mı?)
+- Sonraki sayfayı son satırın sıralama değerleriyle filtreler:
+  WHERE (created_at, id) < (son_created_at, son_id)  -> index ile doğrudan konumlanır
+- Sıralama her zaman 'id' ile tamamlanır: aynı created_at'li satırlar atlanmaz/tekrarlanmaz
+- Boş olabilen alanlar (due_date) her iki yönde en sona sıralanır (NULLS LAST)
+- Cursor opak ve kararlıdır: araya yeni kayıt girse de sonraki sayfa kaymaz (mobil sonsuz scroll)
+
+Varsayılan cevap sayfa numaralıdır (count / next / previous, ?page=); istemci
+?pagination=cursor (veya ?cursor=...) ile keyset moduna geçer. Sıralama iki modda aynıdır.
+
+Kullanım (opt-in):
+    class TaskViewSet(AgencyModelViewSet):
+        pagination_class = KeysetPagination
+        keyset_ordering = ('-created_at',)                    # varsayılan
+        keyset_ordering_fields = ('created_at', 'due_date')   # ?ordering= ile seçilebilenler
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(values):
+    """Sıralama değerleri -> opak cursor (URL-safe base64 JSON)"""
+    data = json.dumps(values, default=str, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """Opak cursor -> ham değer listesi. Bozuksa ValueError."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('invalid cursor')
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError('invalid cursor')
+    return values
+
+
+class _PageNumberPagination(PageNumberPagination):
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+
+
+class KeysetPagination(BasePagination):
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    ordering_query_param = 'ordering'
+    default_ordering = ('-created_at',)
+    invalid_cursor_message = 'Geçersiz cursor'
+    page_number_class = _PageNumberPagination
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def use_keyset(self, request):
+        params = request.query_params
+        return bool(params.get(self.cursor_query_param)) or params.get(self.mode_query_param) == 'cursor'
+
+    def get_ordering(self, request, view):
+        """
+        View'ın keyset_ordering'i (veya ?ordering= ile keyset_ordering_fields'dan biri),
+        sona 'id' eklenerek tekil hale getirilir.
+        """
+        ordering = list(getattr(view, 'keyset_ordering', self.default_ordering))
+
+        requested = request.query_params.get(self.ordering_query_param)
+        allowed = getattr(view, 'keyset_ordering_fields', ())
+        if requested and requested.lstrip('-') in allowed:
+            ordering = [requested]
+
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            descending = ordering[0].startswith('-')
+            ordering.append('-id' if descending else 'id')
+        return ordering
+
+    # ------------------------------------------------------------------
+    # Cursor
+    # ------------------------------------------------------------------
+    def decode_cursor(self, queryset, ordering, cursor):
+        try:
+            values = decode_cursor(cursor, len(ordering))
+            model = queryset.model
+            values = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        # null'lı cursor sadece boş olabilen alanlarda üretilir, diğerleri elle yazılmıştır
+        nullable = self.nullable_fields(queryset.model, ordering)
+        if any(value is None and field not in nullable for field, value in zip(ordering, values)):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    @staticmethod
+    def nullable_fields(model, ordering):
+        return {field for field in ordering if model._meta.get_field(field.lstrip('-')).null}
+
+    @staticmethod
+    def order_by(ordering, nullable):
+        """Boş olabilen alanlar her iki yönde NULLS LAST: cursor karşılaştırması tek yönlü kalır"""
+        expressions = []
+        for field in ordering:
+            if field not in nullable:
+                expressions.append(field)
+            elif field.startswith('-'):
+                expressions.append(F(field[1:]).desc(nulls_last=True))
+            else:
+                expressions.append(F(field).asc(nulls_last=True))
+        return expressions
+
+    def keyset_filter(self, ordering, values, nullable=()):
+        """
+        (a, b, c) > (x, y, z) karşılaştırmasını alan bazında açar:
+        a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+        İlk alan için ayrıca a >= x eklenir: planner index aralığını doğrudan kullanır.
+        Boş olabilen alanda NULL her değerden sonra gelir: a > x OR a IS NULL, NULL'dan sonrası yok.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            if value is None:
+                after = Q(pk__in=[])
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                after = Q(**{f'{name}__{lookup}': value})
+                same = Q(**{name: value})
+                if field in nullable:
+                    after |= Q(**{f'{name}__isnull': True})
+            condition |= equal & after
+            equal &= same
+
+        first = ordering[0]
+        name = first.lstrip('-')
+        if values[0] is None:
+            return Q(**{f'{name}__isnull': True}) & condition
+        bound = Q(**{f"{name}__{'lte' if first.startswith('-') else 'gte'}": values[0]})
+        if first in nullable:
+            bound |= Q(**{f'{name}__isnull': True})
+        return bound & condition
+
+    # ------------------------------------------------------------------
+    # DRF arayüzü
+    # ------------------------------------------------------------------
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(request, view)
+        nullable = self.nullable_fields(queryset.model, self.ordering)
+        queryset = queryset.order_by(*self.order_by(self.ordering, nullable))
+
+        # Varsayılan: sayfa numarası (count / previous), aynı sıralamayla
+        self.page_number = None
+        if not self.use_keyset(request):
+            self.page_number = self.page_number_class()
+            return self.page_number.paginate_queryset(queryset, request, view)
+
+        self.page_size_value = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            values = self.decode_cursor(queryset, self.ordering, cursor)
+            queryset = queryset.filter(self.keyset_filter(self.ordering, values, nullable))
+
+        rows = list(queryset[:self.page_size_value + 1])
+        self.has_next = len(rows) > self.page_size_value
+        page = rows[:self.page_size_value]
+
+        self.next_cursor = None
+        if self.has_next:
+            last = page[-1]
+            self.next_cursor = encode_cursor([
+                getattr(last, field.lstrip('-')) for field in self.ordering
+            ])
+        return page
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        if self.page_number is not None:
+            return self.page_number.get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'cursor': self.next_cursor,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        # İki modun birleşimi: count / previous sayfa numarasında, cursor keyset'te
+        response = self.page_number_class().get_paginated_response_schema(schema)
+        response['properties']['cursor'] = {'type': 'string', 'nullable': True}
+        return response
@@ -1,10 +1,13 @@
 from rest_framework import permissions
-from api.models import AgencyMembership
+from api.services import membership
 
 class HasAgencyPermission(permissions.BasePermission):
     """
     Kullanıcının ajansta gerekli yetkiye sahip olup olmadığını kontrol eder.
     View'da 'required_role_permission' özelliği tanımlanmalıdır.
+
+    Yetkiler access token claim'inden / Redis'ten okunur (api/services/membership.py),
+    claim güncelse DB sorgusu yapılmaz.
     """
     
     def has_permission(self, request, view):
@@ -16,7 +19,7 @@ class HasAgencyPermission(permissions.BasePermission):
             return True
 
         # Ajansı yoksa reddet
-        if not request.user.current_agency:
+        if not request.user.current_agency_id:
             return False
 
         # View'da özel bir permission istenmemişse geç
@@ -24,22 +27,5 @@ class HasAgencyPermission(permissions.BasePermission):
         if not required_perm:
             return True
 
-        # Kullanıcının ajans üyeliğini ve rolünü bul
-        try:
-            membership = AgencyMembership.objects.select_related('role').get(
-                user=request.user,
-                agency=request.user.current_agency
-            )
-        except AgencyMembership.DoesNotExist:
-            return False
-
-        # Owner ise her şeye yetkisi var
-        if membership.is_owner:
-            return True
-
-        # Rolü yoksa (ve owner değilse) yetkisiz
-        if not membership.role:
-            return False
-            
-        # İstenen yetkiyi kontrol et (örn: role.can_manage_projects)
-        return getattr(membership.role, required_perm, False)
+        # Owner ise her şeye yetkisi var, değilse rolündeki flag (örn: can_manage_projects)
+        return membership.has_permission(membership.for_request(request), required_perm)
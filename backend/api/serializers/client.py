@@ -8,8 +8,10 @@ class ClientSerializer(AgencyModelSerializer):
     
     class Meta:
         model = Client
-        fields = '__all__'
+        exclude = ['search_vector']
         read_only_fields = ['created_at', 'updated_at', 'agency']
     
     def get_project_count(self, obj):
-        return obj.projects.count() if hasattr(obj, 'projects') else 0
+        # ClientViewSet annotate eder; yoksa tek COUNT
+        project_count = getattr(obj, 'project_count', None)
+        return project_count if project_count is not None else obj.projects.count()
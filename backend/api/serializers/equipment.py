@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from api.serializers.base import AgencyModelSerializer
 from api.models import Equipment, EquipmentCategory, EquipmentReservation
-from django.db.models import Q
+from api.services import availability
 
 class CategorySerializer(AgencyModelSerializer):
     class Meta:
@@ -15,7 +15,7 @@ class EquipmentSerializer(AgencyModelSerializer):
 
     class Meta:
         model = Equipment
-        fields = '__all__'
+        exclude = ['search_vector']
         read_only_fields = ['created_by', 'agency', 'qr_code']
 
 class EquipmentReservationSerializer(AgencyModelSerializer):
@@ -37,17 +37,14 @@ class EquipmentReservationSerializer(AgencyModelSerializer):
         start = data['start_date']
         end = data['end_date']
 
-        # Çakışan rezervasyonlar (Onaylı veya Aktif)
-        conflicts = EquipmentReservation.objects.filter(
-            agency=equipment.agency,
-            equipment=equipment,
-            status__in=['approved', 'active'],
-        ).filter(Q(start_date__lt=end) & Q(end_date__gt=start))
-
-        if self.instance:
-             conflicts = conflicts.exclude(id=self.instance.id)
+        # Çakışan rezervasyonlar (Onaylı veya Aktif) - bellekteki interval tree'den
+        engine = availability.get_engine(equipment.agency_id)
+        conflict_ids = engine.conflicts(
+            equipment.id, start, end,
+            exclude=self.instance.id if self.instance else None
+        )
 
-        if conflicts.exists():
+        if conflict_ids:
             # Kullanıcı "Evet, sıraya al" dediyse (waitlist=True) hata fırlatma
             request = self.context.get('request')
             is_waitlist = request.data.get('waitlist') if request else False
@@ -56,6 +53,7 @@ class EquipmentReservationSerializer(AgencyModelSerializer):
             if str(is_waitlist).lower() == 'true':
                  return data # Validasyondan geçir, create'de waitlist yapacağız
 
+            conflicts = EquipmentReservation.objects.filter(id__in=conflict_ids).select_related('project')
             conflict_names = ", ".join([str(c.project or "Bireysel") for c in conflicts])
             raise serializers.ValidationError({
                 "code": "conflict",
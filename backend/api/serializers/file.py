@@ -8,5 +8,8 @@ class FileSerializer(AgencyModelSerializer):
     
     class Meta:
         model = File
-        fields = '__all__'
-        read_only_fields = ['uploaded_by', 'created_at', 'agency', 'file_size', 'file_type']
+        exclude = ['search_vector']
+        read_only_fields = ['uploaded_by', 'created_at', 'agency', 'file_size', 'file_type', 'blob',
+                            'root', 'parent', 'version']
+        # Boşsa yüklenen dosyanın adı kullanılır
+        extra_kwargs = {'original_name': {'required': False}}
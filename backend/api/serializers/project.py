@@ -2,35 +2,39 @@ from rest_framework import serializers
 from api.serializers.base import AgencyModelSerializer
 from api.models import Project
 from api.serializers.user import UserListSerializer
+from api.services.project_stats import progress_percentage
 
 class ProjectListSerializer(AgencyModelSerializer):
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     team_count = serializers.SerializerMethodField()
+    progress_percentage = serializers.SerializerMethodField()
 
     class Meta:
         model = Project
-        fields = ['id', 'title', 'status', 'status_display', 'priority', 'start_date', 'end_date', 'team_count', 'created_at']
+        fields = ['id', 'title', 'status', 'status_display', 'priority', 'start_date', 'end_date', 'team_count', 'progress_percentage', 'created_at']
     
     def get_team_count(self, obj):
-        return obj.team_members.count() if hasattr(obj, 'team_members') else 0
+        # ProjectViewSet annotate eder; yoksa tek COUNT
+        team_count = getattr(obj, 'team_count', None)
+        return team_count if team_count is not None else obj.assigned_team.count()
+
+    def get_progress_percentage(self, obj):
+        return progress_percentage(obj)
 
 class ProjectDetailSerializer(AgencyModelSerializer):
-    team_members = UserListSerializer(many=True, read_only=True)
+    # ProjectViewSet.get_queryset rolleriyle birlikte prefetch eder (bkz. prefetch_agency_memberships)
+    team_members = UserListSerializer(source='assigned_team', many=True, read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     progress_percentage = serializers.SerializerMethodField()
 
     class Meta:
         model = Project
-        fields = '__all__'
+        exclude = ['search_vector']
         read_only_fields = ['created_by', 'created_at', 'updated_at', 'agency']
     
     def get_progress_percentage(self, obj):
-        tasks = obj.tasks.all()
-        total = tasks.count()
-        if total == 0:
-            return 0
-        done = tasks.filter(status='done').count()
-        return round((done / total) * 100, 1)
+        # Detayda canlı annotation (task_total/task_done), listede denormalize sayaçlar
+        return progress_percentage(obj)
 
 # Alias for compatibility
 ProjectSerializer = ProjectDetailSerializer
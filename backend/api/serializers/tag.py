@@ -0,0 +1,10 @@
+from rest_framework import serializers
+from api.models import Tag
+
+class TagSerializer(serializers.ModelSerializer):
+    """Tag sözlüğü (autocomplete)"""
+
+    class Meta:
+        model = Tag
+        fields = ['id', 'name', 'usage_count']
+        read_only_fields = fields
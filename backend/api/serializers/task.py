@@ -5,10 +5,14 @@ from api.serializers.user import UserListSerializer
 
 class TaskSerializer(AgencyModelSerializer):
     """Task serializer"""
-    assigned_to_name = serializers.CharField(source='assigned_to.get_full_name', read_only=True)
+    assigned_to_name = serializers.SerializerMethodField()
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     
     class Meta:
         model = Task
-        fields = '__all__'
+        exclude = ['search_vector']
         read_only_fields = ['created_by', 'created_at', 'updated_at', 'agency']
+
+    def get_assigned_to_name(self, obj):
+        # assigned_to M2M: prefetch_related('assigned_to') ile ek sorgu yok
+        return ', '.join(user.get_full_name() or user.email for user in obj.assigned_to.all())
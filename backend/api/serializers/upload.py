@@ -0,0 +1,61 @@
+import re
+
+from rest_framework import serializers
+from api.serializers.base import AgencyModelSerializer
+from api.models import FileUpload
+from api.services import uploads
+
+class FileUploadSerializer(AgencyModelSerializer):
+    """
+    Parçalı yükleme oturumu.
+    missing_parts: henüz onaylanmamış parça numaraları (kesilen yükleme bunlardan devam eder)
+    sha256: içerik ajansta varsa oturum byte yüklenmeden 'completed' döner
+    """
+    part_count = serializers.SerializerMethodField()
+    missing_parts = serializers.SerializerMethodField()
+    total_size = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = FileUpload
+        fields = [
+            'id', 'project', 'version_of', 'original_name', 'content_type', 'description', 'tags', 'sha256',
+            'total_size', 'part_size', 'part_count', 'received_bytes', 'missing_parts',
+            'status', 'file', 'expires_at', 'created_at'
+        ]
+        read_only_fields = ['part_size', 'received_bytes', 'status', 'file', 'expires_at', 'created_at']
+
+    def get_part_count(self, obj):
+        return uploads.part_count(obj)
+
+    def get_missing_parts(self, obj):
+        return uploads.missing_parts(obj)
+
+    def validate_sha256(self, value):
+        value = value.lower()
+        if value and not re.fullmatch(r'[0-9a-f]{64}', value):
+            raise serializers.ValidationError('64 karakterlik hex SHA-256 olmalı')
+        return value
+
+    def validate(self, data):
+        agency_id = self.context['request'].user.current_agency_id
+        project = data['project']
+        if project.agency_id != agency_id:
+            raise serializers.ValidationError({'project': 'Proje bulunamadı'})
+
+        version_of = data.get('version_of')
+        if version_of and version_of.project_id != project.id:
+            raise serializers.ValidationError({'version_of': 'Dosya bu projeye ait değil'})
+        return data
+
+
+class PresignPartsSerializer(serializers.Serializer):
+    parts = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+
+
+class PartEtagSerializer(serializers.Serializer):
+    part_number = serializers.IntegerField(min_value=1)
+    etag = serializers.CharField(max_length=128)
+
+
+class ConfirmPartsSerializer(serializers.Serializer):
+    parts = PartEtagSerializer(many=True, allow_empty=False)
@@ -1,10 +1,27 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.db.models import Prefetch
 from api.models import AgencyMembership
 
 User = get_user_model()
 
+# Prefetch edilen (tek ajansa ait) üyeliklerin tutulduğu attribute
+AGENCY_MEMBERSHIPS = 'agency_memberships'
+
+
+def prefetch_agency_memberships(agency, lookup='memberships'):
+    """
+    Kullanıcıların verilen ajanstaki üyeliği + rolü (tek sorgu).
+    UserListSerializer.role_name bunu okur; iç içe kullanımda lookup ile yol verilir:
+        Prefetch('assigned_team', queryset=User.objects.prefetch_related(prefetch_agency_memberships(agency)))
+    """
+    return Prefetch(
+        lookup,
+        queryset=AgencyMembership.objects.filter(agency=agency).select_related('role'),
+        to_attr=AGENCY_MEMBERSHIPS
+    )
+
 class UserSerializer(serializers.ModelSerializer):
     """Ana user serializer"""
     full_name = serializers.SerializerMethodField()
@@ -30,9 +47,13 @@ class UserListSerializer(serializers.ModelSerializer):
         return f"{obj.first_name} {obj.last_name}".strip() or obj.email
     
     def get_role_name(self, obj):
-        if not obj.current_agency:
-            return ""
-        membership = obj.memberships.filter(agency=obj.current_agency).first()
+        memberships = getattr(obj, AGENCY_MEMBERSHIPS, None)
+        if memberships is None:
+            # Prefetch edilmemiş (tekil kullanım): kullanıcı başına sorgu
+            if not obj.current_agency_id:
+                return ""
+            memberships = obj.memberships.filter(agency_id=obj.current_agency_id).select_related('role')[:1]
+        membership = next(iter(memberships), None)
         return membership.role.name if membership and membership.role else "Member"
 
 class UserUpdateSerializer(serializers.ModelSerializer):
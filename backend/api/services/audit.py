@@ -0,0 +1,236 @@
+"""
+📝 Audit Log Pipeline
+AgencyModelViewSet create/update/delete kayıtları
+
+- Mutasyon sırasında DB'ye yazılmaz: AuditLog instance'ı process içi tampona eklenir
+  (transaction commit olduktan sonra; rollback olan işlem loglanmaz)
+- Arka plan thread'i tamponu AUDIT_LOG_FLUSH_INTERVAL saniyede bir ya da
+  AUDIT_LOG_BATCH_SIZE dolunca tek bulk_create ile yazar
+- created_at olayın zamanıdır (build_entry'de alınır), tamponun yazıldığı an değil
+- Yazma hatası yutulmaz: loglanır, kayıtlar tampona geri konur ve tekrar denenir
+- Tampon AUDIT_LOG_MAX_BUFFER'a ulaşırsa isteği yapan thread kendisi yazar (backpressure);
+  DB yazılamıyorsa kayıtlar Celery kuyruğuna devredilir (broker'da kalıcı), hiçbiri atılmaz.
+  Process kapanırken kalanlar atexit ile yazılır / kuyruğa devredilir
+- Process SIGKILL ile ölürse en fazla son AUDIT_LOG_FLUSH_INTERVAL'deki kayıtlar kaybolur
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, models, transaction
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+# Celery kuyruğuna devredilen kayıtların alanları
+PAYLOAD_FIELDS = (
+    'id', 'agency_id', 'user_id', 'action', 'description', 'target_model', 'target_id',
+    'ip_address', 'user_agent', 'changes', 'created_at',
+)
+
+
+def _plain(value):
+    """Diff değerini JSON'a yazılabilir hale getirir (model -> pk, tarih -> ISO, ...)"""
+    if isinstance(value, models.Model):
+        value = value.pk
+    elif isinstance(value, FieldFile):
+        value = value.name or None
+    elif isinstance(value, (list, tuple, set)):
+        value = [v.pk if isinstance(v, models.Model) else v for v in value]
+    try:
+        return json.loads(json.dumps(value, cls=DjangoJSONEncoder))
+    except TypeError:
+        return str(value)
+
+
+def _many_to_many(instance):
+    return {f.name for f in instance._meta.many_to_many}
+
+
+def snapshot(instance, fields):
+    """
+    Güncelleme öncesi değerler (serializer.validated_data'daki alanlar için).
+    Many-to-many alanlar pk listesi olarak alınır.
+    """
+    many_to_many = _many_to_many(instance)
+    before = {}
+    for field in fields:
+        if field in many_to_many:
+            before[field] = sorted(str(pk) for pk in getattr(instance, field).values_list('pk', flat=True))
+        elif hasattr(instance, field):
+            before[field] = _plain(getattr(instance, field))
+    return before
+
+
+def diff(instance, before, validated_data):
+    """{alan: {'old': .., 'new': ..}} - sadece gerçekten değişen alanlar"""
+    many_to_many = _many_to_many(instance)
+    changes = {}
+    for field, old in before.items():
+        new = _plain(validated_data[field])
+        if field in many_to_many:
+            new = sorted(str(pk) for pk in new)
+        if old != new:
+            changes[field] = {'old': old, 'new': new}
+    return changes
+
+
+def _client_ip(request):
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded:
+        return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR') or None
+
+
+def build_entry(request, action, instance, changes=None):
+    """Kaydedilmemiş AuditLog (request ve instance bilgileriyle)"""
+    user = request.user
+    return AuditLog(
+        agency_id=user.current_agency_id,
+        user=user if user.is_authenticated else None,
+        action=action,
+        description=str(instance)[:1000],
+        target_model=instance._meta.model_name,
+        target_id=str(instance.pk),
+        ip_address=_client_ip(request),
+        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+        changes=changes or {},
+        created_at=timezone.now()
+    )
+
+
+def to_payload(entry):
+    """Kaydı Celery mesajına yazılabilir dict'e çevirir"""
+    return {field: _plain(getattr(entry, field)) for field in PAYLOAD_FIELDS}
+
+
+def from_payload(data):
+    return AuditLog(**{**data, 'created_at': parse_datetime(data['created_at'])})
+
+
+def write(entries, ignore_conflicts=False):
+    """Hepsi ya da hiçbiri: tekrar denemede aynı kayıt iki kez yazılmasın"""
+    with transaction.atomic():
+        AuditLog.objects.bulk_create(
+            entries, batch_size=getattr(settings, 'AUDIT_LOG_BATCH_SIZE', 200),
+            ignore_conflicts=ignore_conflicts
+        )
+
+
+class AuditBuffer:
+    """Process içi tampon + arka plan yazıcı thread"""
+
+    def __init__(self):
+        self.entries = []
+        self.lock = threading.Lock()
+        # Aynı anda tek flush: sıralama korunur, aynı kayıt iki kez yazılmaz
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.pid = None
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'AUDIT_LOG_BATCH_SIZE', 200)
+
+    @property
+    def max_buffer(self):
+        return getattr(settings, 'AUDIT_LOG_MAX_BUFFER', 5000)
+
+    def _ensure_thread(self):
+        # fork sonrası (gunicorn/celery worker) thread child'a geçmez, yeniden başlatılır
+        if self.thread is not None and self.thread.is_alive() and self.pid == os.getpid():
+            return
+        self.pid = os.getpid()
+        self.thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+        self.thread.start()
+
+    def add(self, entry):
+        with self.lock:
+            self.entries.append(entry)
+            size = len(self.entries)
+            self._ensure_thread()
+
+        if size >= self.max_buffer:
+            # Tampon dolu: yazılamıyorsa (DB yok) bellekte büyütmek yerine kuyruğa devret
+            if not self.flush():
+                self.spill()
+        elif size >= self.batch_size:
+            self.wakeup.set()
+
+    def _run(self):
+        interval = getattr(settings, 'AUDIT_LOG_FLUSH_INTERVAL', 2.0)
+        while True:
+            self.wakeup.wait(interval)
+            self.wakeup.clear()
+            close_old_connections()
+            self.flush()
+
+    def flush(self):
+        """Tampondakileri yazar. Returns: yazılan kayıt sayısı"""
+        with self.flush_lock:
+            with self.lock:
+                batch, self.entries = self.entries, []
+            if not batch:
+                return 0
+            try:
+                write(batch)
+            except Exception:
+                logger.exception("Audit log flush failed, %s entries requeued", len(batch))
+                with self.lock:
+                    self.entries[:0] = batch
+                return 0
+            return len(batch)
+
+    def spill(self):
+        """
+        Tampondakileri Celery kuyruğuna devreder (write_audit_logs DB gelene kadar tekrar dener).
+        Broker'a da yazılamazsa kayıtlar tamponda kalır. Returns: devredilen kayıt sayısı
+        """
+        from api.tasks import write_audit_logs
+
+        with self.flush_lock:
+            with self.lock:
+                batch, self.entries = self.entries, []
+            if not batch:
+                return 0
+            try:
+                for start in range(0, len(batch), self.batch_size):
+                    chunk = batch[start:start + self.batch_size]
+                    write_audit_logs.delay([to_payload(entry) for entry in chunk])
+            except Exception:
+                # Kuyruğa gidemeyen kısım (ve sonrası) tamponda kalır; gidenler tekrar gönderilse
+                # de sabit id'leri sayesinde iki kez yazılmaz (ignore_conflicts)
+                logger.exception("Audit log spill failed, %s entries kept in buffer", len(batch) - start)
+                with self.lock:
+                    self.entries[:0] = batch[start:]
+                return start
+            logger.warning("Audit log database unavailable, %s entries queued", len(batch))
+            return len(batch)
+
+    def close(self):
+        """Process kapanırken: yazılamayanlar kuyruğa devredilir"""
+        self.flush()
+        self.spill()
+
+
+buffer = AuditBuffer()
+atexit.register(buffer.close)
+
+
+def record(request, action, instance, changes=None):
+    """Audit kaydını transaction commit olunca tampona ekle"""
+    entry = build_entry(request, action, instance, changes)
+    transaction.on_commit(lambda: buffer.add(entry))
+
+
+def flush():
+    return buffer.flush()
@@ -0,0 +1,380 @@
+"""
+📅 Availability Engine
+Ekipman müsaitlik sorguları için process-içi aralık ağacı (interval tree)
+
+Her ajans için onaylı/aktif rezervasyonlar bellekte tutulur:
+- İlk sorguda DB'den bir kez yüklenir
+- post_save/post_delete sinyalleriyle artımlı güncellenir (api/signals_cache.py)
+- Diğer worker process'lerindeki değişiklikler ajansın 'availability' sayacı ile fark edilir
+  (api/services/versions.py): sayaç değişiklikle aynı transaction'da artar, Redis sadece
+  kopyasını tutar (Redis sıfırlansa da versiyon geri gitmez, eski motor güncel sanılmaz)
+
+Tüm aralıklar yarı açıktır: [start, end)
+"""
+import random
+import threading
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+
+from api.services import versions
+
+# Çakışma sayılan rezervasyon durumları
+BLOCKING_STATUSES = ('approved', 'active')
+
+# Rezerve edilemeyen ekipman durumları
+UNAVAILABLE_EQUIPMENT_STATUSES = ('maintenance', 'retired')
+
+VERSION_KEY = 'availability:version:{agency_id}'
+# Redis'teki versiyon kopyasının ömrü (gecikmiş bir yazma en fazla bu kadar yaşar)
+VERSION_TIMEOUT = 5 * 60
+
+
+class _Node:
+    __slots__ = ('key', 'start', 'end', 'value', 'priority', 'max_end', 'left', 'right')
+
+    def __init__(self, key, start, end, value):
+        self.key = key
+        self.start = start
+        self.end = end
+        self.value = value
+        self.priority = random.random()
+        self.max_end = end
+        self.left = None
+        self.right = None
+
+
+def _update(node):
+    max_end = node.end
+    if node.left is not None and node.left.max_end > max_end:
+        max_end = node.left.max_end
+    if node.right is not None and node.right.max_end > max_end:
+        max_end = node.right.max_end
+    node.max_end = max_end
+
+
+def _rotate_right(node):
+    left = node.left
+    node.left = left.right
+    left.right = node
+    _update(node)
+    _update(left)
+    return left
+
+
+def _rotate_left(node):
+    right = node.right
+    node.right = right.left
+    right.left = node
+    _update(node)
+    _update(right)
+    return right
+
+
+def _insert(node, new):
+    if node is None:
+        return new
+    if new.key < node.key:
+        node.left = _insert(node.left, new)
+        if node.left.priority > node.priority:
+            return _rotate_right(node)
+    else:
+        node.right = _insert(node.right, new)
+        if node.right.priority > node.priority:
+            return _rotate_left(node)
+    _update(node)
+    return node
+
+
+def _merge(left, right):
+    # left'teki tüm anahtarlar right'takilerden küçüktür
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+def _remove(node, key):
+    if node is None:
+        return None
+    if key < node.key:
+        node.left = _remove(node.left, key)
+    elif node.key < key:
+        node.right = _remove(node.right, key)
+    else:
+        return _merge(node.left, node.right)
+    _update(node)
+    return node
+
+
+def _collect(node, start, end, out):
+    if node is None or node.max_end <= start:
+        return
+    _collect(node.left, start, end, out)
+    if node.start < end:
+        if node.end > start:
+            out.append(node.value)
+        _collect(node.right, start, end, out)
+
+
+def _any(node, start, end, exclude):
+    if node is None or node.max_end <= start:
+        return False
+    if _any(node.left, start, end, exclude):
+        return True
+    if node.start >= end:
+        return False
+    if node.end > start and node.value != exclude:
+        return True
+    return _any(node.right, start, end, exclude)
+
+
+class IntervalTree:
+    """
+    Treap tabanlı, max_end ile zenginleştirilmiş aralık ağacı.
+    Ekleme/silme O(log n), çakışma sorgusu O(log n + k).
+    """
+    __slots__ = ('_root', '_size')
+
+    def __init__(self):
+        self._root = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def insert(self, start, end, value):
+        key = (start, end, str(value))
+        self._root = _insert(self._root, _Node(key, start, end, value))
+        self._size += 1
+
+    def remove(self, start, end, value):
+        self._root = _remove(self._root, (start, end, str(value)))
+        self._size -= 1
+
+    def overlapping(self, start, end):
+        """[start, end) ile çakışan aralıkların value listesi"""
+        out = []
+        _collect(self._root, start, end, out)
+        return out
+
+    def overlaps(self, start, end, exclude=None):
+        """[start, end) ile çakışan (exclude hariç) en az bir aralık var mı?"""
+        return _any(self._root, start, end, exclude)
+
+
+class AgencyAvailability:
+    """
+    Tek bir ajansın müsaitlik görüntüsü.
+
+    - items: equipment_id -> (category_id, status)
+    - reservations: reservation_id -> (equipment_id, start, end)
+    - by_equipment: ekipman bazlı aralık ağaçları ("X müsait mi?")
+    - timeline: ajans genelindeki aralık ağacı ("C kategorisinde hangileri boş?")
+    """
+
+    def __init__(self, agency_id, version=None):
+        self.agency_id = agency_id
+        self.version = version
+        self.items = {}
+        self.reservations = {}
+        self.by_equipment = defaultdict(IntervalTree)
+        self.timeline = IntervalTree()
+        self.lock = threading.RLock()
+
+    @classmethod
+    def build(cls, agency_id, version=None):
+        from api.models import Equipment, EquipmentReservation
+
+        engine = cls(agency_id, version)
+        items = Equipment.objects.filter(agency_id=agency_id).values_list('id', 'category_id', 'status')
+        for equipment_id, category_id, status in items.iterator():
+            engine.items[equipment_id] = (category_id, status)
+
+        reservations = EquipmentReservation.objects.filter(
+            agency_id=agency_id,
+            status__in=BLOCKING_STATUSES
+        ).values_list('id', 'equipment_id', 'start_date', 'end_date')
+        for reservation_id, equipment_id, start, end in reservations.iterator():
+            engine._add(reservation_id, equipment_id, start, end)
+        return engine
+
+    # ------------------------------------------------------------------
+    # Artımlı güncelleme
+    # ------------------------------------------------------------------
+    def _add(self, reservation_id, equipment_id, start, end):
+        if end <= start:
+            return
+        self.reservations[reservation_id] = (equipment_id, start, end)
+        self.by_equipment[equipment_id].insert(start, end, reservation_id)
+        self.timeline.insert(start, end, reservation_id)
+
+    def _discard(self, reservation_id):
+        current = self.reservations.pop(reservation_id, None)
+        if current is None:
+            return
+        equipment_id, start, end = current
+        tree = self.by_equipment[equipment_id]
+        tree.remove(start, end, reservation_id)
+        if not len(tree):
+            del self.by_equipment[equipment_id]
+        self.timeline.remove(start, end, reservation_id)
+
+    def apply_reservation(self, reservation, deleted=False):
+        with self.lock:
+            self._discard(reservation.id)
+            if not deleted and reservation.status in BLOCKING_STATUSES:
+                self._add(reservation.id, reservation.equipment_id, reservation.start_date, reservation.end_date)
+
+    def apply_equipment(self, equipment, deleted=False):
+        with self.lock:
+            if deleted:
+                self.items.pop(equipment.id, None)
+            else:
+                self.items[equipment.id] = (equipment.category_id, equipment.status)
+
+    # ------------------------------------------------------------------
+    # Sorgular
+    # ------------------------------------------------------------------
+    def conflicts(self, equipment_id, start, end, exclude=None):
+        """Ekipmanın [start, end) ile çakışan rezervasyon ID'leri"""
+        with self.lock:
+            tree = self.by_equipment.get(equipment_id)
+            if tree is None:
+                return []
+            return [rid for rid in tree.overlapping(start, end) if rid != exclude]
+
+    def is_free(self, equipment_id, start, end, exclude=None):
+        with self.lock:
+            tree = self.by_equipment.get(equipment_id)
+            return tree is None or not tree.overlaps(start, end, exclude)
+
+    def busy_equipment(self, start, end):
+        """[start, end) aralığında dolu olan ekipman ID'leri"""
+        with self.lock:
+            return {self.reservations[rid][0] for rid in self.timeline.overlapping(start, end)}
+
+    def free_items(self, start, end, category_id=None):
+        """
+        [start, end) aralığında boş olan ekipman ID'leri.
+        category_id verilirse sadece o kategorideki ekipmanlar döner.
+        """
+        busy = self.busy_equipment(start, end)
+        with self.lock:
+            return [
+                equipment_id
+                for equipment_id, (item_category, status) in self.items.items()
+                if (category_id is None or str(item_category) == str(category_id))
+                and status not in UNAVAILABLE_EQUIPMENT_STATUSES
+                and equipment_id not in busy
+            ]
+
+
+# ============================================================================
+# Process-içi registry
+# ============================================================================
+_engines = {}
+_registry_lock = threading.Lock()
+
+
+def _db_version(agency_id):
+    """Ajansın kalıcı müsaitlik versiyonu"""
+    return versions.current(agency_id, versions.AVAILABILITY)
+
+
+def _read_version(agency_id):
+    key = VERSION_KEY.format(agency_id=agency_id)
+    try:
+        version = cache.get(key)
+    except Exception:
+        # Cache yoksa kalıcı değer kullanılır
+        return _db_version(agency_id)
+    if version is None:
+        version = _db_version(agency_id)
+        if version is not None:
+            try:
+                # add: bu arada _publish_version'ın yazdığı yeni değerin üzerine yazılmaz
+                cache.add(key, version, VERSION_TIMEOUT)
+            except Exception:
+                pass
+    return version
+
+
+def _publish_version(agency_id):
+    # Commit sonrası güncel değer okunur: paralel artırmalarda geç kalan eski değeri yazmaz
+    version = _db_version(agency_id)
+    if version is None:
+        return
+    try:
+        cache.set(VERSION_KEY.format(agency_id=agency_id), version, VERSION_TIMEOUT)
+    except Exception:
+        pass
+
+
+def _bump_version(agency_id):
+    """
+    Versiyonu değişikliği yapan transaction içinde artırır ve yeni değeri döner.
+    Sadece sayacın satırı commit'e kadar kilitli kalır (Agency satırı değil).
+    """
+    with transaction.atomic():
+        return versions.bump(agency_id, versions.AVAILABILITY)
+
+
+def get_engine(agency_id):
+    """
+    Ajansın güncel müsaitlik motorunu döner.
+    Başka bir process'te değişiklik olduysa (versiyon farklı) yeniden kurulur.
+    """
+    version = _read_version(agency_id)
+    engine = _engines.get(agency_id)
+    if engine is not None and version is not None and engine.version == version:
+        return engine
+
+    with _registry_lock:
+        engine = _engines.get(agency_id)
+        if engine is None or version is None or engine.version != version:
+            engine = AgencyAvailability.build(agency_id, version)
+            if version is not None:
+                _engines[agency_id] = engine
+    return engine
+
+
+def _apply_committed(agency_id, new_version, apply):
+    _publish_version(agency_id)
+    engine = _engines.get(agency_id)
+    if engine is None:
+        return
+    with engine.lock:
+        # Sadece bir önceki versiyondaysak artımlı güncelle, aksi halde
+        # arada kaçırdığımız değişiklik var demektir: yeniden kurulsun
+        if new_version is not None and engine.version == new_version - 1:
+            apply(engine)
+            engine.version = new_version
+            return
+    with _registry_lock:
+        _engines.pop(agency_id, None)
+
+
+def _apply(agency_id, apply):
+    # Versiyon değişiklikle birlikte commit olur; bellekteki ağaç ise rollback
+    # olursa bozulmasın diye commit sonrası güncellenir
+    new_version = _bump_version(agency_id)
+    transaction.on_commit(lambda: _apply_committed(agency_id, new_version, apply))
+
+
+def reservation_changed(reservation, deleted=False):
+    """Rezervasyon kaydedildi/silindi (değişikliği yapan transaction içinde çağrılır)"""
+    _apply(reservation.agency_id, lambda engine: engine.apply_reservation(reservation, deleted))
+
+
+def equipment_changed(equipment, deleted=False):
+    """Ekipman kaydedildi/silindi (değişikliği yapan transaction içinde çağrılır)"""
+    _apply(equipment.agency_id, lambda engine: engine.apply_equipment(equipment, deleted))
@@ -0,0 +1,127 @@
+"""
+🧬 Blob Service
+İçerik adresli (SHA-256) dosya deposu: aynı içerik ajans içinde bir kez saklanır
+
+- Hash, dosya okunurken bloklar halinde hesaplanır (bellekte tam kopya yok):
+  küçük yüklemede kaydetmeden önce, parçalı yüklemede tamamlanan object
+  Celery task'ında (hash_file) okunarak
+- Aynı hash'li blob varsa File onu gösterir, yeni yüklenen kopya silinir;
+  istemci hash'i önceden bildirirse (FileUpload.sha256) hiç byte yüklenmez
+- Blob.ref_count: blob'u gösteren File sayısı. Son File silinince object de silinir
+  (File create/delete sinyalleri: api/signals_cache.py)
+- Ajanslar arası paylaşım yok: hash bilmek başka ajansın içeriğine erişim vermez
+"""
+import hashlib
+
+from django.db import transaction
+from django.db.models import F
+
+from api.models import Blob, File
+from api.services import storage_usage
+from api.services.storage_service import StorageError, backend
+
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+PENDING_BATCH_SIZE = 50
+
+
+def hash_chunks(chunks):
+    """(sha256 hex, byte sayısı)"""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in chunks:
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def hash_uploaded(file_obj):
+    """Django UploadedFile'ı hash'ler ve başa sarar (ardından kaydedilebilsin)"""
+    sha256, _ = hash_chunks(file_obj.chunks(HASH_CHUNK_SIZE))
+    file_obj.seek(0)
+    return sha256
+
+
+def find(agency_id, sha256):
+    if not sha256:
+        return None
+    return Blob.objects.filter(agency_id=agency_id, sha256=sha256).first()
+
+
+def _delete_object(key):
+    try:
+        backend.delete(key)
+    except StorageError:
+        pass
+
+
+def attach(file, sha256, size, content_type=''):
+    """
+    Hash'lenen dosyayı blob'a bağlar.
+    Ajansta aynı içerik varsa File mevcut blob'un object'ini gösterir ve yeni kopya
+    (commit sonrası) silinir; yoksa dosyanın object'i yeni blob olur.
+    """
+    with transaction.atomic():
+        # Aynı dosya iki kez bağlanmasın (paralel hash task'ları)
+        if not File.objects.select_for_update().filter(pk=file.pk, blob__isnull=True).values_list('id', flat=True):
+            return File.objects.get(pk=file.pk).blob
+        blob, created = Blob.objects.select_for_update().get_or_create(
+            agency_id=file.agency_id, sha256=sha256,
+            defaults={'size': size, 'content_type': content_type, 'storage_key': file.file.name}
+        )
+        duplicate_key = None if created or file.file.name == blob.storage_key else file.file.name
+
+        # Sinyalsiz güncelleme: sayaç burada artırılır (bkz. signals_cache.acquire_blob)
+        File.objects.filter(pk=file.pk).update(blob=blob, file=blob.storage_key)
+        Blob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+        file.blob = blob
+        file.file.name = blob.storage_key
+
+        if not created:
+            # Dosyanın byte'ları zaten blob'da sayılı (aynı object ya da silinecek kopya)
+            storage_usage.duplicate_removed(file, size)
+        if duplicate_key:
+            transaction.on_commit(lambda: _delete_object(duplicate_key))
+    return blob
+
+
+def acquire(blob_id):
+    Blob.objects.filter(pk=blob_id).update(ref_count=F('ref_count') + 1)
+
+
+def release(blob_id):
+    """
+    Referansı bırakır; blob'u gösteren File kalmadıysa blob ve object silinir.
+    Depolamadan kalkan byte sayısını döner (blob duruyorsa 0).
+    """
+    with transaction.atomic():
+        blob = Blob.objects.select_for_update().filter(pk=blob_id).first()
+        if blob is None:
+            return 0
+        if blob.ref_count > 1:
+            Blob.objects.filter(pk=blob_id).update(ref_count=F('ref_count') - 1)
+            return 0
+        key = blob.storage_key
+        blob.delete()
+        transaction.on_commit(lambda: _delete_object(key))
+    return blob.size
+
+
+def hash_file(file_id):
+    """Depolamadaki object'i okuyarak hash'ler ve blob'a bağlar (S3 yüklemeleri / eski dosyalar)"""
+    file = File.objects.filter(pk=file_id, blob__isnull=True).first()
+    if file is None or not file.file.name:
+        return None
+    stream = backend.open(file.file.name)
+    try:
+        sha256, size = hash_chunks(iter(lambda: stream.read(HASH_CHUNK_SIZE), b''))
+    finally:
+        stream.close()
+    return attach(file, sha256, size)
+
+
+def pending_file_ids(limit=PENDING_BATCH_SIZE):
+    return list(
+        File.objects.filter(blob__isnull=True).exclude(file='')
+        .order_by('created_at').values_list('id', flat=True)[:limit]
+    )
+
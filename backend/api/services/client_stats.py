@@ -0,0 +1,110 @@
+"""
+🤝 Client (CRM) Stats Service
+ClientViewSet.top_clients / stats hesapları
+
+- Proje sayısı ve ciro tek GROUP BY sorgusuyla (müşteri başına sorgu yok)
+- Tag dağılımı Postgres'te jsonb_array_elements_text ile SQL'de gruplanır,
+  müşteriler Python'a yüklenmez
+- Sonuçlar ajans başına kısa süreli cache'lenir (binlerce müşterili ajanslarda
+  sayfa her açıldığında yeniden hesaplanmasın)
+"""
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Exists, OuterRef, Sum
+from django.utils import timezone
+
+from api.models import Client, Project
+
+TOP_CLIENTS_KEY = 'clients:top:{agency_id}'
+STATS_KEY = 'clients:stats:{agency_id}'
+CACHE_TIMEOUT = 60
+
+TOP_LIMIT = 10
+TAG_LIMIT = 10
+ACTIVE_DAYS = 180
+
+
+def _cached(key, build):
+    try:
+        data = cache.get(key)
+    except Exception:
+        data = None
+    if data is not None:
+        return data
+
+    data = build()
+    try:
+        cache.set(key, data, CACHE_TIMEOUT)
+    except Exception:
+        pass
+    return data
+
+
+def build_top_clients(agency_id, limit=TOP_LIMIT):
+    """En çok proje yapılan müşteriler (eşitlikte ciroya göre), tek sorgu"""
+    clients = Client.objects.filter(agency_id=agency_id).annotate(
+        project_count=Count('projects'),
+        total_revenue=Sum('projects__budget_estimated')
+    ).filter(project_count__gt=0).order_by('-project_count', '-total_revenue', 'name')[:limit]
+
+    return [
+        {
+            'id': client.id,
+            'company_name': client.name,
+            'project_count': client.project_count,
+            'total_revenue': float(client.total_revenue or Decimal('0')),
+            'tags': client.tags or []
+        }
+        for client in clients
+    ]
+
+
+def tag_distribution(agency_id, limit=TAG_LIMIT):
+    """{tag: müşteri sayısı} en çok kullanılan ilk limit tag"""
+    if connection.vendor != 'postgresql':
+        # Dev/test (sqlite): JSON dizisi SQL'de açılamıyor, Python'da say
+        counts = Counter()
+        for tags in Client.objects.filter(agency_id=agency_id).values_list('tags', flat=True).iterator():
+            if isinstance(tags, list):
+                counts.update(str(tag) for tag in tags)
+        return dict(counts.most_common(limit))
+
+    table = connection.ops.quote_name(Client._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT tag, COUNT(*) AS total FROM {table} AS c "
+            f"CROSS JOIN LATERAL jsonb_array_elements_text(c.tags) AS tag "
+            f"WHERE c.agency_id = %s AND jsonb_typeof(c.tags) = 'array' "
+            f"GROUP BY tag ORDER BY total DESC, tag LIMIT %s",
+            [agency_id, limit]
+        )
+        return {tag: total for tag, total in cursor.fetchall()}
+
+
+def build_stats(agency_id):
+    """Toplam / aktif müşteri (tek aggregate) + tag dağılımı (tek GROUP BY)"""
+    since = timezone.now() - timedelta(days=ACTIVE_DAYS)
+    recent_projects = Project.objects.filter(client=OuterRef('pk'), created_at__gte=since)
+    counts = Client.objects.filter(agency_id=agency_id).aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Exists(recent_projects))
+    )
+
+    return {
+        'total_clients': counts['total'],
+        'active_clients': counts['active'],
+        'inactive_clients': counts['total'] - counts['active'],
+        'tag_distribution': tag_distribution(agency_id)
+    }
+
+
+def get_top_clients(agency_id):
+    return _cached(TOP_CLIENTS_KEY.format(agency_id=agency_id), lambda: build_top_clients(agency_id))
+
+
+def get_stats(agency_id):
+    return _cached(STATS_KEY.format(agency_id=agency_id), lambda: build_stats(agency_id))
@@ -0,0 +1,200 @@
+"""
+📊 Dashboard Stats Service
+Ajans bazlı dashboard özetini Redis'te tutar
+
+- Dashboard isteği tek bir cache okumasıdır
+- Project / Task / ShootingDay değiştiğinde sinyallerle invalidate edilir (api/signals_cache.py)
+- Trend değerleri günlük DashboardSnapshot kayıtlarından hesaplanır
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from api.models import DashboardSnapshot, Project, ShootingDay, Task
+
+ACTIVE_PROJECT_STATUSES = ('standard_planning', 'active_production', 'post_production', 'review_client')
+
+CACHE_KEY = 'dashboard:stats:{agency_id}:{date}'
+
+# Sinyalle yakalanamayan toplu update()'ler için güvenlik süresi
+CACHE_TIMEOUT = 5 * 60
+
+
+def _cache_key(agency_id, date=None):
+    return CACHE_KEY.format(agency_id=agency_id, date=date or timezone.localdate())
+
+
+def _month_start():
+    return timezone.localtime().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def collect_counts(agency_ids):
+    """
+    Verilen ajanslar için sayaçları GROUP BY agency_id ile hesaplar (2 sorgu).
+    Returns: {agency_id: {'active_projects': .., 'pending_tasks': .., ...}}
+    """
+    counts = {
+        agency_id: {
+            'active_projects': 0,
+            'monthly_revenue': Decimal('0'),
+            'pending_tasks': 0,
+            'completed_tasks': 0,
+            'urgent_tasks': 0,
+        }
+        for agency_id in agency_ids
+    }
+
+    projects = Project.objects.filter(agency_id__in=agency_ids).values('agency_id').annotate(
+        active=Count('id', filter=Q(status__in=ACTIVE_PROJECT_STATUSES)),
+        revenue=Sum('budget_estimated', filter=Q(created_at__gte=_month_start())),
+    ).order_by()
+    for row in projects:
+        counts[row['agency_id']]['active_projects'] = row['active']
+        counts[row['agency_id']]['monthly_revenue'] = row['revenue'] or Decimal('0')
+
+    # Acil: kritik öncelikli projelerdeki bitmemiş görevler
+    tasks = Task.objects.filter(agency_id__in=agency_ids).values('agency_id').annotate(
+        pending=Count('id', filter=~Q(status='done')),
+        completed=Count('id', filter=Q(status='done')),
+        urgent=Count('id', filter=~Q(status='done') & Q(project__priority='critical')),
+    ).order_by()
+    for row in tasks:
+        counts[row['agency_id']]['pending_tasks'] = row['pending']
+        counts[row['agency_id']]['completed_tasks'] = row['completed']
+        counts[row['agency_id']]['urgent_tasks'] = row['urgent']
+
+    return counts
+
+
+def store_daily_snapshots(agency_ids, date=None):
+    """Günlük özetleri kaydeder (varsa günceller). Tek INSERT ... ON CONFLICT."""
+    date = date or timezone.localdate()
+    counts = collect_counts(agency_ids)
+    DashboardSnapshot.objects.bulk_create(
+        [DashboardSnapshot(agency_id=agency_id, date=date, **values) for agency_id, values in counts.items()],
+        update_conflicts=True,
+        unique_fields=['agency', 'date'],
+        update_fields=['active_projects', 'pending_tasks', 'completed_tasks', 'urgent_tasks', 'monthly_revenue', 'updated_at'],
+    )
+    return len(counts)
+
+
+def _diff_trend(current, previous, suffix):
+    if previous is None:
+        return '-'
+    return f'{current - previous:+d} {suffix}'
+
+
+def _percent_trend(current, previous):
+    if not previous:
+        return '-'
+    change = (Decimal(current) - Decimal(previous)) / Decimal(previous) * 100
+    return f'{"+" if change >= 0 else "-"}%{abs(change):.1f}'
+
+
+def _format_revenue(value):
+    return f'₺{int(value / 1000)}K' if value >= 1000 else f'₺{value}'
+
+
+def _build_schedule(agency, today):
+    schedule = []
+    today_shooting = ShootingDay.objects.filter(
+        agency=agency,
+        date=today
+    ).select_related('project', 'main_location')
+    for shoot in today_shooting:
+        schedule.append({
+            'type': 'shooting',
+            'time': shoot.call_time.strftime('%H:%M'),
+            'title': f"{shoot.project.title} - Set/Çekim",
+            'location': shoot.main_location.name if shoot.main_location else "Belirtilmedi",
+            'color': 'blue'
+        })
+
+    today_tasks = Task.objects.filter(agency=agency, due_date__date=today).select_related('project')
+    for task in today_tasks:
+        schedule.append({
+            'type': 'task',
+            'time': timezone.localtime(task.due_date).strftime('%H:%M'),
+            'title': task.title,
+            'location': task.project.title,
+            'color': 'purple'
+        })
+
+    schedule.sort(key=lambda x: x['time'])
+    return schedule
+
+
+def build_dashboard_stats(agency):
+    """Dashboard özetini DB'den hesaplar (cache miss durumunda)"""
+    from api.serializers.project import ProjectSerializer
+
+    today = timezone.localdate()
+    counts = collect_counts([agency.id])[agency.id]
+
+    # Trendler: 1 hafta ve 1 ay önceki günlük özetler
+    week_ago = today - timedelta(days=7)
+    last_month_end = today.replace(day=1) - timedelta(days=1)
+    month_ago = last_month_end.replace(day=min(today.day, last_month_end.day))
+    snapshots = {
+        s.date: s for s in DashboardSnapshot.objects.filter(agency=agency, date__in=[week_ago, month_ago])
+    }
+    last_week = snapshots.get(week_ago)
+    last_month = snapshots.get(month_ago)
+
+    recent_projects = Project.objects.filter(
+        agency=agency,
+        status__in=ACTIVE_PROJECT_STATUSES
+    ).order_by('-updated_at')[:5]
+
+    return {
+        'stats': {
+            'active_projects': {
+                'value': counts['active_projects'],
+                'trend': _diff_trend(counts['active_projects'], last_week and last_week.active_projects, 'bu hafta')
+            },
+            'pending_tasks': {
+                'value': counts['pending_tasks'],
+                'trend': f"{counts['urgent_tasks']} acil"
+            },
+            'completed_tasks': {
+                'value': counts['completed_tasks'],
+                'trend': _percent_trend(counts['completed_tasks'], last_week and last_week.completed_tasks)
+            },
+            'monthly_revenue': {
+                'value': _format_revenue(counts['monthly_revenue']),
+                'trend': _percent_trend(counts['monthly_revenue'], last_month and last_month.monthly_revenue)
+            }
+        },
+        'recent_projects': ProjectSerializer(recent_projects, many=True).data,
+        'schedule': _build_schedule(agency, today)
+    }
+
+
+def get_dashboard_stats(agency):
+    """Dashboard özeti: önce cache, yoksa hesapla ve yaz"""
+    key = _cache_key(agency.id)
+    try:
+        data = cache.get(key)
+    except Exception:
+        data = None
+    if data is not None:
+        return data
+
+    data = build_dashboard_stats(agency)
+    try:
+        cache.set(key, data, CACHE_TIMEOUT)
+    except Exception:
+        pass
+    return data
+
+
+def invalidate(agency_id):
+    """Ajansın bugünkü dashboard önbelleğini siler"""
+    try:
+        cache.delete(_cache_key(agency_id))
+    except Exception:
+        pass
@@ -0,0 +1,103 @@
+"""
+🗂️ File Versions Service
+Dosya versiyon zinciri (eskiden isim prefix'iyle tahmin ediliyordu)
+
+- File.root: zincirin ilk versiyonu (ilk versiyonda kendisi), File.parent: türetildiği versiyon
+- version zincirde artan numara: yeni versiyon root satırı kilitlenerek max + 1 alınır,
+  eşzamanlı yüklemeler aynı numarayı alamaz ((root, version) unique)
+- Geçmiş tek sorgu: root = X ORDER BY version DESC ((root, version) index'i)
+- Geri alma (rollback) eski versiyonu silmez, içeriğini yeni versiyon olarak ekler:
+  aynı blob'u gösterdiği için depolamada kopya oluşmaz (api/services/blobs.py)
+- Versiyon silinince zincir kopmaz: çocukları silinenin parent'ına, ilk versiyon
+  silinirse zincir sonraki en eski versiyona bağlanır (detach, pre_delete sinyali)
+"""
+from django.db import transaction
+from django.db.models import Max
+
+from api.models import File
+
+# diff'te karşılaştırılan alanlar
+DIFF_FIELDS = ('original_name', 'file_type', 'file_size', 'description', 'tags', 'uploaded_by_id', 'created_at')
+
+
+def lineage_id(file):
+    """Zincirin kimliği (root). root boşsa (eski / kopmuş kayıt) dosya kendi zinciridir."""
+    return file.root_id or file.pk
+
+
+def history(queryset, file):
+    """Zincirdeki tüm versiyonlar, en yeni önce"""
+    return queryset.filter(root_id=lineage_id(file)).order_by('-version')
+
+
+def create(parent, **fields):
+    """parent'tan türeyen yeni versiyonu oluşturur (numara: zincirdeki en büyük + 1)"""
+    root_id = lineage_id(parent)
+    with transaction.atomic():
+        # Aynı zincire paralel versiyon eklenmesin
+        list(File.objects.select_for_update().filter(pk=root_id).values_list('id', flat=True))
+        latest = File.objects.filter(root_id=root_id).aggregate(latest=Max('version'))['latest']
+        return File.objects.create(
+            root_id=root_id,
+            parent=parent,
+            version=max(latest or 0, parent.version) + 1,
+            **fields
+        )
+
+
+def rollback(target, user):
+    """target versiyonunun içeriğini ve metadata'sını zincirin en yeni versiyonu yapar"""
+    return create(
+        target,
+        agency_id=target.agency_id,
+        project_id=target.project_id,
+        uploaded_by=user,
+        file=target.file.name,
+        blob_id=target.blob_id,
+        original_name=target.original_name,
+        file_type=target.file_type,
+        file_size=target.file_size,
+        description=f'v{target.version} geri yüklendi',
+        tags=target.tags
+    )
+
+
+def _value(file, field):
+    value = getattr(file, field)
+    return str(value) if field.endswith('_id') and value is not None else value
+
+
+def diff(old, new):
+    """
+    İki versiyonun metadata farkı.
+    same_content: ikisi de hash'liyse içerik aynı mı (hash'lenmemişse object aynıysa True, değilse None)
+    """
+    changes = {}
+    for field in DIFF_FIELDS:
+        before, after = _value(old, field), _value(new, field)
+        if before != after:
+            changes[field.removesuffix('_id')] = {'from': before, 'to': after}
+
+    if old.file.name == new.file.name:
+        same_content = True
+    elif old.blob_id and new.blob_id:
+        same_content = old.blob_id == new.blob_id
+    else:
+        same_content = None
+    return {
+        'from': {'id': old.pk, 'version': old.version},
+        'to': {'id': new.pk, 'version': new.version},
+        'changes': changes,
+        'same_content': same_content,
+    }
+
+
+def detach(file):
+    """Silinecek versiyonu zincirden çıkarır (çocuklar ve zincir kimliği korunur)"""
+    File.objects.filter(parent_id=file.pk).update(parent_id=file.parent_id)
+    if lineage_id(file) != file.pk:
+        return
+    others = File.objects.filter(root_id=file.pk).exclude(pk=file.pk)
+    successor = others.order_by('version').values_list('pk', flat=True).first()
+    if successor:
+        others.update(root_id=successor)
@@ -0,0 +1,161 @@
+"""
+📧 Mail Dispatch Service
+Tüm email task'larının kullandığı gönderim katmanı
+
+- Worker process başına açık tutulan (pooled) SMTP bağlantısı
+- Mesajlar tek bağlantıdan teker teker gönderilir: hangi mesajın gittiği bilinir
+- Sağlayıcı (EMAIL_HOST) başına hız limiti (mesaj/saniye)
+- Hatalar yutulmaz: mesaj bazında exponential backoff ile tekrar denenir,
+  yine gönderilemezse MailDeliveryError fırlatılır (unsent: sadece gitmeyenler).
+  Task'lar sadece unsent'i tekrar dener, gönderilmiş mesaj ikinci kez gitmez
+"""
+import logging
+import smtplib
+import threading
+import time
+
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+logger = logging.getLogger(__name__)
+
+# Bu hatalarda tekrar denemek anlamlı (bağlantı koptu, sunucu meşgul vs.)
+RETRYABLE_ERRORS = (smtplib.SMTPException, OSError)
+
+
+class MailDeliveryError(Exception):
+    """Tekrar denemelere rağmen gönderilemeyen mesajlar (unsent: ilk gitmeyen ve sonrakiler)"""
+
+    def __init__(self, unsent, cause):
+        self.unsent = unsent
+        self.cause = cause
+        super().__init__(f"{len(unsent)} mesaj gönderilemedi: {cause}")
+
+
+class _RateLimiter:
+    """Basit aralık tabanlı limiter: saniyede en fazla `rate` mesaj"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.next_at = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self, count=1):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_at)
+            self.next_at = start + self.interval * count
+        if start > now:
+            time.sleep(start - now)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+_local = threading.local()
+
+
+def _provider():
+    return getattr(settings, 'EMAIL_HOST', '') or 'default'
+
+
+def _limiter():
+    provider = _provider()
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limits = getattr(settings, 'EMAIL_RATE_LIMITS', {})
+            rate = limits.get(provider, getattr(settings, 'EMAIL_RATE_LIMIT_DEFAULT', 0))
+            limiter = _limiters[provider] = _RateLimiter(rate)
+    return limiter
+
+
+def _connection():
+    """
+    Worker'a (thread'e) ait açık bağlantıyı döner.
+    Uzun süre boşta kaldıysa sunucu kapatmış olabilir: yeniden açılır.
+    """
+    connection = getattr(_local, 'connection', None)
+    max_idle = getattr(settings, 'EMAIL_CONNECTION_MAX_IDLE', 60)
+    if connection is not None and time.monotonic() - _local.last_used > max_idle:
+        close_connection()
+        connection = None
+
+    if connection is None:
+        connection = get_connection(fail_silently=False)
+        connection.open()
+        _local.connection = connection
+    _local.last_used = time.monotonic()
+    return connection
+
+
+def close_connection():
+    connection = getattr(_local, 'connection', None)
+    _local.connection = None
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+@worker_process_shutdown.connect
+def _close_on_shutdown(**kwargs):
+    close_connection()
+
+
+def build_message(subject, body, to):
+    """Tek alıcılı EmailMessage (DEFAULT_FROM_EMAIL ile)"""
+    if isinstance(to, str):
+        to = [to]
+    return EmailMessage(subject=subject, body=body, from_email=settings.DEFAULT_FROM_EMAIL, to=to)
+
+
+def to_payload(message):
+    """Mesajı Celery argümanına çevirir (build_message ile tekrar kurulur)"""
+    return [message.subject, message.body, message.to]
+
+
+def from_payload(payload):
+    return build_message(*payload)
+
+
+def send_messages(messages):
+    """
+    Mesajları pooled bağlantı üzerinden sırayla gönderir.
+
+    Returns:
+        Gönderilen mesaj sayısı
+    Raises:
+        MailDeliveryError: Bir mesaj tüm denemelere rağmen gönderilemezse
+            (öncekiler gönderilmiş olur, `unsent` o mesaj ve sonrakileri içerir)
+    """
+    messages = [m for m in messages if m.to]
+    max_retries = getattr(settings, 'EMAIL_MAX_RETRIES', 3)
+    sent = 0
+
+    for index, message in enumerate(messages):
+        attempt = 0
+        while True:
+            try:
+                _limiter().wait()
+                sent += _connection().send_messages([message]) or 0
+                break
+            except RETRYABLE_ERRORS as e:
+                # Bağlantı bozulmuş olabilir, bir sonraki denemede yenisi açılsın
+                close_connection()
+                attempt += 1
+                if attempt > max_retries:
+                    raise MailDeliveryError(messages[index:], e) from e
+                delay = 2 ** (attempt - 1)
+                logger.warning("Mail send failed (attempt %s/%s), retrying in %ss: %s", attempt, max_retries, delay, e)
+                time.sleep(delay)
+
+    return sent
+
+
+def send(subject, body, to):
+    """Tek mesaj gönder (pooled bağlantı ile)"""
+    return send_messages([build_message(subject, body, to)])
@@ -0,0 +1,177 @@
+"""
+🔑 Membership / Permission Cache
+Kullanıcının ajanstaki çözümlenmiş yetkileri (rol flag'leri + is_owner)
+
+- Redis'te (user, agency) başına tutulur
+- Access token'a 'agency_perms' claim'i olarak gömülür: çoğu istek DB'ye hiç gitmez
+- Ajans başına versiyon: ajansın 'permissions' sayacı (api/services/versions.py),
+  AgencyMembership / AgencyRole değişikliğiyle aynı transaction'da artar
+  (api/signals_cache.py) ve hiç azalmaz.
+  Eski versiyonlu claim'ler ve cache kayıtları kendiliğinden geçersizdir.
+- Redis'teki versiyon DB değerinin kısa süreli kopyasıdır: key silinirse / Redis
+  yeniden başlarsa DB'den okunur, hiçbir zaman 0'dan başlamaz
+"""
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.models import AgencyMembership
+from api.services import versions
+
+PERMISSION_FIELDS = (
+    'can_manage_projects',
+    'can_manage_team',
+    'can_manage_equipment',
+    'can_view_finance',
+    'can_manage_settings',
+)
+
+VERSION_KEY = 'perm:version:{agency_id}'
+CACHE_KEY = 'perm:{agency_id}:p{version}:{user_id}'
+CACHE_TIMEOUT = 60 * 60
+# Redis'teki versiyon kopyasının ömrü (gecikmiş bir yazma en fazla bu kadar yaşar)
+VERSION_TIMEOUT = 5 * 60
+
+# Claim'deki versiyon anahtarı (DB versiyonundan önceki Redis sayaçlı token'lar eşleşmesin)
+VERSION_CLAIM = 'pv'
+
+CLAIM = 'agency_perms'
+
+# Üyelik yoksa cache'e yazılan değer (None "cache'te yok" demek)
+_NO_MEMBERSHIP = {}
+
+
+def _db_version(agency_id):
+    """Ajansın kalıcı yetki versiyonu"""
+    return versions.current(agency_id, versions.PERMISSIONS)
+
+
+def _version(agency_id):
+    key = VERSION_KEY.format(agency_id=agency_id)
+    try:
+        version = cache.get(key)
+    except Exception:
+        # Cache yoksa kalıcı değer kullanılır
+        return _db_version(agency_id)
+    if version is None:
+        version = _db_version(agency_id)
+        if version is not None:
+            try:
+                # add: bu arada bump_version'ın yazdığı yeni değerin üzerine yazılmaz
+                cache.add(key, version, VERSION_TIMEOUT)
+            except Exception:
+                pass
+    return version
+
+
+def _publish_version(agency_id):
+    # Commit sonrası güncel değer okunur: paralel artırmalarda geç kalan eski değeri yazmaz
+    version = _db_version(agency_id)
+    if version is None:
+        return
+    try:
+        cache.set(VERSION_KEY.format(agency_id=agency_id), version, VERSION_TIMEOUT)
+    except Exception:
+        pass
+
+
+def bump_version(agency_id):
+    """
+    Ajansın tüm yetki cache'lerini ve token claim'lerini geçersiz kıl.
+    Değişikliği yapan transaction içinde çağrılır: versiyon değişiklikle birlikte commit olur.
+    """
+    versions.bump(agency_id, versions.PERMISSIONS)
+    transaction.on_commit(lambda: _publish_version(agency_id))
+
+
+def _load(user_id, agency_id, version):
+    membership = AgencyMembership.objects.select_related('role').filter(
+        user_id=user_id,
+        agency_id=agency_id
+    ).first()
+    if membership is None:
+        return _NO_MEMBERSHIP
+
+    role = membership.role
+    return {
+        'agency': str(agency_id),
+        VERSION_CLAIM: version,
+        'is_owner': membership.is_owner,
+        'is_active': membership.is_active,
+        'role': role.name if role else None,
+        'perms': [field for field in PERMISSION_FIELDS if role and getattr(role, field)],
+    }
+
+
+def get_permissions(user_id, agency_id, claims=None):
+    """
+    Kullanıcının ajanstaki çözümlenmiş yetkileri, üye değilse None.
+
+    Args:
+        claims: Access token'daki 'agency_perms' claim'i (varsa). Ajans ve
+            versiyon güncelse DB'ye de cache'e de gidilmez (sadece versiyon okunur).
+    """
+    if not agency_id:
+        return None
+
+    version = _version(agency_id)
+    if (
+        claims and version is not None
+        and claims.get('agency') == str(agency_id) and claims.get(VERSION_CLAIM) == version
+    ):
+        return claims
+
+    if version is None:
+        return _load(user_id, agency_id, None) or None
+
+    key = CACHE_KEY.format(agency_id=agency_id, version=version, user_id=user_id)
+    try:
+        resolved = cache.get(key)
+    except Exception:
+        resolved = None
+    if resolved is None:
+        resolved = _load(user_id, agency_id, version)
+        try:
+            cache.set(key, resolved, CACHE_TIMEOUT)
+        except Exception:
+            pass
+    return resolved or None
+
+
+def has_permission(resolved, permission):
+    """Owner her şeye yetkili, diğerleri rolündeki flag'e göre"""
+    if not resolved:
+        return False
+    return resolved['is_owner'] or permission in resolved['perms']
+
+
+def request_claims(request):
+    """İstekteki access token'ın yetki claim'i (session auth'ta None)"""
+    token = getattr(request, 'auth', None)
+    try:
+        return token.get(CLAIM) if token is not None else None
+    except AttributeError:
+        return None
+
+
+def for_request(request):
+    """İsteği yapan kullanıcının aktif ajanstaki yetkileri"""
+    user = request.user
+    return get_permissions(user.id, user.current_agency_id, request_claims(request))
+
+
+def add_claims(token, user):
+    """Token'a aktif ajanstaki yetkileri claim olarak ekle"""
+    resolved = get_permissions(user.id, user.current_agency_id)
+    if resolved:
+        token[CLAIM] = resolved
+    return token
+
+
+def tokens_for_user(user):
+    """Yetki claim'li refresh + access token çifti"""
+    refresh = add_claims(RefreshToken.for_user(user), user)
+    return {
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+    }
@@ -1,59 +1,334 @@
 """
 🔔 Notification Service
 Bildirim gönderme helper fonksiyonları
-Celery ile async olarak çalıştırılabilir
+
+- send_many: Tüm alıcılar için tek bulk_create (Notification + NotificationOutbox)
+- Request thread'i channel layer'a (Redis) hiç dokunmaz: WebSocket mesajları
+  outbox'a yazılır, relay_notification_outbox task'ı paketler halinde iletir
+- coalesce_key: Kısa sürede gelen aynı tür bildirimler (örn: 10 görev ataması)
+  WebSocket'e tek özet mesaj olarak gider ("10 yeni görev atandı")
 """
-from api.models import Notification
+import asyncio
+import logging
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, DateTimeField, F, Min, Q, Value, When
+from django.utils import timezone
+from api.models import Notification, NotificationOutbox
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
+logger = logging.getLogger(__name__)
+
+# coalesce_key -> özet mesaj şablonu ({count} yerine bildirim sayısı gelir)
+COALESCE_SUMMARIES = {
+    'task_assigned': '{count} yeni görev size atandı.',
+    'reservation_request': '{count} yeni ekipman talebi var.',
+}
+
+# Son relay çalışmasının özeti (relay_metrics / health check)
+RELAY_METRICS_KEY = 'notifications:relay:last_run'
+
+# İletilemeyen satırın en uzun bekleme süresi (saniye)
+RELAY_MAX_BACKOFF = 300
+
+
+def encode_cursor(created_at, notification_id):
+    """
+    WebSocket resume cursor'ı: "<created_at mikrosaniye>_<id>".
+    (created_at, id) sıralaması UUID pk'lerde de kararlıdır.
+    """
+    micros = int(created_at.timestamp()) * 10 ** 6 + created_at.microsecond
+    return f'{micros}_{notification_id}'
+
+
+def decode_cursor(cursor):
+    """Cursor'ı (created_at, id) çiftine çevirir. Geçersizse ValueError."""
+    micros, _, notification_id = (cursor or '').partition('_')
+    micros = int(micros)
+    created_at = datetime.fromtimestamp(micros // 10 ** 6, tz=dt_timezone.utc)
+    return created_at.replace(microsecond=micros % 10 ** 6), uuid.UUID(notification_id)
+
+
+def _coalesce_deadline(now, user_id, coalesce_key, window):
+    """
+    Mesajın düştüğü pencerenin bitişi. Pencereler (kullanıcı, coalesce_key) başına sabittir:
+    aynı pencerede gelen mesajlar aynı deliver_after'ı alır, relay'de birlikte vadesi gelip
+    tek özet olur. Pencere sınırları anahtara göre kaydırılır, tüm özetler aynı anda
+    relay'e yığılmaz.
+    """
+    window_us = max(int(window * 10 ** 6), 1)
+    offset = zlib.crc32(f'{user_id}:{coalesce_key}'.encode()) % window_us
+    micros = int(now.timestamp()) * 10 ** 6 + now.microsecond
+    end = ((micros - offset) // window_us + 1) * window_us + offset
+    deadline = datetime.fromtimestamp(end // 10 ** 6, tz=dt_timezone.utc)
+    return deadline.replace(microsecond=end % 10 ** 6)
+
+
+def _backoff_until(now):
+    """
+    Başarısız satırın yeni deliver_after'ı, satırın kendi attempts'ine göre
+    (2, 4, 8 ... RELAY_MAX_BACKOFF saniye): tek UPDATE'te her satıra ayrı CASE
+    """
+    whens = []
+    attempts = 0
+    while 2 ** (attempts + 1) < RELAY_MAX_BACKOFF:
+        whens.append(When(attempts=attempts, then=Value(now + timedelta(seconds=2 ** (attempts + 1)))))
+        attempts += 1
+    return Case(
+        *whens,
+        default=Value(now + timedelta(seconds=RELAY_MAX_BACKOFF)),
+        output_field=DateTimeField()
+    )
+
+
+def _payload(notification):
+    return {
+        'id': str(notification.id),
+        'type': notification.notification_type,
+        'title': notification.title,
+        'message': notification.message,
+        'link': notification.link,
+        'created_at': notification.created_at.isoformat(),
+        'cursor': encode_cursor(notification.created_at, notification.id)
+    }
+
+
+def _coalesce(rows):
+    """
+    Outbox satırlarını WebSocket mesajlarına çevirir.
+    Aynı (kullanıcı, coalesce_key) satırları tek mesaj olur: tek satırsa
+    orijinal payload, birden fazlaysa son payload + özet metin.
+    """
+    messages = []
+    groups = {}
+    for row in rows:
+        if not row.coalesce_key:
+            messages.append((row.recipient_id, row.payload))
+            continue
+        groups.setdefault((row.recipient_id, row.coalesce_key), []).append(row.payload)
+
+    for (user_id, coalesce_key), payloads in groups.items():
+        payload = payloads[-1]
+        if len(payloads) > 1:
+            summary = COALESCE_SUMMARIES.get(coalesce_key, '{count} yeni bildirim.')
+            payload = {**payload, 'message': summary.format(count=len(payloads)), 'count': len(payloads)}
+        messages.append((user_id, payload))
+    return messages
+
+
 class NotificationService:
-    
+
+    @staticmethod
+    def push(messages):
+        """
+        WebSocket mesajlarını tek seferde (tek event loop turunda) gönder.
+        Sadece relay tarafından çağrılır; request içinden enqueue kullanın.
+
+        Args:
+            messages: [(user_id, {'title': ..., 'message': ..., 'link': ...}), ...]
+        Raises:
+            Channel layer hataları (relay satırları silmez, tekrar dener)
+        """
+        if not messages:
+            return 0
+
+        channel_layer = get_channel_layer()
+
+        async def _send_all():
+            await asyncio.gather(*[
+                channel_layer.group_send(
+                    f'user_{user_id}',
+                    {'type': 'send_notification', 'message': message}
+                )
+                for user_id, message in messages
+            ])
+
+        async_to_sync(_send_all)()
+        return len(messages)
+
+    @staticmethod
+    def enqueue(messages, coalesce_key=''):
+        """
+        WebSocket mesajlarını outbox'a yaz (tek INSERT, channel layer'a dokunmaz).
+        Çağıranın transaction'ı ile birlikte commit edilir.
+
+        Args:
+            messages: [(user_id, payload), ...]
+            coalesce_key: Verilirse mesajlar kullanıcının NOTIFICATION_COALESCE_WINDOW
+                saniyelik penceresinin sonuna kadar bekletilir ve relay sırasında
+                kullanıcı başına birleştirilir
+        """
+        if not messages:
+            return []
+        now = timezone.now()
+        window = getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', 5)
+        return NotificationOutbox.objects.bulk_create([
+            NotificationOutbox(
+                recipient_id=user_id,
+                payload=payload,
+                coalesce_key=coalesce_key or '',
+                deliver_after=_coalesce_deadline(now, user_id, coalesce_key, window) if coalesce_key else now
+            )
+            for user_id, payload in messages
+        ])
+
+    @staticmethod
+    def send_many(recipients, agency, notification_type, title, message, link='', coalesce_key=None):
+        """
+        Birden fazla kullanıcıya aynı bildirimi gönder
+
+        Args:
+            recipients: User instance'ları veya user ID'leri
+            agency: Agency instance veya ID
+            notification_type: 'info', 'success', 'warning', 'error'
+            title: Bildirim başlığı
+            message: Bildirim mesajı
+            link: Opsiyonel link (frontend route)
+            coalesce_key: Verilirse WebSocket mesajları kısa bir pencerede
+                biriktirilip kullanıcı başına tek özet olarak gönderilir
+                (COALESCE_SUMMARIES'teki anahtarlardan biri)
+
+        Returns:
+            Oluşturulan Notification listesi
+        """
+        user_ids = list(dict.fromkeys(getattr(r, 'pk', r) for r in recipients))
+        if not user_ids:
+            return []
+        agency_id = getattr(agency, 'pk', agency)
+
+        # Bildirimler + outbox aynı transaction'da (2 sorgu)
+        with transaction.atomic():
+            notifications = Notification.objects.bulk_create([
+                Notification(
+                    recipient_id=user_id,
+                    agency_id=agency_id,
+                    notification_type=notification_type,
+                    title=title,
+                    message=message,
+                    link=link or ''
+                )
+                for user_id in user_ids
+            ])
+            NotificationService.enqueue(
+                [(n.recipient_id, _payload(n)) for n in notifications],
+                coalesce_key=coalesce_key
+            )
+        return notifications
+
+    @staticmethod
+    def relay(batch_size=None):
+        """
+        Vadesi gelen outbox satırlarından bir paketi channel layer'a iletir.
+
+        - Satırlar kısa bir transaction'da kiralanır (select_for_update(skip_locked) +
+          deliver_after = şimdi + NOTIFICATION_RELAY_LEASE) ve commit edilir: channel layer'a
+          iletim satır kilidi tutulmadan yapılır, paralel relay'ler kiralanan satırları almaz
+        - Satırlar iletimden sonra silinir (at-least-once; relay ölürse kira dolunca tekrar
+          iletilir, istemci 'id' ile tekilleştirir)
+        - Hata olursa satırlar attempts++ ve her satırın kendi attempts'ine göre backoff ile
+          bekletilir; NOTIFICATION_RELAY_MAX_ATTEMPTS aşılırsa atılır (bildirim DB'de zaten var)
+
+        Returns:
+            {'delivered': .., 'failed': .., 'lag_max': .., 'lag_avg': ..}
+            (lag: satırın vadesi ile iletildiği an arasındaki saniye)
+        """
+        batch_size = batch_size or getattr(settings, 'NOTIFICATION_RELAY_BATCH_SIZE', 500)
+        max_attempts = getattr(settings, 'NOTIFICATION_RELAY_MAX_ATTEMPTS', 10)
+        lease = getattr(settings, 'NOTIFICATION_RELAY_LEASE', 60)
+        result = {'delivered': 0, 'failed': 0, 'lag_max': 0.0, 'lag_avg': 0.0}
+
+        with transaction.atomic():
+            now = timezone.now()
+            rows = list(
+                NotificationOutbox.objects.select_for_update(skip_locked=True)
+                .filter(deliver_after__lte=now)
+                .order_by('deliver_after')[:batch_size]
+            )
+            if not rows:
+                return result
+            ids = [row.id for row in rows]
+            NotificationOutbox.objects.filter(id__in=ids).update(deliver_after=now + timedelta(seconds=lease))
+
+        try:
+            NotificationService.push(_coalesce(rows))
+        except Exception as e:
+            logger.warning("Notification relay failed for %s rows: %s", len(rows), e)
+            failed_at = timezone.now()
+            with transaction.atomic():
+                NotificationOutbox.objects.filter(id__in=ids, attempts__gte=max_attempts - 1).delete()
+                NotificationOutbox.objects.filter(id__in=ids).update(
+                    attempts=F('attempts') + 1,
+                    deliver_after=_backoff_until(failed_at)
+                )
+            result['failed'] = len(rows)
+            return result
+
+        NotificationOutbox.objects.filter(id__in=ids).delete()
+
+        lags = [(now - row.deliver_after).total_seconds() for row in rows]
+        result.update(delivered=len(rows), lag_max=max(lags), lag_avg=sum(lags) / len(lags))
+        return result
+
+    @staticmethod
+    def relay_metrics():
+        """
+        Relay sağlığı: vadesi geçmiş bekleyen satır sayısı, en eskisinin
+        beklediği süre (saniye) ve son relay çalışmasının özeti
+        """
+        now = timezone.now()
+        pending = NotificationOutbox.objects.filter(deliver_after__lte=now).aggregate(
+            count=Count('id'), oldest=Min('deliver_after')
+        )
+        try:
+            last_run = cache.get(RELAY_METRICS_KEY)
+        except Exception:
+            last_run = None
+        return {
+            'pending': pending['count'],
+            'lag_seconds': round((now - pending['oldest']).total_seconds(), 1) if pending['oldest'] else 0,
+            'last_run': last_run,
+        }
+
+    @staticmethod
+    def missed_since(user_id, cursor, limit):
+        """
+        WebSocket yeniden bağlandığında kaçırılan bildirimler (tek sorgu).
+
+        Returns:
+            (payload listesi - eskiden yeniye, has_more)
+        Raises:
+            ValueError: Geçersiz cursor
+        """
+        created_at, notification_id = decode_cursor(cursor)
+        rows = list(
+            Notification.objects.filter(recipient_id=user_id)
+            .filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=notification_id))
+            .order_by('created_at', 'id')[:limit + 1]
+        )
+        return [_payload(n) for n in rows[:limit]], len(rows) > limit
+
     @staticmethod
     def send(user, agency, notification_type, title, message, link=None):
         """
         Kullanıcıya bildirim gönder
-        
+
         Args:
             user: User instance
-            agency: Agency instance  
+            agency: Agency instance
             notification_type: 'info', 'success', 'warning', 'error'
             title: Bildirim başlığı
             message: Bildirim mesajı
             link: Opsiyonel link (frontend route)
         """
-        # Database'e kaydet
-        notification = Notification.objects.create(
-            user=user,
-            agency=agency,
-            notification_type=notification_type,
-            title=title,
-            message=message,
-            link=link
-        )
-        
-        # WebSocket ile real-time gönder (Django Channels)
-        try:
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f'user_{user.id}',
-                {
-                    'type': 'notification_message',
-                    'notification': {
-                        'id': notification.id,
-                        'type': notification_type,
-                        'title': title,
-                        'message': message,
-                        'link': link,
-                        'created_at': notification.created_at.isoformat()
-                    }
-                }
-            )
-        except Exception as e:
-            # Eğer WebSocket başarısız olursa, en azından DB'de var
-            print(f"WebSocket notification failed: {e}")
-        
-        return notification
+        return NotificationService.send_many(
+            [user], agency, notification_type, title, message, link
+        )[0]
 
     @staticmethod
     def notify_reservation_approved(reservation):
@@ -67,12 +342,55 @@ class NotificationService:
             link=f'/reservations/{reservation.id}'
         )
 
+    @staticmethod
+    def notify_reservation_requested(agency, requester, equipment_names, link):
+        """
+        Yeni ekipman talebi: Ajansın ekipman yöneticilerine bildir
+        (rol ile bulunamazsa owner'lara). Talep eden kişiye gitmez.
+        """
+        from api.models import AgencyMembership
+
+        managers = list(AgencyMembership.objects.filter(
+            agency=agency,
+            role__can_manage_equipment=True
+        ).values_list('user_id', flat=True))
+
+        if not managers:
+            managers = list(AgencyMembership.objects.filter(
+                agency=agency, is_owner=True
+            ).values_list('user_id', flat=True))
+
+        managers = [user_id for user_id in managers if user_id != requester.id]
+
+        return NotificationService.send_many(
+            managers,
+            agency,
+            notification_type='warning',
+            title='Yeni Ekipman Talebi',
+            message=f"{requester.get_full_name() or requester.email}, {', '.join(equipment_names)} için rezervasyon istedi.",
+            link=link,
+            coalesce_key='reservation_request'
+        )
+
+    @staticmethod
+    def notify_task_assigned(task, user_ids):
+        """Görev atandı bildirimi (kısa sürede gelen atamalar tek mesajda toplanır)"""
+        return NotificationService.send_many(
+            user_ids,
+            task.agency_id,
+            notification_type='info',
+            title='Yeni Görev Atandı!',
+            message=f'{task.title} görevi size atandı.',
+            link=f'/tasks/{task.id}',
+            coalesce_key='task_assigned'
+        )
+
     @staticmethod
     def notify_task_revision(task):
         """Görev revizyon gerekiyor bildirimi"""
-        return NotificationService.send(
-            user=task.assigned_to,
-            agency=task.agency,
+        return NotificationService.send_many(
+            task.assigned_to.all(),
+            task.agency_id,
             notification_type='warning',
             title='Revizyon Gerekiyor',
             message=f'"{task.title}" göreviniz için revizyon istendi.',
@@ -82,9 +400,9 @@ class NotificationService:
     @staticmethod
     def notify_task_approved(task):
         """Görev onaylandı bildirimi"""
-        return NotificationService.send(
-            user=task.assigned_to,
-            agency=task.agency,
+        return NotificationService.send_many(
+            task.assigned_to.all(),
+            task.agency_id,
             notification_type='success',
             title='Görev Onaylandı! 🎉',
             message=f'"{task.title}" göreviniz başarıyla tamamlandı.',
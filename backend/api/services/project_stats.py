@@ -0,0 +1,177 @@
+"""
+📈 Project Stats Service
+Proje ilerleme sayaçları ve proje detay istatistikleri
+
+- Project.tasks_total / tasks_done / expenses_total denormalize tutulur: proje listesi
+  sayaçları satırdan okur, proje başına COUNT/SUM sorgusu yok
+- Task / Expense kaydedilince/silinince tek UPDATE ... (SELECT COUNT/SUM) ile yeniden
+  hesaplanır (api/signals_cache.py). Artırma/azaltma yerine yeniden sayım: status
+  değişimi, proje değişimi ve eşzamanlı yazmalar sayaçta sapma bırakmaz
+- /projects/{id}/stats/ cevabı Redis'te tutulur (proje başlığı birkaç saniyede bir
+  sorgular); görev, rezervasyon, gider, ekip ve proje değişince silinir
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from api.models import EquipmentReservation, Expense, Project, Task
+
+DONE_STATUS = 'done'
+
+# Bütçeden düşülen gider durumları
+SPENT_EXPENSE_STATUSES = ('approved', 'paid')
+
+CACHE_KEY = 'project:stats:{agency_id}:{project_id}'
+
+# Sinyalle yakalanamayan toplu update()'ler için güvenlik süresi
+CACHE_TIMEOUT = 5 * 60
+
+
+def _count(queryset):
+    """Korelasyonlu COUNT alt sorgusu (satır yoksa 0)"""
+    subquery = queryset.order_by().values('project').annotate(c=Count('*')).values('c')
+    return Coalesce(Subquery(subquery, output_field=IntegerField()), Value(0))
+
+
+def refresh_task_counters(project_ids):
+    """Verilen projelerin görev sayaçlarını yeniden hesapla (tek UPDATE)"""
+    project_ids = {pk for pk in project_ids if pk}
+    if not project_ids:
+        return
+    tasks = Task.objects.filter(project=OuterRef('pk'))
+    Project.objects.filter(pk__in=project_ids).update(
+        tasks_total=_count(tasks),
+        tasks_done=_count(tasks.filter(status=DONE_STATUS))
+    )
+
+
+def refresh_expense_total(project_ids):
+    """Verilen projelerin harcanan gider toplamını yeniden hesapla (tek UPDATE)"""
+    project_ids = {pk for pk in project_ids if pk}
+    if not project_ids:
+        return
+    output = DecimalField(max_digits=14, decimal_places=2)
+    spent = Expense.objects.filter(
+        project=OuterRef('pk'),
+        status__in=SPENT_EXPENSE_STATUSES
+    ).order_by().values('project').annotate(
+        total=Sum(F('amount') * F('exchange_rate'), output_field=output)
+    ).values('total')
+    Project.objects.filter(pk__in=project_ids).update(
+        expenses_total=Coalesce(Subquery(spent, output_field=output), Value(Decimal('0')), output_field=output)
+    )
+
+
+def annotate_team_count(queryset):
+    """team_count: ekip sayısı alt sorguyla (görev join'iyle çarpılmaz)"""
+    members = Project.assigned_team.through.objects.filter(project=OuterRef('pk'))
+    return queryset.annotate(team_count=_count(members))
+
+
+def annotate_task_counts(queryset):
+    """task_total / task_done: canlı sayım, tek join + koşullu aggregate"""
+    return queryset.annotate(
+        task_total=Count('tasks'),
+        task_done=Count('tasks', filter=Q(tasks__status=DONE_STATUS))
+    )
+
+
+def progress_percentage(project):
+    """Annotation varsa canlı sayımdan, yoksa denormalize sayaçlardan"""
+    total = getattr(project, 'task_total', project.tasks_total)
+    done = getattr(project, 'task_done', project.tasks_done)
+    if not total:
+        return 0
+    return round((done / total) * 100, 1)
+
+
+def _cache_key(agency_id, project_id):
+    return CACHE_KEY.format(agency_id=agency_id, project_id=project_id)
+
+
+def build_stats(project):
+    """Proje istatistikleri (3 sorgu: görev durumları, rezervasyonlar, ekip)"""
+    statuses = [value for value, _ in Task.STATUS_CHOICES]
+    task_stats = Task.objects.filter(project=project).aggregate(
+        total=Count('id'),
+        **{status: Count('id', filter=Q(status=status)) for status in statuses}
+    )
+
+    equipment_stats = EquipmentReservation.objects.filter(project=project).aggregate(
+        total_reservations=Count('id'),
+        active_reservations=Count('id', filter=Q(status='active'))
+    )
+
+    members = [
+        {
+            'id': member['id'],
+            'name': f"{member['first_name']} {member['last_name']}".strip() or member['email'],
+            'email': member['email']
+        }
+        for member in project.assigned_team.values('id', 'first_name', 'last_name', 'email')
+    ]
+
+    estimated = project.budget_estimated or Decimal('0')
+    spent = project.expenses_total or Decimal('0')
+    budget_stats = {
+        'estimated_budget': float(estimated),
+        'actual_budget': float(spent),
+    }
+    if estimated > 0:
+        budget_stats['budget_usage_percentage'] = round(float(spent / estimated * 100), 1)
+
+    progress = (task_stats['done'] / task_stats['total']) * 100 if task_stats['total'] else 0
+
+    return {
+        'project_id': project.id,
+        'project_title': project.title,
+        'status': project.status,
+        'progress_percentage': round(progress, 1),
+        'tasks': task_stats,
+        'equipment': equipment_stats,
+        'team': {
+            'team_size': len(members),
+            'team_members': members
+        },
+        'budget': budget_stats,
+        'dates': {
+            'start': project.start_date,
+            'end': project.end_date,
+            'created': project.created_at
+        }
+    }
+
+
+def get_cached_stats(agency_id, project_id):
+    """Cache'teki istatistikler (yoksa None). Hit durumunda DB'ye hiç gidilmez."""
+    try:
+        return cache.get(_cache_key(agency_id, project_id))
+    except Exception:
+        return None
+
+
+def get_stats(project):
+    """Proje istatistikleri: önce cache, yoksa hesapla ve yaz"""
+    data = get_cached_stats(project.agency_id, project.pk)
+    if data is not None:
+        return data
+
+    data = build_stats(project)
+    try:
+        cache.set(_cache_key(project.agency_id, project.pk), data, CACHE_TIMEOUT)
+    except Exception:
+        pass
+    return data
+
+
+def invalidate(agency_id, project_ids):
+    """Projelerin istatistik önbelleğini siler"""
+    keys = [_cache_key(agency_id, pk) for pk in project_ids if pk]
+    if not keys:
+        return
+    try:
+        cache.delete_many(keys)
+    except Exception:
+        pass
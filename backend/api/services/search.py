@@ -0,0 +1,121 @@
+"""
+🔎 Search Service
+Global arama (/search/) ve viewset'lerin ?search= parametresi
+
+- Eşleşme: search_vector @@ tsquery (Türkçe stemming, GIN index) VEYA başlıkta
+  trigram kelime benzerliği (`%>`, gin_trgm_ops index): yazım hatası ve kelime ortası
+- Sorgu kelimeleri prefix olarak aranır ('kli' -> 'klip'): her tuş vuruşunda sonuç
+- Global arama tek SQL: proje, görev, müşteri, dosya ve ekipman ortak kolonlara
+  indirgenip UNION ALL ile birleşir, skor (ts_rank + benzerlik) sırasıyla DB'de
+  sıralanıp limitlenir
+- Postgres dışında (dev/test sqlite) ILIKE'a döner, skor 0
+
+search_vector kolonları trigger ile dolar, bkz. apps/core/search.py
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import CharField, F, FloatField, Q, Value
+from django.db.models.functions import Cast
+
+from apps.core.search import SEARCH_COLUMNS, SEARCH_CONFIG, SEARCH_VECTOR_FIELD
+from apps.core.search import is_supported as _is_supported
+from api.models import Client, Equipment, File, Project, Task
+
+MIN_QUERY_LENGTH = 2
+MAX_TERMS = 8
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+# tip -> (model, başlık alanı (trigram), alt başlık)
+SOURCES = {
+    'project': (Project, 'title', 'client_name'),
+    'task': (Task, 'title', 'project__title'),
+    'client': (Client, 'name', 'contact_person'),
+    'file': (File, 'original_name', 'project__title'),
+    'equipment': (Equipment, 'name', 'serial_number'),
+}
+
+# UNION ALL kolonları -> cevap anahtarları
+COLUMNS = {
+    's_type': 'type',
+    's_id': 'id',
+    's_title': 'title',
+    's_subtitle': 'subtitle',
+    's_rank': 'rank',
+}
+
+
+def is_supported():
+    return _is_supported(connection)
+
+
+def terms(text):
+    """Sorgudaki kelimeler (tsquery operatörleri ayıklanır)"""
+    return re.findall(r'\w+', text or '')[:MAX_TERMS]
+
+
+def search_query(text):
+    """'kırmızı kli' -> kırmızı:* & kli:* (yazılmakta olan kelime de eşleşir). Kelime yoksa None."""
+    words = terms(text)
+    if not words:
+        return None
+    return SearchQuery(' & '.join(f'{word}:*' for word in words), search_type='raw', config=SEARCH_CONFIG)
+
+
+def filter_queryset(queryset, text, title_field):
+    """
+    Tek modelde arama; skoru `search_rank` olarak annotate eder.
+    Postgres dışında modelin aranan kolonlarında ILIKE.
+    """
+    text = (text or '').strip()
+    if not is_supported():
+        condition = Q()
+        for column, _ in SEARCH_COLUMNS[queryset.model._meta.db_table]:
+            condition |= Q(**{f'{column}__icontains': text})
+        return queryset.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    condition = Q(**{f'{title_field}__trigram_word_similar': text})
+    rank = TrigramWordSimilarity(text, title_field)
+    query = search_query(text)
+    if query is not None:
+        condition |= Q(**{SEARCH_VECTOR_FIELD: query})
+        rank = rank + SearchRank(F(SEARCH_VECTOR_FIELD), query)
+    return queryset.filter(condition).annotate(search_rank=rank)
+
+
+def _rows(agency_id, kind, text):
+    model, title_field, subtitle = SOURCES[kind]
+    queryset = filter_queryset(model.objects.filter(agency_id=agency_id), text, title_field)
+    return queryset.order_by().annotate(
+        s_type=Value(kind, output_field=CharField()),
+        s_id=F('id'),
+        s_title=Cast(title_field, output_field=CharField()),
+        s_subtitle=Cast(subtitle, output_field=CharField()),
+        s_rank=Cast('search_rank', output_field=FloatField()),
+    ).values(*COLUMNS)
+
+
+def build_queryset(agency_id, text, types=None, limit=DEFAULT_LIMIT):
+    """
+    Global arama sorgusu (tek UNION ALL).
+
+    Args:
+        types: Aranacak tipler (SOURCES anahtarları), None ise hepsi
+        limit: Döndürülecek en fazla sonuç
+    """
+    kinds = [kind for kind in SOURCES if not types or kind in types]
+    first, *rest = [_rows(agency_id, kind, text) for kind in kinds]
+    return first.union(*rest, all=True).order_by('-s_rank', 's_type', 's_id')[:limit]
+
+
+def search(agency_id, text, types=None, limit=DEFAULT_LIMIT):
+    """[{type, id, title, subtitle, rank}] en alakalı önce; kısa sorguda boş liste"""
+    text = (text or '').strip()
+    if len(text) < MIN_QUERY_LENGTH:
+        return []
+    return [
+        {key: row[column] for column, key in COLUMNS.items()}
+        for row in build_queryset(agency_id, text, types, limit)
+    ]
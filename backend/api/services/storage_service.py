@@ -1,10 +1,312 @@
-"
-    s3_client = get_s3_client()
+"""
+☁️ Storage Service
+Dosyaların yazıldığı depolama katmanı (S3 multipart upload / yerel disk)
+
+- AWS_STORAGE_BUCKET_NAME tanımlıysa S3 (veya S3 uyumlu MinIO, R2...) kullanılır,
+  değilse aynı arayüzle MEDIA_ROOT altına yazılır (dev/test)
+- Parçalar kaynaktan (request gövdesi) bloklar halinde okunup doğrudan depolamaya
+  akıtılır; parçanın tamamı uygulama belleğinde tutulmaz
+- Parçalar istemciden doğrudan depolamaya da yüklenebilir (presign_part): büyük
+  dosyalar app worker'larından (Daphne) hiç geçmez. Yerel diskte presigned URL,
+  imzalı token'lı /api/storage/parts/<token>/ endpoint'idir (S3 yerine, dev/test)
+- Object key'leri default storage ile aynıdır: File.file.name olarak kaydedilir,
+  File.file.url çalışır
+"""
+import hashlib
+import mimetypes
+import os
+import shutil
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
+
+CHUNK_SIZE = 1024 * 1024  # Akıtma blok boyutu (1 MB)
+PART_TOKEN_SALT = 'storage.part'
+
+
+class StorageError(Exception):
+    """Depolama işlemi yapılamadı (eksik / bozuk parça, object yok vb.)"""
+
+
+class IncompleteStreamError(StorageError):
+    """Kaynak, beklenen byte sayısından önce bitti (bağlantı koptu / eksik gövde)"""
+
+
+class LimitedReader:
+    """
+    Kaynaktan en fazla `size` byte okur, okunan byte sayısını tutar.
+    Parça beklenenden kısa gelirse IncompleteStreamError.
+    """
+
+    def __init__(self, stream, size):
+        self.stream = stream
+        self.remaining = size
+        self.read_bytes = 0
+
+    def read(self, amount=-1):
+        if self.remaining <= 0:
+            return b''
+        if amount is None or amount < 0 or amount > self.remaining:
+            amount = self.remaining
+        data = self.stream.read(amount)
+        if not data:
+            raise IncompleteStreamError(f'Parça eksik geldi ({self.read_bytes} byte okundu, {self.remaining} byte eksik)')
+        self.remaining -= len(data)
+        self.read_bytes += len(data)
+        return data
+
+
+class LocalBackend:
+    """
+    Yerel disk (MEDIA_ROOT). S3 multipart akışının aynısı:
+    parçalar .multipart/<upload_id>/ altında tutulur, complete'te sırayla birleştirilir.
+    ETag = parçanın MD5'i (S3 ile aynı)
+    """
+
+    def __init__(self, root=None):
+        self.root = str(root or settings.MEDIA_ROOT)
+
+    def _path(self, key):
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise StorageError('Geçersiz key')
+        return path
+
+    def _parts_dir(self, upload_id):
+        return self._path(os.path.join('.multipart', upload_id))
+
+    def _part_path(self, upload_id, part_number):
+        return os.path.join(self._parts_dir(upload_id), f'{part_number:05d}')
+
+    def create_multipart(self, key, content_type=''):
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._parts_dir(upload_id), exist_ok=True)
+        return upload_id
+
+    def upload_part(self, key, upload_id, part_number, stream, size):
+        """Parçayı yazar (aynı numara tekrar gelirse üzerine yazar), ETag döner"""
+        if not os.path.isdir(self._parts_dir(upload_id)):
+            raise StorageError('Yükleme bulunamadı')
+        reader = LimitedReader(stream, size)
+        md5 = hashlib.md5()
+        path = self._part_path(upload_id, part_number)
+        with open(path + '.tmp', 'wb') as out:
+            for block in iter(lambda: reader.read(CHUNK_SIZE), b''):
+                md5.update(block)
+                out.write(block)
+        os.replace(path + '.tmp', path)
+        etag = f'"{md5.hexdigest()}"'
+        with open(path + '.etag', 'w') as out:
+            out.write(etag)
+        return etag
+
+    def copy_part(self, key, upload_id, part_number, source_key, start, size):
+        """Başka bir object'in [start, start + size) aralığını parça olarak yazar, ETag döner"""
+        try:
+            source = open(self._path(source_key), 'rb')
+        except FileNotFoundError as e:
+            raise StorageError('Kaynak object bulunamadı') from e
+        with source:
+            source.seek(start)
+            return self.upload_part(key, upload_id, part_number, source, size)
+
+    def presign_part(self, key, upload_id, part_number, size, expires):
+        """
+        Parçanın doğrudan yüklenebileceği imzalı URL (göreli, bkz. StoragePartView).
+        Süresi token okunurken UPLOAD_PART_URL_EXPIRY ile kontrol edilir.
+        """
+        token = signing.dumps(
+            {'k': key, 'u': upload_id, 'n': part_number, 's': size},
+            salt=PART_TOKEN_SALT, compress=True
+        )
+        return reverse('storage-part', args=[token])
+
+    def list_parts(self, key, upload_id):
+        """{part_number: {'etag', 'size'}} - depolamada gerçekten bulunan parçalar"""
+        directory = self._parts_dir(upload_id)
+        if not os.path.isdir(directory):
+            raise StorageError('Yükleme bulunamadı')
+        parts = {}
+        for name in os.listdir(directory):
+            if not name.isdigit():
+                continue
+            path = os.path.join(directory, name)
+            with open(path + '.etag') as etag:
+                parts[int(name)] = {'etag': etag.read(), 'size': os.path.getsize(path)}
+        return parts
+
+    def complete_multipart(self, key, upload_id, parts):
+        """
+        parts: [(part_number, etag)] sıralı. Parçaları birleştirip object'i oluşturur.
+        Hash'lenmez: S3'teki gibi object tamamlandıktan sonra hash_file task'ında okunur
+        """
+        stored = self.list_parts(key, upload_id)
+        for part_number, etag in parts:
+            if stored.get(part_number, {}).get('etag') != etag:
+                raise StorageError(f'Parça {part_number} depolamadakiyle uyuşmuyor')
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'wb') as out:
+            for part_number, _ in parts:
+                with open(self._part_path(upload_id, part_number), 'rb') as part:
+                    shutil.copyfileobj(part, out, CHUNK_SIZE)
+        os.replace(path + '.tmp', path)
+        shutil.rmtree(self._parts_dir(upload_id), ignore_errors=True)
+
+    def abort_multipart(self, key, upload_id):
+        shutil.rmtree(self._parts_dir(upload_id), ignore_errors=True)
+
+    def head(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            raise StorageError('Object bulunamadı')
+        return {
+            'size': os.path.getsize(path),
+            'content_type': mimetypes.guess_type(key)[0] or '',
+        }
+
+    def open(self, key):
+        return open(self._path(key), 'rb')
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class S3Backend:
+    """S3 multipart upload (boto3)"""
+
+    def __init__(self, bucket=None):
+        self.bucket = bucket or settings.AWS_STORAGE_BUCKET_NAME
+        self.client = get_s3_client()
+
+    def _call(self, method, **params):
+        from botocore.exceptions import ClientError
+        try:
+            return getattr(self.client, method)(Bucket=self.bucket, **params)
+        except ClientError as e:
+            raise StorageError(str(e)) from e
+
+    def create_multipart(self, key, content_type=''):
+        params = {'Key': key}
+        if content_type:
+            params['ContentType'] = content_type
+        return self._call('create_multipart_upload', **params)['UploadId']
+
+    def upload_part(self, key, upload_id, part_number, stream, size):
+        # Gövde LimitedReader üzerinden akar; boto3 ContentLength ile okur, tamponlamaz
+        response = self._call(
+            'upload_part', Key=key, UploadId=upload_id, PartNumber=part_number,
+            Body=LimitedReader(stream, size), ContentLength=size
+        )
+        return response['ETag']
+
+    def copy_part(self, key, upload_id, part_number, source_key, start, size):
+        # UploadPartCopy: byte'lar S3 içinde kopyalanır, app'ten geçmez
+        response = self._call(
+            'upload_part_copy', Key=key, UploadId=upload_id, PartNumber=part_number,
+            CopySource={'Bucket': self.bucket, 'Key': source_key},
+            CopySourceRange=f'bytes={start}-{start + size - 1}'
+        )
+        return response['CopyPartResult']['ETag']
+
+    def presign_part(self, key, upload_id, part_number, size, expires):
+        # Boyut imzaya girmez; onayda depolamadaki boyut kontrol edilir (list_parts)
+        return self.client.generate_presigned_url(
+            'upload_part',
+            Params={'Bucket': self.bucket, 'Key': key, 'UploadId': upload_id, 'PartNumber': part_number},
+            ExpiresIn=expires
+        )
+
+    def list_parts(self, key, upload_id):
+        parts = {}
+        params = {'Key': key, 'UploadId': upload_id}
+        while True:
+            response = self._call('list_parts', **params)
+            for part in response.get('Parts', []):
+                parts[part['PartNumber']] = {'etag': part['ETag'], 'size': part['Size']}
+            if not response.get('IsTruncated'):
+                return parts
+            params['PartNumberMarker'] = response['NextPartNumberMarker']
+
+    def complete_multipart(self, key, upload_id, parts):
+        # S3 object'in SHA-256'sını vermez (multipart checksum'ı parça checksum'larının checksum'ıdır)
+        self._call(
+            'complete_multipart_upload', Key=key, UploadId=upload_id,
+            MultipartUpload={'Parts': [{'PartNumber': n, 'ETag': etag} for n, etag in parts]}
+        )
+
+    def abort_multipart(self, key, upload_id):
+        self._call('abort_multipart_upload', Key=key, UploadId=upload_id)
+
+    def head(self, key):
+        response = self._call('head_object', Key=key)
+        return {'size': response['ContentLength'], 'content_type': response.get('ContentType', '')}
+
+    def open(self, key):
+        return self._call('get_object', Key=key)['Body']
+
+    def delete(self, key):
+        self._call('delete_object', Key=key)
+
+
+def get_s3_client():
+    import boto3
+    from botocore.config import Config
+    return boto3.client(
+        's3',
+        endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+        region_name=settings.AWS_S3_REGION_NAME,
+        # Parça gövdesi akış (seek edilemez): imza / checksum için önceden okunamaz.
+        # UNSIGNED-PAYLOAD ile gönderilir (bütünlük: HTTPS + Content-Length).
+        # Checksum sadece zorunlu işlemlerde: S3 uyumlu servisler (MinIO, R2) de bunu bekler.
+        config=Config(
+            signature_version='s3v4',  # Presigned URL'ler SigV4 (yeni bölgeler / MinIO)
+            s3={'payload_signing_enabled': False},
+            request_checksum_calculation='when_required',
+            response_checksum_validation='when_required'
+        )
+    )
+
+
+def _create_backend():
+    if settings.AWS_STORAGE_BUCKET_NAME:
+        return S3Backend()
+    return LocalBackend()
+
+
+# Process başına tek backend (boto3 client'ı her istekte yeniden kurulmasın)
+backend = SimpleLazyObject(_create_backend)
+
+
+def read_part_token(token):
+    """
+    Yerel presigned parça URL'inin token'ı -> (key, upload_id, part_number, size).
+    Geçersiz / süresi dolmuşsa StorageError.
+    """
     try:
-        response = s3_client.generate_presigned_url('get_object',
-                                                    Params={'Bucket': settings.AWS_STORAGE_BUCKET_NAME,
-                                                            'Key': object_name},
-                                                    ExpiresIn=expiration)
-        return response
-    except ClientError as e:
+        data = signing.loads(token, salt=PART_TOKEN_SALT, max_age=settings.UPLOAD_PART_URL_EXPIRY)
+    except (signing.BadSignature, KeyError, TypeError) as e:
+        raise StorageError('Geçersiz veya süresi dolmuş link') from e
+    return data['k'], data['u'], data['n'], data['s']
+
+
+def create_presigned_url(object_name, expiration=3600):
+    """Object için süreli indirme linki (S3). Yerel diskte MEDIA_URL linki."""
+    if not settings.AWS_STORAGE_BUCKET_NAME:
+        return settings.MEDIA_URL + object_name
+    from botocore.exceptions import ClientError
+    try:
+        return get_s3_client().generate_presigned_url(
+            'get_object',
+            Params={'Bucket': settings.AWS_STORAGE_BUCKET_NAME, 'Key': object_name},
+            ExpiresIn=expiration
+        )
+    except ClientError:
         return None
@@ -0,0 +1,217 @@
+"""
+💾 Storage Usage Service
+Ajans depolama sayaçları ve kota
+
+- StorageUsage (ajans + dosya tipi) satırları File oluşturulunca / silinince aynı
+  transaction'da F() ile güncellenir (api/signals_cache.py): storage_stats ve kota
+  kontrolü dosya sayısından bağımsız, birkaç satır okur
+- total_bytes: dosya boyutları toplamı (kullanıcının gördüğü, kota buna göre)
+  physical_bytes: depolamada gerçekten tutulan (blob'a bağlanınca tekrar eden içerik düşülür)
+- Kota: kullanılan + devam eden parçalı yüklemelerin ve tek istekli yüklemelerin
+  (StorageReservation) rezerve ettiği byte'lar. Yükleme başlarken (parçalar gelmeden)
+  ajans satırı kilitlenerek kontrol edilir: paralel başlatılan yüklemeler kotayı birlikte
+  aşamaz. Tek istekli yüklemede kilit sadece kontrol + rezervasyon sürer (reservation())
+- Sinyalsiz toplu update() / delete() sapma bırakabilir: reconcile() gece yeniden hesaplar
+"""
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.template.defaultfilters import filesizeformat
+from django.utils import timezone
+
+from api.models import Agency, Blob, File, FileUpload, StorageReservation, StorageUsage
+
+GB = 1024 ** 3
+MB = 1024 ** 2
+
+# Tek istekli yükleme rezervasyonunun ömrü (process ölürse bu süreden sonra sayılmaz)
+RESERVATION_TTL = timedelta(minutes=30)
+
+# storage_stats'ta her zaman gösterilen tipler
+DEFAULT_TYPES = ('image', 'video', 'application', 'audio')
+
+
+class QuotaExceededError(Exception):
+    """Yükleme ajansın depolama kotasını aşıyor"""
+
+
+def apply(agency_id, file_type, size=0, files=0, physical=0):
+    """Sayaç farkını uygular (satır yoksa oluşturulur)"""
+    if not (size or files or physical):
+        return
+    changes = {
+        'total_bytes': F('total_bytes') + size,
+        'file_count': F('file_count') + files,
+        'physical_bytes': F('physical_bytes') + physical,
+    }
+    rows = StorageUsage.objects.filter(agency_id=agency_id, file_type=file_type)
+    if not rows.update(**changes):
+        StorageUsage.objects.bulk_create(
+            [StorageUsage(agency_id=agency_id, file_type=file_type)], ignore_conflicts=True
+        )
+        rows.update(**changes)
+
+
+def file_added(file):
+    # Blob'a bağlı oluşturulan dosya depolamada yeni byte kaplamaz
+    apply(file.agency_id, file.file_type, file.file_size, 1, 0 if file.blob_id else file.file_size)
+
+
+def file_removed(file):
+    # Blob'lu dosyanın fiziksel byte'ı blob silinince düşer (blob_released)
+    apply(file.agency_id, file.file_type, -file.file_size, -1, 0 if file.blob_id else -file.file_size)
+
+
+def blob_released(file, size):
+    """Son referans silindi, blob depolamadan kalktı"""
+    apply(file.agency_id, file.file_type, physical=-size)
+
+
+def duplicate_removed(file, size):
+    """Hash'lenen dosya mevcut blob'a bağlandı, kendi kopyası silindi"""
+    apply(file.agency_id, file.file_type, physical=-size)
+
+
+def reserved_bytes(agency_id):
+    """Devam eden parçalı yüklemelerin ve tek istekli yükleme rezervasyonlarının toplam boyutu"""
+    uploading = FileUpload.objects.filter(agency_id=agency_id, status__in=('uploading', 'completing')).aggregate(
+        total=Sum('total_size')
+    )['total'] or 0
+    reserved = StorageReservation.objects.filter(agency_id=agency_id, expires_at__gt=timezone.now()).aggregate(
+        total=Sum('size')
+    )['total'] or 0
+    return uploading + reserved
+
+
+def used_bytes(agency_id):
+    return StorageUsage.objects.filter(agency_id=agency_id).aggregate(total=Sum('total_bytes'))['total'] or 0
+
+
+def check_quota(agency, size):
+    """
+    size byte eklenebilir mi? Aşıyorsa QuotaExceededError.
+    Transaction içinde çağrılmalı: ajans satırı commit'e kadar kilitli kalır
+    (yeni yükleme / dosya aynı transaction'da kaydedilir).
+    """
+    limit = agency.storage_limit_bytes
+    if limit is None:
+        return
+    list(Agency.objects.select_for_update().filter(pk=agency.pk).values_list('id', flat=True))
+    used = used_bytes(agency.pk) + reserved_bytes(agency.pk)
+    if used + size > limit:
+        free = max(limit - used, 0)
+        raise QuotaExceededError(
+            f'Depolama kotası yetersiz: {agency.storage_limit_gb} GB kotanın '
+            f'{filesizeformat(free)} kadarı boş, dosya {filesizeformat(size)}'
+        )
+
+
+@contextmanager
+def reservation(agency, size):
+    """
+    size byte'ı kotadan ayırır (aşıyorsa QuotaExceededError). Ajans satırı sadece kontrol
+    ve rezervasyon için kilitlenir; blok içindeki hash'leme / depolamaya yazma kilitsiz
+    yapılır, paralel yüklemeler yine de kotayı birlikte aşamaz. Çıkışta rezervasyon silinir
+    (dosya o ana kadar kaydedildiyse sayaçlarda görünür).
+    Transaction dışında çağrılmalı: aksi halde kilit dış transaction sonuna kadar sürer.
+    """
+    held = None
+    with transaction.atomic():
+        check_quota(agency, size)
+        if agency.storage_limit_bytes is not None:
+            held = StorageReservation.objects.create(
+                agency=agency, size=size, expires_at=timezone.now() + RESERVATION_TTL
+            )
+    try:
+        yield held
+    finally:
+        if held is not None:
+            StorageReservation.objects.filter(pk=held.pk).delete()
+
+
+def summary(agency):
+    """storage_stats cevabı (sayaç satırları + rezerve byte'lar, dosya sayısından bağımsız)"""
+    rows = {row.file_type: row for row in StorageUsage.objects.filter(agency_id=agency.pk)}
+    total = sum(row.total_bytes for row in rows.values())
+    physical = sum(row.physical_bytes for row in rows.values())
+    reserved = reserved_bytes(agency.pk)
+    limit = agency.storage_limit_bytes
+
+    by_type = {}
+    for file_type in dict.fromkeys([*DEFAULT_TYPES, *sorted(rows)]):
+        row = rows.get(file_type)
+        size = row.total_bytes if row else 0
+        by_type[file_type] = {
+            'size_bytes': size,
+            'size_mb': round(size / MB, 2),
+            'count': row.file_count if row else 0,
+        }
+
+    return {
+        'total_size_bytes': total,
+        'total_size_gb': round(total / GB, 2),
+        'physical_size_bytes': physical,
+        'dedup_saved_bytes': total - physical,
+        'reserved_bytes': reserved,
+        'max_storage_gb': agency.storage_limit_gb,
+        'usage_percentage': round((total + reserved) / limit * 100, 1) if limit else 0,
+        'by_type': by_type,
+        'total_files': sum(row.file_count for row in rows.values()),
+    }
+
+
+def _computed(agency_id):
+    """{file_type: (total_bytes, file_count, physical_bytes)} dosyalardan yeniden hesaplanmış"""
+    files = File.objects.filter(agency_id=agency_id)
+    counters = {
+        row['file_type']: [row['total'] or 0, row['count'], row['unhashed'] or 0]
+        for row in files.order_by().values('file_type').annotate(
+            total=Sum('file_size'),
+            count=Count('id'),
+            unhashed=Sum('file_size', filter=Q(blob__isnull=True))
+        )
+    }
+    # Blob'un byte'ı onu gösteren (herhangi bir) dosyanın tipine yazılır
+    owner_type = File.objects.filter(blob=OuterRef('pk')).order_by('created_at').values('file_type')[:1]
+    blobs = Blob.objects.filter(agency_id=agency_id).annotate(file_type=Subquery(owner_type))
+    for row in blobs.order_by().values('file_type').annotate(total=Sum('size')):
+        counters.setdefault(row['file_type'] or 'unknown', [0, 0, 0])[2] += row['total'] or 0
+    return counters
+
+
+def reconcile_agency(agency_id):
+    """Ajansın sayaçlarını dosyalardan yeniden hesaplar; düzeltilen tip sayısını döner"""
+    with transaction.atomic():
+        # Bu sırada gelen artırmalar kilidi bekler, hesaplanan değerin üzerine yazılmaz
+        current = {
+            row.file_type: row
+            for row in StorageUsage.objects.select_for_update().filter(agency_id=agency_id)
+        }
+        fixed = 0
+        for file_type, (total, count, physical) in _computed(agency_id).items():
+            row = current.pop(file_type, None)
+            if row is None:
+                StorageUsage.objects.create(
+                    agency_id=agency_id, file_type=file_type,
+                    total_bytes=total, file_count=count, physical_bytes=physical
+                )
+                fixed += 1
+            elif (row.total_bytes, row.file_count, row.physical_bytes) != (total, count, physical):
+                row.total_bytes, row.file_count, row.physical_bytes = total, count, physical
+                row.save(update_fields=['total_bytes', 'file_count', 'physical_bytes', 'updated_at'])
+                fixed += 1
+        # Artık dosyası olmayan tipler
+        stale = [row.pk for row in current.values() if row.total_bytes or row.file_count or row.physical_bytes]
+        StorageUsage.objects.filter(pk__in=stale).update(total_bytes=0, file_count=0, physical_bytes=0)
+    return fixed + len(stale)
+
+
+def reconcile():
+    """Tüm ajansların sayaçlarını düzeltir (Celery Beat)"""
+    # Process ölünce kalan rezervasyonlar (zaten sayılmıyor)
+    StorageReservation.objects.filter(expires_at__lte=timezone.now()).delete()
+    agency_ids = set(File.objects.order_by().values_list('agency_id', flat=True).distinct())
+    agency_ids |= set(StorageUsage.objects.values_list('agency_id', flat=True))
+    return sum(reconcile_agency(agency_id) for agency_id in agency_ids)
@@ -0,0 +1,113 @@
+"""
+🏷️ Tag Service
+Client / Project / File `tags` (JSON dizisi) alanları ve ajansın tag sözlüğü (Tag)
+
+- Filtreler `tags @> '["VIP"]'` olarak derlenir: GIN (jsonb_path_ops) index'i kullanılır,
+  ajans büyüdükçe tarama yapılmaz
+- Kaydederken tag'ler temizlenir (boşluk, tekrar) ve sözlükteki yazıma çevrilir:
+  'vip' ile 'VIP' aynı tag, index'te tek değer
+- Tag sözlüğündeki kullanım sayıları kayıt eklenip/silindikçe artırılıp azaltılır
+  (api/signals_cache.py); autocomplete en çok kullanılanları döner
+"""
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from api.models import Tag
+
+TAG_FIELD = 'tags'
+
+MAX_LENGTH = Tag._meta.get_field('name').max_length
+AUTOCOMPLETE_LIMIT = 20
+
+
+def normalize(name):
+    """Boşlukları sadeleştir. Boş / metin olmayan değer için None."""
+    if not isinstance(name, str):
+        return None
+    name = ' '.join(name.split())[:MAX_LENGTH]
+    return name or None
+
+
+def key(name):
+    return name.casefold()
+
+
+def clean(tags):
+    """Temiz, tekrarsız tag listesi (ilk yazım ve sıra korunur)"""
+    if not isinstance(tags, (list, tuple)):
+        return []
+    result = {}
+    for tag in tags:
+        name = normalize(tag)
+        if name and key(name) not in result:
+            result[key(name)] = name
+    return list(result.values())
+
+
+def canonicalize(agency_id, tags):
+    """Tag'leri sözlükteki yazımlarına çevirir (tek sorgu). Sözlükte olmayanlar aynen kalır."""
+    tags = clean(tags)
+    if not tags:
+        return []
+    known = dict(
+        Tag.objects.filter(agency_id=agency_id, normalized__in=[key(t) for t in tags]).values_list('normalized', 'name')
+    )
+    return [known.get(key(tag), tag) for tag in tags]
+
+
+def apply_usage(agency_id, added=(), removed=()):
+    """
+    Sözlük sayaçlarını günceller.
+    added: bu kayıtla kullanılmaya başlanan tag'ler (sözlükte yoksa oluşturulur)
+    removed: artık kullanılmayan tag'ler
+    """
+    added = clean(added)
+    removed = clean(removed)
+    if added:
+        Tag.objects.bulk_create(
+            [Tag(agency_id=agency_id, name=tag, normalized=key(tag)) for tag in added],
+            ignore_conflicts=True
+        )
+        Tag.objects.filter(
+            agency_id=agency_id, normalized__in=[key(t) for t in added]
+        ).update(usage_count=F('usage_count') + 1)
+    if removed:
+        Tag.objects.filter(
+            agency_id=agency_id, normalized__in=[key(t) for t in removed]
+        ).update(usage_count=Greatest(F('usage_count') - 1, 0))
+
+
+def diff(old, new):
+    """(eklenen, çıkarılan) - büyük/küçük harf farkı değişiklik sayılmaz"""
+    old = {key(t): t for t in clean(old)}
+    new = {key(t): t for t in clean(new)}
+    return (
+        [tag for k, tag in new.items() if k not in old],
+        [tag for k, tag in old.items() if k not in new],
+    )
+
+
+def filter_queryset(queryset, agency_id, tags, match_all=True, field=TAG_FIELD):
+    """
+    Çoklu tag filtresi.
+    match_all=True  -> hepsi (AND): tags @> '["a", "b"]'
+    match_all=False -> herhangi biri (OR): tags @> '["a"]' OR tags @> '["b"]'
+    """
+    tags = canonicalize(agency_id, tags)
+    if not tags:
+        return queryset
+    if match_all:
+        return queryset.filter(**{f'{field}__contains': tags})
+    condition = Q()
+    for tag in tags:
+        condition |= Q(**{f'{field}__contains': [tag]})
+    return queryset.filter(condition)
+
+
+def autocomplete(agency_id, prefix='', limit=AUTOCOMPLETE_LIMIT):
+    """Kullanımda olan tag'ler, en çok kullanılan önce"""
+    queryset = Tag.objects.filter(agency_id=agency_id, usage_count__gt=0)
+    prefix = normalize(prefix)
+    if prefix:
+        queryset = queryset.filter(normalized__startswith=key(prefix))
+    return queryset.order_by('-usage_count', 'name')[:limit]
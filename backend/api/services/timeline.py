@@ -0,0 +1,144 @@
+"""
+📅 Project Timeline Service
+Görev, rezervasyon, çekim günü ve giderleri tek zaman çizelgesinde birleştirir
+
+- Tek SQL: dört tablo aynı kolonlara indirgenip UNION ALL ile birleşir,
+  (tarih, id) sırasıyla DB'de sıralanır; Python'da liste birleştirme/sıralama yok
+- Tarih penceresi (from/to) ve cursor filtreleri UNION'dan önce her alt sorguya
+  uygulanır: sıralama/limit sadece pencere içindeki satırlar üzerinde çalışır
+- Satırlar iterator ile okunup JSON parça parça yazılır (StreamingHttpResponse);
+  binlerce kalemlik prodüksiyonlarda tüm cevap bellekte tutulmaz
+"""
+import json
+import uuid
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import CharField, DateTimeField, F, Q, Value
+from django.db.models.functions import Cast, Coalesce
+from django.utils.dateparse import parse_datetime
+
+from api.models import EquipmentReservation, Expense, ShootingDay, Task
+from api.pagination import decode_cursor, encode_cursor
+
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+ITERATOR_CHUNK_SIZE = 500
+
+# UNION ALL kolonları (model alanlarıyla çakışmasın diye önekli) -> cevap anahtarları
+COLUMNS = {
+    't_date': 'date',
+    't_id': 'id',
+    't_type': 'type',
+    't_end': 'end_date',
+    't_title': 'title',
+    't_status': 'status',
+}
+
+
+def _as_datetime(expression):
+    return Cast(expression, output_field=DateTimeField())
+
+
+def _rows(queryset, kind, date, title, end=None, status=F('status')):
+    return queryset.order_by().annotate(
+        t_date=date,
+        t_id=F('id'),
+        t_type=Value(kind, output_field=CharField()),
+        t_end=end if end is not None else Value(None, output_field=DateTimeField()),
+        t_title=Cast(title, output_field=CharField()),
+        t_status=Cast(status, output_field=CharField()),
+    ).values(*COLUMNS)
+
+
+def _sources(project):
+    """Her kaynak için ortak kolonlara indirgenmiş queryset"""
+    return [
+        _rows(
+            Task.objects.filter(project=project), 'task',
+            date=Coalesce('due_date', 'created_at'),
+            title=F('title')
+        ),
+        _rows(
+            EquipmentReservation.objects.filter(project=project), 'equipment_reservation',
+            date=F('start_date'),
+            end=F('end_date'),
+            title=F('equipment__name')
+        ),
+        _rows(
+            ShootingDay.objects.filter(project=project), 'shooting_day',
+            date=_as_datetime('date'),
+            title=Coalesce('main_location__name', Value('Çekim Günü')),
+            status=Value('')
+        ),
+        _rows(
+            Expense.objects.filter(project=project), 'expense',
+            date=Coalesce(_as_datetime('invoice_date'), 'created_at'),
+            title=F('description')
+        ),
+    ]
+
+
+def parse_cursor(cursor):
+    """Opak cursor -> (tarih, id). Bozuksa ValueError."""
+    date, item_id = decode_cursor(cursor, 2)
+    parsed = parse_datetime(date) if isinstance(date, str) else None
+    if parsed is None:
+        raise ValueError('invalid cursor')
+    return parsed, uuid.UUID(str(item_id))
+
+
+def build_queryset(project, start=None, end=None, after=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Birleşik timeline sorgusu (tek UNION ALL).
+
+    Args:
+        start / end: Tarih penceresi [start, end)
+        after: (tarih, id) - önceki sayfanın son kalemi
+        limit: Döndürülecek en fazla satır
+    """
+    window = Q()
+    if start:
+        window &= Q(t_date__gte=start)
+    if end:
+        window &= Q(t_date__lt=end)
+    if after:
+        date, item_id = after
+        window &= Q(t_date__gt=date) | Q(t_date=date, t_id__gt=item_id)
+
+    first, *rest = [source.filter(window) for source in _sources(project)]
+    return first.union(*rest, all=True).order_by('t_date', 't_id')[:limit]
+
+
+def _item(row):
+    return {key: row[column] for column, key in COLUMNS.items()}
+
+
+def stream(project, start=None, end=None, after=None, page_size=DEFAULT_PAGE_SIZE, link=None):
+    """
+    JSON cevabını parça parça üretir (KeysetPagination cevabıyla aynı anahtarlar):
+    {"project": {...}, "items": [...], "next": "<url>" | null, "cursor": "<cursor>" | null}
+
+    page_size + 1 satır okunur; fazladan satır varsa son kalemin cursor'ı döner.
+    link: cursor -> sonraki sayfa URL'i
+    """
+    encoder = DjangoJSONEncoder()
+    head = {
+        'id': project.id,
+        'title': project.title,
+        'start_date': project.start_date,
+        'end_date': project.end_date,
+    }
+    yield '{"project": ' + encoder.encode(head) + ', "items": ['
+
+    rows = build_queryset(project, start, end, after, page_size + 1).iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    last = None
+    next_cursor = None
+    for index, row in enumerate(rows):
+        if index == page_size:
+            next_cursor = encode_cursor([last['t_date'].isoformat(), str(last['t_id'])])
+            break
+        yield (',' if index else '') + encoder.encode(_item(row))
+        last = row
+
+    next_link = link(next_cursor) if link and next_cursor else None
+    yield '], "next": ' + json.dumps(next_link) + ', "cursor": ' + json.dumps(next_cursor) + '}'
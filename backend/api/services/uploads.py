@@ -0,0 +1,392 @@
+"""
+⬆️ Upload Service
+Büyük dosyaların (rush / ham görüntü, 5–200 GB) parça parça, kaldığı yerden
+devam edebilen yüklemesi
+
+Akış:
+1. start(): FileUpload satırı + depolamada multipart upload açılır, parça boyutu belirlenir
+2. receive_part(): PUT gövdesi doğrudan depolamaya akar (storage_service), parça
+   satır kilitlenerek onaylanır; aynı parça tekrar gönderilebilir, parçalar paralel gelebilir
+   Veya (önerilen) presign_parts(): istemci parçaları presigned URL'lerle doğrudan
+   depolamaya yükler, app worker'ları byte taşımaz; confirm_parts() ile bildirilen
+   ETag'ler depolamadaki parçalarla (ETag + boyut) doğrulanıp onaylanır
+3. complete(): tüm parçalar onaylıysa yükleme 'completing' olur, depolamada transaction
+   dışında birleştirilir, ardından kısa bir transaction'da File kaydı oluşur; boyut / tip
+   tamamlanan object'in metadata'sından alınır. İçerik Celery task'ında (hash_file)
+   okunup hash'lenir ve blob'a bağlanır (api/services/blobs.py)
+
+Yeni versiyon yüklemesinde (version_of) istemci parçaların MD5'lerini reuse_parts() ile
+bildirir: önceki versiyonun aynı parçaları depolamada sunucu tarafında kopyalanır
+(S3 UploadPartCopy), sadece değişen parçalar yüklenir.
+
+Depolama kotası start()'ta, tek byte gelmeden kontrol edilir: devam eden (ve tamamlanan)
+yüklemeler total_size kadar yer rezerve eder (api/services/storage_usage.py).
+
+İstemci start()'ta SHA-256 bildirirse ve ajansta aynı içerik varsa yükleme hiç byte
+taşımadan tamamlanır (File mevcut blob'u gösterir).
+
+Kesilen yüklemede istemci GET /uploads/{id}/ ile eksik parçaları görür ve onlardan devam eder.
+Süresi dolan yüklemeler abort_stale() ile temizlenir (Celery Beat); tamamlanırken yarım
+kalanlar (process öldü) bitirilir ya da iptal edilir.
+"""
+import math
+import posixpath
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from api.models import File, FileUpload
+from api.services import blobs, file_versions, storage_usage
+from api.services.storage_service import IncompleteStreamError, StorageError, backend
+
+MAX_PARTS = 10000  # S3 limiti
+MIN_PART_SIZE = 5 * 1024 * 1024  # S3: son parça hariç en az 5 MB
+MAX_LISTED_PARTS = 20  # Hata mesajında gösterilecek eksik parça sayısı
+MAX_PRESIGNED_PARTS = 100  # Tek istekte üretilecek en fazla presigned URL
+MAX_REUSED_PARTS = 100  # Tek istekte önceki versiyondan kopyalanacak en fazla parça
+
+
+class UploadError(Exception):
+    """İstemci kaynaklı yükleme hatası (yanlış parça, kapalı yükleme vb.)"""
+
+
+def file_type_for(content_type):
+    """'video/mp4' -> 'video' (File.file_type)"""
+    return (content_type or '').split('/')[0] or 'unknown'
+
+
+def plan_part_size(total_size):
+    """Ayarlı parça boyutu; parça sayısı S3 limitini aşacaksa büyütülür"""
+    part_size = max(settings.UPLOAD_PART_SIZE, MIN_PART_SIZE)
+    return max(part_size, math.ceil(total_size / MAX_PARTS))
+
+
+def part_count(upload):
+    return max(1, math.ceil(upload.total_size / upload.part_size))
+
+
+def expected_part_size(upload, part_number):
+    count = part_count(upload)
+    if not 1 <= part_number <= count:
+        raise UploadError(f'Parça numarası 1-{count} arasında olmalı')
+    if part_number < count:
+        return upload.part_size
+    return upload.total_size - upload.part_size * (count - 1)
+
+
+def missing_parts(upload):
+    if upload.status == 'completed':
+        return []  # İçerik depolamada zaten varsa (sha256) parça hiç yüklenmez
+    return [n for n in range(1, part_count(upload) + 1) if str(n) not in upload.parts]
+
+
+def storage_key(agency_id, upload_id, name):
+    try:
+        name = get_valid_filename(name)
+    except SuspiciousFileOperation:
+        name = 'file'
+    return posixpath.join('project_files', str(agency_id), upload_id.hex, name)
+
+
+def start(agency, user, project, original_name, total_size, content_type='',
+          description='', tags=None, version_of=None, sha256=''):
+    """
+    Yükleme oturumu açar.
+    sha256 bildirilmiş ve ajansta aynı boyutta blob'u varsa oturum doğrudan 'completed' döner.
+    Kota yetmiyorsa storage_usage.QuotaExceededError.
+    """
+    upload = FileUpload(
+        agency=agency,
+        project=project,
+        uploaded_by=user,
+        version_of=version_of,
+        original_name=original_name,
+        content_type=content_type,
+        description=description,
+        tags=tags or [],
+        sha256=sha256,
+        total_size=total_size,
+        part_size=plan_part_size(total_size),
+        expires_at=timezone.now() + timedelta(hours=settings.UPLOAD_EXPIRY_HOURS)
+    )
+    # Ajans satırı sadece kota kontrolü için kilitlenir; multipart depolamada kilitsiz açılır.
+    # Kaydedilen 'uploading' satırı yeri rezerve eder, geçici rezervasyon çıkışta silinir
+    with storage_usage.reservation(agency, total_size):
+        blob = blobs.find(agency.id, sha256)
+        if blob is not None and blob.size == total_size:
+            return _complete_from_blob(upload, blob)
+
+        upload.storage_key = storage_key(agency.id, upload.id, original_name)
+        upload.storage_upload_id = backend.create_multipart(upload.storage_key, content_type)
+        upload.save()
+    return upload
+
+
+def _complete_from_blob(upload, blob):
+    """İçerik zaten depolamada: multipart açılmaz, File mevcut blob'u gösterir"""
+    with transaction.atomic():
+        upload.storage_key = blob.storage_key
+        upload.received_bytes = upload.total_size
+        upload.status = 'completed'
+        upload.save()
+        upload.file = _create_file(upload, {'size': blob.size, 'content_type': blob.content_type}, blob=blob)
+        upload.save(update_fields=['file', 'updated_at'])
+    return upload
+
+
+def _check_open(upload):
+    if upload.status != 'uploading':
+        raise UploadError(f'Yükleme {upload.get_status_display().lower()} durumunda')
+    if upload.expires_at <= timezone.now():
+        raise UploadError('Yüklemenin süresi doldu')
+
+
+def receive_part(upload, part_number, stream, size):
+    """
+    Parçayı depolamaya akıtır ve onaylar.
+    size: gövdenin byte sayısı (Content-Length), parça boyutuyla aynı olmalı
+    """
+    _check_open(upload)
+    expected = expected_part_size(upload, part_number)
+    if size != expected:
+        raise UploadError(f'Parça {part_number} {expected} byte olmalı ({size} byte geldi)')
+
+    try:
+        etag = backend.upload_part(upload.storage_key, upload.storage_upload_id, part_number, stream, size)
+    except IncompleteStreamError as e:
+        raise UploadError(str(e)) from e
+    return record_parts(upload.pk, {part_number: {'etag': etag, 'size': size}})
+
+
+def presign_parts(upload, part_numbers=None):
+    """
+    {parça no: URL} - istemci parçayı bu URL'e doğrudan PUT eder.
+    part_numbers boşsa eksik parçaların ilk MAX_PRESIGNED_PARTS tanesi.
+    """
+    _check_open(upload)
+    numbers = part_numbers or missing_parts(upload)
+    if len(numbers) > MAX_PRESIGNED_PARTS:
+        if part_numbers:
+            raise UploadError(f'Tek seferde en fazla {MAX_PRESIGNED_PARTS} parça istenebilir')
+        numbers = numbers[:MAX_PRESIGNED_PARTS]
+    return {
+        n: backend.presign_part(
+            upload.storage_key, upload.storage_upload_id, n,
+            expected_part_size(upload, n), settings.UPLOAD_PART_URL_EXPIRY
+        )
+        for n in numbers
+    }
+
+
+def _etag(value):
+    return str(value or '').strip().strip('"')
+
+
+def confirm_parts(upload, claimed):
+    """
+    Doğrudan yüklenen parçaları onaylar (istemci callback'i).
+    claimed: {parça no: istemcinin aldığı ETag}
+    Depolamadaki parça listesiyle karşılaştırılır: parça var mı, ETag ve boyut doğru mu.
+    """
+    _check_open(upload)
+    stored = backend.list_parts(upload.storage_key, upload.storage_upload_id)
+    confirmed = {}
+    for part_number, etag in claimed.items():
+        expected = expected_part_size(upload, part_number)
+        part = stored.get(part_number)
+        if part is None:
+            raise UploadError(f'Parça {part_number} depolamada bulunamadı')
+        if _etag(part['etag']) != _etag(etag):
+            raise UploadError(f'Parça {part_number} ETag uyuşmuyor')
+        if part['size'] != expected:
+            raise UploadError(f'Parça {part_number} {expected} byte olmalı ({part["size"]} byte yüklendi)')
+        confirmed[part_number] = part
+    return record_parts(upload.pk, confirmed)
+
+
+def _source_upload(upload):
+    """Önceki versiyonun parçalı yüklemesi (parçaları aynı sınırlarda bölünmüşse)"""
+    if upload.version_of_id is None:
+        return None
+    return FileUpload.objects.filter(
+        file_id=upload.version_of_id, status='completed', part_size=upload.part_size
+    ).exclude(parts={}).first()
+
+
+def reuse_parts(upload, claimed):
+    """
+    Yeni versiyonun önceki versiyonla aynı olan parçalarını depolamada kopyalar (delta yükleme).
+    claimed: {parça no: istemcinin hesapladığı MD5 (= parçanın ETag'i)}
+    Eşleşmeyen parçalar atlanır, istemci onları normal yükler. -> (upload, kopyalanan parça no'ları)
+    """
+    _check_open(upload)
+    if len(claimed) > MAX_REUSED_PARTS:
+        raise UploadError(f'Tek seferde en fazla {MAX_REUSED_PARTS} parça bildirilebilir')
+    source = _source_upload(upload)
+    if source is None:
+        return upload, []
+
+    source_key = upload.version_of.file.name
+    copied = {}
+    for part_number, etag in sorted(claimed.items()):
+        size = expected_part_size(upload, part_number)
+        part = source.parts.get(str(part_number))
+        if part is None or part['size'] != size or _etag(part['etag']) != _etag(etag):
+            continue
+        start = (part_number - 1) * upload.part_size
+        new_etag = backend.copy_part(
+            upload.storage_key, upload.storage_upload_id, part_number, source_key, start, size
+        )
+        copied[part_number] = {'etag': new_etag, 'size': size}
+    if not copied:
+        return upload, []
+    return record_parts(upload.pk, copied), sorted(copied)
+
+
+def record_parts(upload_id, parts):
+    """
+    Parçaları onaylar (paralel gelen parçalar birbirini ezmesin diye satır kilitli).
+    parts: {parça no: {'etag', 'size'}}
+    """
+    with transaction.atomic():
+        upload = FileUpload.objects.select_for_update().get(pk=upload_id)
+        _check_open(upload)
+        for part_number, part in parts.items():
+            upload.parts[str(part_number)] = {'etag': part['etag'], 'size': part['size']}
+        upload.received_bytes = sum(part['size'] for part in upload.parts.values())
+        upload.save(update_fields=['parts', 'received_bytes', 'updated_at'])
+    return upload
+
+
+def _create_file(upload, metadata, blob=None):
+    """metadata: tamamlanan object'in depolamadaki boyutu / tipi (storage_service.head)"""
+    fields = dict(
+        agency_id=upload.agency_id,
+        project_id=upload.project_id,
+        uploaded_by_id=upload.uploaded_by_id,
+        file=upload.storage_key,
+        blob=blob,
+        original_name=upload.original_name,
+        file_type=file_type_for(metadata['content_type'] or upload.content_type),
+        file_size=metadata['size'],
+        description=upload.description,
+        tags=upload.tags
+    )
+    if upload.version_of:
+        return file_versions.create(upload.version_of, **fields)
+    return File.objects.create(**fields)
+
+
+def _begin_completion(upload_id):
+    """Parçalar tamsa yüklemeyi 'completing' yapar: bundan sonra parça kabul edilmez"""
+    with transaction.atomic():
+        upload = FileUpload.objects.select_for_update().get(pk=upload_id)
+        if upload.status in ('completing', 'completed'):
+            return upload  # Tekrar çağrı / yarım kalan tamamlama
+        _check_open(upload)
+
+        missing = missing_parts(upload)
+        if missing:
+            shown = ', '.join(str(n) for n in missing[:MAX_LISTED_PARTS])
+            raise UploadError(f'Eksik parçalar ({len(missing)}): {shown}')
+        upload.status = 'completing'
+        upload.save(update_fields=['status', 'updated_at'])
+    return upload
+
+
+def _object_exists(key):
+    try:
+        backend.head(key)
+    except StorageError:
+        return False
+    return True
+
+
+def _reopen(upload_id):
+    """Birleştirme başarısız, object oluşmadı: yükleme parça kabul etmeye devam eder"""
+    FileUpload.objects.filter(pk=upload_id, status='completing').update(
+        status='uploading', updated_at=timezone.now()
+    )
+
+
+def _finish_completion(upload_id, metadata):
+    with transaction.atomic():
+        upload = FileUpload.objects.select_for_update().select_related('version_of').get(pk=upload_id)
+        if upload.status == 'completed':
+            return upload  # Paralel çağrı File'ı oluşturdu
+        upload.file = _create_file(upload, metadata)
+        upload.status = 'completed'
+        upload.save(update_fields=['file', 'status', 'updated_at'])
+
+        # Object okunarak arka planda hash'lenir (200 GB'a kadar: istekte değil)
+        from api.tasks import hash_file
+        file_id = upload.file.id
+        transaction.on_commit(lambda: hash_file.delay(file_id))
+    return upload
+
+
+def complete(upload):
+    """
+    Tüm parçalar onaylıysa object'i birleştirir ve File kaydını oluşturur (tekrar çağrılabilir).
+    Depolamada birleştirme uzun sürebilir: transaction ve satır kilidi dışında yapılır.
+    Birleştirme sonrası File oluşturulamazsa tekrar çağrı object'i bulur, sadece File'ı oluşturur.
+    """
+    upload = _begin_completion(upload.pk)
+    if upload.status == 'completed':
+        return upload
+
+    try:
+        backend.complete_multipart(
+            upload.storage_key, upload.storage_upload_id,
+            [(n, upload.parts[str(n)]['etag']) for n in range(1, part_count(upload) + 1)]
+        )
+    except StorageError:
+        # Önceki deneme birleştirmiş olabilir (multipart id tüketildi): object varsa devam
+        if not _object_exists(upload.storage_key):
+            _reopen(upload.pk)
+            raise
+    metadata = backend.head(upload.storage_key)
+    return _finish_completion(upload.pk, metadata)
+
+
+def abort(upload):
+    """Yüklemeyi iptal eder, depolamadaki parçaları siler"""
+    with transaction.atomic():
+        upload = FileUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.status != 'uploading':
+            raise UploadError(f'Yükleme {upload.get_status_display().lower()} durumunda')
+        upload.status = 'aborted'
+        upload.save(update_fields=['status', 'updated_at'])
+    try:
+        backend.abort_multipart(upload.storage_key, upload.storage_upload_id)
+    except StorageError:
+        pass  # S3 yarım yüklemeyi zaten silmiş olabilir
+    return upload
+
+
+def abort_stale(now=None):
+    """
+    Süresi dolan yüklemeleri iptal eder (yarım multipart parçaları depolamada yer kaplamasın).
+    Tamamlanırken yarım kalanlar önce bitirilir; object oluşmadıysa iptal edilir.
+    """
+    stale = FileUpload.objects.filter(
+        status__in=('uploading', 'completing'), expires_at__lte=now or timezone.now()
+    )
+    aborted = 0
+    for upload in stale.iterator():
+        try:
+            if upload.status == 'completing':
+                try:
+                    complete(upload)
+                    continue
+                except StorageError:
+                    pass  # Birleştirilemedi, yükleme tekrar 'uploading'
+            abort(upload)
+        except UploadError:
+            continue
+        aborted += 1
+    return aborted
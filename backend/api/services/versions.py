@@ -0,0 +1,37 @@
+"""
+🔢 Agency Versions
+Ajans başına monoton sayaçlar (AgencyVersion): process-içi / Redis kopyaların
+güncel olup olmadığı bunlarla anlaşılır
+
+- bump: değişikliği yapan transaction içinde F() + 1 (satır yoksa oluşturulur);
+  sadece o sayacın satırı kilitlenir, Agency satırı değil
+- Sayaç hiç azalmaz: Redis sıfırlansa da eski bir değer tekrar görülmez
+"""
+from django.db.models import F
+
+from api.models import AgencyVersion
+
+AVAILABILITY = 'availability'
+PERMISSIONS = 'permissions'
+
+
+def current(agency_id, name):
+    """Sayacın değeri (hiç artmadıysa 0)"""
+    value = AgencyVersion.objects.filter(agency_id=agency_id, name=name).values_list('value', flat=True).first()
+    return value or 0
+
+
+def bump(agency_id, name):
+    """Sayacı artırır ve yeni değeri döner (transaction içinde: satır commit'e kadar kilitli)"""
+    rows = AgencyVersion.objects.filter(agency_id=agency_id, name=name)
+    if not rows.update(value=F('value') + 1):
+        AgencyVersion.objects.bulk_create(
+            [AgencyVersion(agency_id=agency_id, name=name)], ignore_conflicts=True
+        )
+        rows.update(value=F('value') + 1)
+    return rows.values_list('value', flat=True).get()
+
+
+def forget(agency_id):
+    """Silinen ajansın sayaçları"""
+    AgencyVersion.objects.filter(agency_id=agency_id).delete()
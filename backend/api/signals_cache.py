@@ -0,0 +1,185 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete, m2m_changed
+from django.dispatch import receiver
+from api.models import Agency, Client, Equipment, EquipmentReservation, Expense, File, Project, Task, ShootingDay, AgencyMembership, AgencyRole
+from api.services import availability, blobs, dashboard, file_versions, membership, project_stats, storage_usage, tags, versions
+
+
+# ============================================================================
+# MÜSAİTLİK MOTORU (Interval Tree)
+# ============================================================================
+@receiver(post_save, sender=EquipmentReservation)
+def reservation_saved(sender, instance, **kwargs):
+    # Versiyon aynı transaction'da artar, bellekteki ağaç commit sonrası güncellenir
+    availability.reservation_changed(instance)
+
+@receiver(post_delete, sender=EquipmentReservation)
+def reservation_deleted(sender, instance, **kwargs):
+    availability.reservation_changed(instance, deleted=True)
+
+@receiver(post_save, sender=Equipment)
+def equipment_saved(sender, instance, **kwargs):
+    availability.equipment_changed(instance)
+
+@receiver(post_delete, sender=Equipment)
+def equipment_deleted(sender, instance, **kwargs):
+    availability.equipment_changed(instance, deleted=True)
+
+@receiver(post_delete, sender=Agency)
+def forget_agency_versions(sender, instance, **kwargs):
+    # Cascade sırasında gelen artırmalar bittikten sonra (ajans en son silinir)
+    versions.forget(instance.pk)
+
+
+# ============================================================================
+# DASHBOARD ÖZETİ
+# ============================================================================
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=ShootingDay)
+@receiver(post_delete, sender=ShootingDay)
+def invalidate_dashboard(sender, instance, **kwargs):
+    transaction.on_commit(lambda: dashboard.invalidate(instance.agency_id))
+
+
+# ============================================================================
+# YETKİ CACHE'İ (Redis + JWT claim)
+# ============================================================================
+@receiver(post_save, sender=AgencyMembership)
+@receiver(post_delete, sender=AgencyMembership)
+@receiver(post_save, sender=AgencyRole)
+@receiver(post_delete, sender=AgencyRole)
+def invalidate_permissions(sender, instance, **kwargs):
+    # Aynı transaction içinde: versiyon değişiklikle birlikte commit olur (rollback'te artmaz).
+    # Ajans versiyonu artınca eski claim'ler ve cache kayıtları kullanılmaz
+    membership.bump_version(instance.agency_id)
+
+
+# ============================================================================
+# PROJE SAYAÇLARI (tasks_total / tasks_done / expenses_total) + STATS CACHE
+# ============================================================================
+def _project_ids(instance):
+    return {instance.project_id, getattr(instance, '_previous_project_id', None)}
+
+@receiver(pre_save, sender=Task)
+@receiver(pre_save, sender=Expense)
+@receiver(pre_save, sender=EquipmentReservation)
+def remember_project(sender, instance, **kwargs):
+    # Kayıt başka projeye taşınırsa eski projenin sayacı/cache'i de güncellensin
+    if not instance._state.adding:
+        instance._previous_project_id = sender.objects.filter(pk=instance.pk).values_list('project_id', flat=True).first()
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def refresh_project_counters(sender, instance, **kwargs):
+    # Aynı transaction içinde: sayaç görev yazmasıyla birlikte commit/rollback olur
+    project_ids = _project_ids(instance)
+    project_stats.refresh_task_counters(project_ids)
+    transaction.on_commit(lambda: project_stats.invalidate(instance.agency_id, project_ids))
+
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+def refresh_project_expenses(sender, instance, **kwargs):
+    project_ids = _project_ids(instance)
+    project_stats.refresh_expense_total(project_ids)
+    transaction.on_commit(lambda: project_stats.invalidate(instance.agency_id, project_ids))
+
+@receiver(post_save, sender=EquipmentReservation)
+@receiver(post_delete, sender=EquipmentReservation)
+def invalidate_project_stats_for_reservation(sender, instance, **kwargs):
+    project_ids = _project_ids(instance)
+    transaction.on_commit(lambda: project_stats.invalidate(instance.agency_id, project_ids))
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_project_stats(sender, instance, **kwargs):
+    transaction.on_commit(lambda: project_stats.invalidate(instance.agency_id, [instance.pk]))
+
+@receiver(m2m_changed, sender=Project.assigned_team.through)
+def invalidate_project_stats_for_team(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # user.assigned_projects.add(...) -> instance kullanıcı, pk_set projeler
+        projects = Project.objects.filter(pk__in=pk_set or []).values_list('agency_id', 'pk')
+    else:
+        projects = [(instance.agency_id, instance.pk)]
+    for agency_id, project_id in projects:
+        transaction.on_commit(lambda a=agency_id, p=project_id: project_stats.invalidate(a, [p]))
+
+
+# ============================================================================
+# TAG SÖZLÜĞÜ (Client / Project / File tags -> Tag.usage_count)
+# ============================================================================
+@receiver(pre_save, sender=Client)
+@receiver(pre_save, sender=Project)
+@receiver(pre_save, sender=File)
+def normalize_tags(sender, instance, update_fields=None, **kwargs):
+    # Temizle + sözlükteki yazıma çevir; eski değeri sayaç farkı için sakla
+    if update_fields is not None and 'tags' not in update_fields:
+        instance._previous_tags = None
+        return
+    instance.tags = tags.canonicalize(instance.agency_id, instance.tags)
+    if instance._state.adding:
+        instance._previous_tags = []
+    else:
+        instance._previous_tags = sender.objects.filter(pk=instance.pk).values_list('tags', flat=True).first() or []
+
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=File)
+def update_tag_usage(sender, instance, **kwargs):
+    # Aynı transaction içinde: sayaç kayıtla birlikte commit/rollback olur
+    previous = getattr(instance, '_previous_tags', [])
+    if previous is None:
+        return
+    added, removed = tags.diff(previous, instance.tags)
+    tags.apply_usage(instance.agency_id, added, removed)
+    instance._previous_tags = instance.tags
+
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=File)
+def release_tags(sender, instance, **kwargs):
+    tags.apply_usage(instance.agency_id, removed=instance.tags)
+
+
+# ============================================================================
+# BLOB REFERANSLARI (File -> Blob.ref_count) + DEPOLAMA SAYAÇLARI (StorageUsage)
+# ============================================================================
+@receiver(post_save, sender=File)
+def acquire_blob(sender, instance, created, **kwargs):
+    # Aynı transaction içinde: sayaçlar dosya kaydıyla birlikte commit/rollback olur
+    if not created:
+        return
+    storage_usage.file_added(instance)
+    # Sonradan hash'lenen dosyalarda ref_count blobs.attach içinde artırılır
+    if instance.blob_id:
+        blobs.acquire(instance.blob_id)
+
+@receiver(post_delete, sender=File)
+def release_blob(sender, instance, **kwargs):
+    storage_usage.file_removed(instance)
+    # Son referans da gidince blob silinir, object commit sonrası depolamadan kalkar
+    if instance.blob_id:
+        freed = blobs.release(instance.blob_id)
+        if freed:
+            storage_usage.blob_released(instance, freed)
+
+
+# ============================================================================
+# DOSYA VERSİYON ZİNCİRİ (File.root / File.parent)
+# ============================================================================
+@receiver(pre_save, sender=File)
+def default_file_root(sender, instance, **kwargs):
+    # Yeni zincir: ilk versiyon kendi root'u (UUID pk insert'ten önce belli)
+    if instance._state.adding and instance.root_id is None:
+        instance.root_id = instance.pk
+
+@receiver(pre_delete, sender=File)
+def detach_file_version(sender, instance, origin=None, **kwargs):
+    # Proje / ajans silinirken tüm zincir zaten gidiyor: sadece dosyanın kendisi silinince
+    if origin is instance or getattr(origin, 'model', None) is File:
+        file_versions.detach(instance)
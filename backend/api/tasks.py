@@ -1,55 +1,113 @@
 """
 🔥 CELERY TASKS
 Async işlemler: Email, Notifications, Scheduled Jobs
+
+Tüm mailler api.services.mail üzerinden gönderilir (pooled SMTP bağlantısı,
+hız limiti, backoff ile tekrar deneme; tekrar denemede sadece gönderilemeyenler).
 """
+import logging
+
 from celery import shared_task
-from django.core.mail import send_mail
+from celery.utils.time import get_exponential_backoff_interval
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 from api.models import Task, ShootingDay, EquipmentReservation, Notification, User
+from api.services import mail
 
-@shared_task
-def send_email_notification(subject, message, recipient_list):
+# check_overdue_tasks: tek seferde işlenecek (görev, kullanıcı) satırı
+OVERDUE_CHUNK_SIZE = 1000
+
+# Tek alıcılı mail task'ları için Celery seviyesinde tekrar deneme ayarları
+MAIL_TASK_OPTIONS = {
+    'autoretry_for': mail.RETRYABLE_ERRORS + (mail.MailDeliveryError,),
+    'retry_backoff': True,
+    'retry_backoff_max': 600,
+    'retry_kwargs': {'max_retries': 5},
+}
+
+logger = logging.getLogger(__name__)
+
+
+def _mail_backoff(retries):
+    """MAIL_TASK_OPTIONS'daki autoretry ile aynı bekleme (saniye)"""
+    return get_exponential_backoff_interval(
+        factor=1, retries=retries, maximum=MAIL_TASK_OPTIONS['retry_backoff_max'], full_jitter=True
+    )
+
+
+def _deliver(messages):
     """
-    📧 Email Gönder
-    Async email gönderme
+    Mesajları gönderir. Bir kısmı gönderilemezse sadece kalanlar send_email_messages ile
+    tekrar denenir (task'ın tamamı tekrar çalışsa gönderilmiş mailler ikinci kez giderdi).
+    Returns: şimdi gönderilen mesaj sayısı
     """
     try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=recipient_list,
-            fail_silently=False,
+        return mail.send_messages(messages)
+    except mail.MailDeliveryError as e:
+        logger.warning("%s emails unsent, retrying later: %s", len(e.unsent), e.cause)
+        send_email_messages.apply_async(
+            args=([mail.to_payload(m) for m in e.unsent],), countdown=_mail_backoff(0)
         )
-        return f"Email sent to {len(recipient_list)} recipients"
-    except Exception as e:
-        return f"Email failed: {str(e)}"
+        return len([m for m in messages if m.to]) - len(e.unsent)
 
 
-@shared_task
-def send_task_assignment_email(task_id):
+@shared_task(bind=True, **MAIL_TASK_OPTIONS)
+def send_email_messages(self, messages):
+    """
+    📧 Gönderilemeyen Mailler
+    _deliver'ın devrettiği mesajlar [[subject, body, to], ...]; her denemede
+    sadece hâlâ gönderilemeyenlerle tekrar kuyruğa girer
+    """
+    try:
+        sent = mail.send_messages([mail.from_payload(m) for m in messages])
+    except mail.MailDeliveryError as e:
+        raise self.retry(
+            args=([mail.to_payload(m) for m in e.unsent],),
+            exc=e,
+            countdown=_mail_backoff(self.request.retries + 1),
+            max_retries=MAIL_TASK_OPTIONS['retry_kwargs']['max_retries']
+        )
+    return f"Email sent to {sent} recipients"
+
+
+@shared_task(**MAIL_TASK_OPTIONS)
+def send_email_notification(subject, message, recipient_list):
+    """
+    📧 Email Gönder
+    Async email gönderme (her alıcıya ayrı mesaj, tek bağlantı)
+    """
+    sent = _deliver([mail.build_message(subject, message, email) for email in recipient_list])
+    return f"Email sent to {sent} recipients"
+
+
+@shared_task(**MAIL_TASK_OPTIONS)
+def send_task_assignment_email(task_id, user_ids=None):
     """
     📋 Görev Atama Maili
-    Kullanıcıya yeni görev atandığında
+    Kullanıcılara yeni görev atandığında (user_ids verilmezse tüm atananlara)
     """
     try:
-        task = Task.objects.select_related('assigned_to', 'project').get(id=task_id)
-        
-        if not task.assigned_to or not task.assigned_to.email:
-            return "No email recipient"
-        
-        subject = f'Yeni Görev: {task.title}'
-        message = f"""
-Merhaba {task.assigned_to.get_full_name()},
+        task = Task.objects.select_related('project').get(id=task_id)
+    except Task.DoesNotExist:
+        return "Task not found"
+    
+    assignees = task.assigned_to.exclude(email='')
+    if user_ids:
+        assignees = assignees.filter(id__in=user_ids)
+    
+    messages = []
+    for user in assignees:
+        messages.append(mail.build_message(
+            subject=f'Yeni Görev: {task.title}',
+            body=f"""
+Merhaba {user.get_full_name()},
 
 Size yeni bir görev atandı:
 
 Görev: {task.title}
 Proje: {task.project.title if task.project else 'Bağımsız'}
-Öncelik: {task.get_priority_display()}
-Bitiş Tarihi: {task.due_date.strftime('%d/%m/%Y %H:%M') if task.due_date else 'Belirtilmemiş'}
+Bitiş Tarihi: {timezone.localtime(task.due_date).strftime('%d/%m/%Y %H:%M') if task.due_date else 'Belirtilmemiş'}
 
 Açıklama:
 {task.description}
@@ -57,22 +115,15 @@ Açıklama:
 Görevi görmek için: {settings.FRONTEND_URL}/tasks/{task.id}
 
 İyi çalışmalar!
-"""
-        
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[task.assigned_to.email],
-            fail_silently=False,
-        )
-        
-        return f"Task assignment email sent to {task.assigned_to.email}"
+""",
+            to=user.email
+        ))
     
-    except Task.DoesNotExist:
-        return "Task not found"
-    except Exception as e:
-        return f"Error: {str(e)}"
+    if not messages:
+        return "No email recipient"
+    
+    sent = _deliver(messages)
+    return f"Task assignment email sent to {sent} recipients"
 
 
 @shared_task
@@ -80,43 +131,39 @@ def send_shooting_reminder_emails():
     """
     🎬 Yarınki Çekim Hatırlatması
     Her gün akşam çalışır, yarın çekimi olan herkese mail atar
+    Tüm ekip mailleri tek SMTP bağlantısı üzerinden paketler halinde gider
     
     Celery Beat ile scheduled: Her gün 18:00'da
     """
-    tomorrow = timezone.now().date() + timedelta(days=1)
+    tomorrow = timezone.localdate() + timedelta(days=1)
     
-    # Yarın çekimi olan günler
+    # Yarın çekimi olan günler (ekip tek prefetch ile)
     shooting_days = ShootingDay.objects.filter(
-        shoot_date=tomorrow,
-        status__in=['planned', 'confirmed']
-    ).select_related('project')
-    
-    if not shooting_days.exists():
-        return "No shootings tomorrow"
-    
-    emails_sent = 0
+        date=tomorrow
+    ).select_related('project', 'main_location').prefetch_related('project__assigned_team')
     
+    messages = []
     for shooting_day in shooting_days:
-        # Projedeki tüm ekip üyeleri
-        if shooting_day.project:
-            team_members = shooting_day.project.team_members.all()
+        project = shooting_day.project
+        team_members = list(project.assigned_team.all())
+        
+        for member in team_members:
+            if not member.email:
+                continue
             
-            for member in team_members:
-                if not member.email:
-                    continue
-                
-                subject = f'Yarın Çekiminiz Var: {shooting_day.project.title}'
-                message = f"""
+            messages.append(mail.build_message(
+                subject=f'Yarın Çekiminiz Var: {project.title}',
+                body=f"""
 Merhaba {member.get_full_name()},
 
 Yarın çekiminiz var:
 
-Proje: {shooting_day.project.title}
+Proje: {project.title}
 Tarih: {tomorrow.strftime('%d/%m/%Y')}
 Saat: {shooting_day.call_time.strftime('%H:%M') if shooting_day.call_time else 'Belirtilmemiş'}
-Lokasyon: {shooting_day.location or 'Belirtilmemiş'}
+Lokasyon: {shooting_day.main_location.name if shooting_day.main_location else 'Belirtilmemiş'}
 
-Ekip: {shooting_day.crew_size or 'Belirtilmemiş'} kişi
+Ekip: {len(team_members)} kişi
 
 Notlar:
 {shooting_day.notes or 'Yok'}
@@ -124,24 +171,18 @@ Notlar:
 Çekim detayları: {settings.FRONTEND_URL}/shooting-days/{shooting_day.id}
 
 Hazırlıklı olun!
-"""
-                
-                try:
-                    send_mail(
-                        subject=subject,
-                        message=message,
-                        from_email=settings.DEFAULT_FROM_EMAIL,
-                        recipient_list=[member.email],
-                        fail_silently=False,
-                    )
-                    emails_sent += 1
-                except:
-                    pass
+""",
+                to=member.email
+            ))
     
+    if not messages:
+        return "No shootings tomorrow"
+    
+    emails_sent = _deliver(messages)
     return f"Shooting reminders sent: {emails_sent} emails"
 
 
-@shared_task
+@shared_task(**MAIL_TASK_OPTIONS)
 def send_reservation_approval_email(reservation_id):
     """
     ✅ Rezervasyon Onaylandı Maili
@@ -150,118 +191,104 @@ def send_reservation_approval_email(reservation_id):
         reservation = EquipmentReservation.objects.select_related(
             'equipment', 'reserved_by', 'project'
         ).get(id=reservation_id)
-        
-        if not reservation.reserved_by.email:
-            return "No email"
-        
-        subject = f'Rezervasyon Onaylandı: {reservation.equipment.name}'
-        message = f"""
+    except EquipmentReservation.DoesNotExist:
+        return "Reservation not found"
+    
+    if not reservation.reserved_by.email:
+        return "No email"
+    
+    start = timezone.localtime(reservation.start_date)
+    end = timezone.localtime(reservation.end_date)
+    mail.send(
+        subject=f'Rezervasyon Onaylandı: {reservation.equipment.name}',
+        body=f"""
 Merhaba {reservation.reserved_by.get_full_name()},
 
 Ekipman rezervasyonunuz onaylandı!
 
 Ekipman: {reservation.equipment.name}
-Tarih: {reservation.start_date.strftime('%d/%m/%Y')} - {reservation.end_date.strftime('%d/%m/%Y')}
+Tarih: {start.strftime('%d/%m/%Y')} - {end.strftime('%d/%m/%Y')}
 Proje: {reservation.project.title if reservation.project else 'Bireysel'}
 
-Ekipmanı {reservation.start_date.strftime('%d/%m/%Y')} tarihinde teslim alabilirsiniz.
+Ekipmanı {start.strftime('%d/%m/%Y')} tarihinde teslim alabilirsiniz.
 
 Rezervasyon detayı: {settings.FRONTEND_URL}/reservations/{reservation.id}
-"""
-        
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[reservation.reserved_by.email],
-            fail_silently=False,
-        )
-        
-        return f"Reservation approval email sent"
+""",
+        to=reservation.reserved_by.email
+    )
     
-    except EquipmentReservation.DoesNotExist:
-        return "Reservation not found"
-    except Exception as e:
-        return f"Error: {str(e)}"
+    return "Reservation approval email sent"
 
 
-@shared_task
-def send_task_revision_email(task_id):
+@shared_task(**MAIL_TASK_OPTIONS)
+def send_task_revision_email(task_id, revision_note=''):
     """
     🔄 Revizyon Gerekiyor Maili
+    Göreve atanan herkese
     """
     try:
-        task = Task.objects.select_related('assigned_to', 'project').get(id=task_id)
-        
-        if not task.assigned_to or not task.assigned_to.email:
-            return "No email"
-        
-        subject = f'Revizyon Gerekiyor: {task.title}'
-        message = f"""
-Merhaba {task.assigned_to.get_full_name()},
+        task = Task.objects.get(id=task_id)
+    except Task.DoesNotExist:
+        return "Task not found"
+    
+    messages = [
+        mail.build_message(
+            subject=f'Revizyon Gerekiyor: {task.title}',
+            body=f"""
+Merhaba {user.get_full_name()},
 
 "{task.title}" görevi için revizyon talep edildi.
 
 Revizyon Notları:
-{task.revision_notes or 'Belirtilmemiş'}
+{revision_note or 'Belirtilmemiş'}
 
 Lütfen gerekli düzeltmeleri yapıp tekrar gönderin.
 
 Görev detayı: {settings.FRONTEND_URL}/tasks/{task.id}
-"""
-        
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[task.assigned_to.email],
-            fail_silently=False,
+""",
+            to=user.email
         )
-        
-        return f"Revision email sent"
+        for user in task.assigned_to.exclude(email='')
+    ]
+    if not messages:
+        return "No email"
     
-    except Task.DoesNotExist:
-        return "Task not found"
-    except Exception as e:
-        return f"Error: {str(e)}"
+    _deliver(messages)
+    return "Revision email sent"
 
 
-@shared_task
+@shared_task(**MAIL_TASK_OPTIONS)
 def send_task_approved_email(task_id):
     """
     ✅ Görev Onaylandı Maili
+    Göreve atanan herkese
     """
     try:
-        task = Task.objects.select_related('assigned_to').get(id=task_id)
-        
-        if not task.assigned_to or not task.assigned_to.email:
-            return "No email"
-        
-        subject = f'Görev Onaylandı: {task.title} 🎉'
-        message = f"""
-Tebrikler {task.assigned_to.get_full_name()}!
+        task = Task.objects.get(id=task_id)
+    except Task.DoesNotExist:
+        return "Task not found"
+    
+    messages = [
+        mail.build_message(
+            subject=f'Görev Onaylandı: {task.title} 🎉',
+            body=f"""
+Tebrikler {user.get_full_name()}!
 
 "{task.title}" göreviniz onaylandı ve başarıyla tamamlandı!
 
 Harika iş çıkardınız! 🎉
 
 Görev detayı: {settings.FRONTEND_URL}/tasks/{task.id}
-"""
-        
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[task.assigned_to.email],
-            fail_silently=False,
+""",
+            to=user.email
         )
-        
-        return f"Approval email sent"
+        for user in task.assigned_to.exclude(email='')
+    ]
+    if not messages:
+        return "No email"
     
-    except Task.DoesNotExist:
-        return "Task not found"
-    except Exception as e:
-        return f"Error: {str(e)}"
+    _deliver(messages)
+    return "Approval email sent"
 
 
 @shared_task
@@ -270,29 +297,104 @@ def check_overdue_tasks():
     ⏰ Geciken Görevleri Kontrol Et
     Süresi geçmiş görevler için bildirim gönder
     
+    - Görev/kullanıcı atamaları chunk'lar halinde okunur (iterator)
+    - Her chunk için tek bulk_create
+    - dedup_key: Görevin durumu/bitiş tarihi değişmedikçe aynı kişiye tekrar bildirim gitmez.
+      Unique index partition başına olduğundan ön kontrol tüm aylara bakar; chunk'ın
+      alıcıları kilitlenir, paralel çalışmalar aynı kişileri sırayla işler
+    - WebSocket: Kullanıcı başına tek özet mesaj, sadece gerçekten yazılan bildirimler sayılır;
+      en yeni bildirimin id / cursor'ını taşır (yeniden bağlanınca missed_since oradan devam eder)
+    
     Celery Beat ile scheduled: Her gün 09:00'da
     """
+    from itertools import islice
+    from collections import Counter
+    from django.db import transaction
+    from api.services.notification import NotificationService, encode_cursor
+    
     now = timezone.now()
     
-    overdue_tasks = Task.objects.filter(
-        due_date__lt=now,
-        status__in=['not_started', 'in_progress']
-    ).select_related('assigned_to')
+    # Her satır bir (görev, atanan kullanıcı) çifti
+    assignments = Task.assigned_to.through.objects.filter(
+        task__due_date__lt=now
+    ).exclude(
+        task__status='done'
+    ).values_list(
+        'task_id', 'user_id', 'task__agency_id', 'task__title', 'task__status', 'task__due_date'
+    ).iterator(chunk_size=OVERDUE_CHUNK_SIZE)
     
+    per_user = Counter()
+    latest = {}
     notifications_sent = 0
     
-    for task in overdue_tasks:
-        if task.assigned_to:
-            # Notification oluştur
-            Notification.objects.create(
-                user=task.assigned_to,
-                agency=task.agency,
+    while True:
+        chunk = list(islice(assignments, OVERDUE_CHUNK_SIZE))
+        if not chunk:
+            break
+        
+        candidates = {}
+        for task_id, user_id, agency_id, title, task_status, due_date in chunk:
+            dedup_key = f'overdue:{task_id}:{task_status}:{due_date.isoformat()}'
+            candidates[(user_id, dedup_key)] = Notification(
+                recipient_id=user_id,
+                agency_id=agency_id,
                 notification_type='warning',
                 title='Görev Gecikti!',
-                message=f'"{task.title}" göreviniz {(now - task.due_date).days} gün gecikmiş durumda.',
-                link=f'/tasks/{task.id}'
+                message=f'"{title}" göreviniz {(now - due_date).days} gün gecikmiş durumda.',
+                link=f'/tasks/{task_id}',
+                dedup_key=dedup_key
             )
-            notifications_sent += 1
+        
+        user_ids = sorted({user_id for user_id, _ in candidates})
+        with transaction.atomic():
+            # Paralel çalışma aynı alıcıları işliyorsa commit'ini bekle: ön kontrol onun
+            # yazdıklarını görür (unique index başka ayın partition'ındaki kaydı görmez)
+            list(User.objects.select_for_update().filter(id__in=user_ids).order_by('id').values_list('id', flat=True))
+            
+            # Daha önce bildirilmiş olanları ele (chunk başına tek sorgu, tüm partition'lar)
+            already_sent = set(
+                Notification.objects.filter(
+                    recipient_id__in=user_ids,
+                    dedup_key__in={key for _, key in candidates}
+                ).values_list('recipient_id', 'dedup_key')
+            )
+            new_notifications = [n for k, n in candidates.items() if k not in already_sent]
+            if not new_notifications:
+                continue
+            
+            inserted_after = timezone.now()
+            Notification.objects.bulk_create(new_notifications, ignore_conflicts=True)
+            # ignore_conflicts'in atladıkları sayılmaz: id'ler istemcide üretildi, yazılanlar okunur
+            inserted = set(
+                Notification.objects.filter(
+                    id__in=[n.id for n in new_notifications], created_at__gte=inserted_after
+                ).values_list('id', flat=True)
+            )
+        
+        for notification in new_notifications:
+            if notification.id not in inserted:
+                continue
+            user_id = notification.recipient_id
+            per_user[user_id] += 1
+            key = (notification.created_at, notification.id)
+            if user_id not in latest or key > (latest[user_id].created_at, latest[user_id].id):
+                latest[user_id] = notification
+        notifications_sent += len(inserted)
+    
+    # Kullanıcı başına tek WebSocket mesajı (outbox üzerinden)
+    NotificationService.enqueue([
+        (user_id, {
+            'id': str(latest[user_id].id),
+            'type': 'warning',
+            'title': 'Geciken Görevler',
+            'message': f'{count} göreviniz gecikmiş durumda.',
+            'link': '/tasks?overdue=true',
+            'created_at': latest[user_id].created_at.isoformat(),
+            'cursor': encode_cursor(latest[user_id].created_at, latest[user_id].id),
+            'count': count
+        })
+        for user_id, count in per_user.items()
+    ])
     
     return f"Overdue notifications sent: {notifications_sent}"
 
@@ -301,6 +403,7 @@ def check_overdue_tasks():
 def check_equipment_late_returns():
     """
     📦 Geç Teslim Edilen Ekipmanları Kontrol Et
+    Bildirimler tek bulk_create, mailler tek bağlantı üzerinden paketler halinde
     
     Celery Beat ile scheduled: Her gün 2 kez (10:00, 16:00)
     """
@@ -312,114 +415,304 @@ def check_equipment_late_returns():
         status='active'
     ).select_related('reserved_by', 'equipment')
     
-    notifications_sent = 0
+    notifications = []
+    messages = []
     
     for reservation in late_reservations:
-        if reservation.reserved_by:
-            days_late = (now - reservation.end_date).days
-            
-            Notification.objects.create(
-                user=reservation.reserved_by,
-                agency=reservation.agency,
-                notification_type='error',
-                title='Ekipman Teslimi Gecikti!',
-                message=f'{reservation.equipment.name} ekipmanı {days_late} gün gecikmiş. Lütfen acilen iade edin.',
-                link=f'/reservations/{reservation.id}'
-            )
-            
-            # Email de gönder
-            if reservation.reserved_by.email:
-                send_mail(
-                    subject='Ekipman Teslimi Gecikti!',
-                    message=f"""
+        days_late = (now - reservation.end_date).days
+        
+        notifications.append(Notification(
+            recipient=reservation.reserved_by,
+            agency_id=reservation.agency_id,
+            notification_type='error',
+            title='Ekipman Teslimi Gecikti!',
+            message=f'{reservation.equipment.name} ekipmanı {days_late} gün gecikmiş. Lütfen acilen iade edin.',
+            link=f'/reservations/{reservation.id}'
+        ))
+        
+        # Email de gönder
+        if reservation.reserved_by.email:
+            messages.append(mail.build_message(
+                subject='Ekipman Teslimi Gecikti!',
+                body=f"""
 Merhaba {reservation.reserved_by.get_full_name()},
 
 {reservation.equipment.name} ekipmanını {days_late} gündür iade etmediniz.
 
-İade tarihi: {reservation.end_date.strftime('%d/%m/%Y')}
-Bugün: {now.strftime('%d/%m/%Y')}
+İade tarihi: {timezone.localtime(reservation.end_date).strftime('%d/%m/%Y')}
+Bugün: {timezone.localtime(now).strftime('%d/%m/%Y')}
 
 Lütfen ekipmanı acilen iade edin.
 """,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[reservation.reserved_by.email],
-                    fail_silently=True,
-                )
-            
-            notifications_sent += 1
+                to=reservation.reserved_by.email
+            ))
     
-    return f"Late return warnings sent: {notifications_sent}"
+    Notification.objects.bulk_create(notifications)
+    _deliver(messages)
+    
+    return f"Late return warnings sent: {len(notifications)}"
 
 
 @shared_task
 def daily_digest_email():
     """
-    📊 Günlük Özet Maili
+    📊 Günlük Özet Maili (Koordinatör)
     Yöneticilere günlük durum raporu
     
+    - Tüm ajansların sayaçları metrik başına tek GROUP BY sorgusuyla hesaplanır
+    - Her ajans için send_agency_digest subtask'ı paralel (group) çalışır
+    
     Celery Beat ile scheduled: Her gün 08:00'da
     """
+    from celery import group
+    from django.db.models import Count
     from api.models import Agency, AgencyMembership
     
-    emails_sent = 0
+    today = timezone.localdate()
+    agencies = dict(Agency.objects.filter(is_active=True).values_list('id', 'name'))
+    if not agencies:
+        return "No active agencies"
     
-    # Tüm agency'leri döngüye al
-    for agency in Agency.objects.filter(is_active=True):
-        # Owner'ları bul
-        owners = User.objects.filter(
-            memberships__agency=agency,
-            memberships__is_owner=True,
-            memberships__is_active=True
+    def count_by_agency(queryset):
+        return dict(
+            queryset.filter(agency_id__in=agencies).values('agency_id').annotate(
+                total=Count('id')
+            ).order_by().values_list('agency_id', 'total')
         )
-        
-        # İstatistikler
-        today = timezone.now().date()
-        
-        tasks_today = Task.objects.filter(
-            agency=agency,
-            due_date__date=today
-        ).count()
-        
-        shootings_today = ShootingDay.objects.filter(
-            agency=agency,
-            shoot_date=today
-        ).count()
-        
-        pending_approvals = Task.objects.filter(
-            agency=agency,
-            status='in_review'
-        ).count()
-        
-        # Owner'lara mail gönder
-        for owner in owners:
-            if not owner.email:
-                continue
-            
-            subject = f'Günlük Özet - {agency.name}'
-            message = f"""
-Merhaba {owner.get_full_name()},
+    
+    tasks_today = count_by_agency(Task.objects.filter(due_date__date=today))
+    shootings_today = count_by_agency(ShootingDay.objects.filter(date=today))
+    pending_approvals = count_by_agency(Task.objects.filter(status='review'))
+    
+    # Owner'lar (tek sorgu)
+    recipients = {}
+    owners = AgencyMembership.objects.filter(
+        agency_id__in=agencies,
+        is_owner=True,
+        is_active=True
+    ).exclude(user__email='').values_list('agency_id', 'user__email', 'user__first_name', 'user__last_name')
+    for agency_id, email, first_name, last_name in owners:
+        full_name = f"{first_name} {last_name}".strip()
+        recipients.setdefault(agency_id, []).append((email, full_name))
+    
+    jobs = group(
+        send_agency_digest.s(
+            agency_name=agencies[agency_id],
+            stats={
+                'tasks_today': tasks_today.get(agency_id, 0),
+                'shootings_today': shootings_today.get(agency_id, 0),
+                'pending_approvals': pending_approvals.get(agency_id, 0),
+            },
+            recipients=agency_recipients
+        )
+        for agency_id, agency_recipients in recipients.items()
+    )
+    jobs.apply_async()
+    
+    return f"Daily digest dispatched for {len(recipients)} agencies"
+
+
+@shared_task(bind=True, **MAIL_TASK_OPTIONS)
+def send_agency_digest(self, agency_name, stats, recipients):
+    """
+    📊 Tek Ajansın Günlük Özet Maili
+    Owner'lara pooled SMTP bağlantısı üzerinden gönderilir;
+    tekrar denemede sadece maili gitmeyen owner'lar alıcıdır
+    
+    Args:
+        agency_name: Ajans adı
+        stats: {'tasks_today': int, 'shootings_today': int, 'pending_approvals': int}
+        recipients: [(email, full_name), ...]
+    """
+    messages = []
+    for email, full_name in recipients:
+        messages.append(mail.build_message(
+            subject=f'Günlük Özet - {agency_name}',
+            body=f"""
+Merhaba {full_name},
 
 Bugün için özet:
 
-📋 Bugün Bitmesi Gereken Görevler: {tasks_today}
-🎬 Bugünkü Çekimler: {shootings_today}
-⏳ Onay Bekleyen Görevler: {pending_approvals}
+📋 Bugün Bitmesi Gereken Görevler: {stats['tasks_today']}
+🎬 Bugünkü Çekimler: {stats['shootings_today']}
+⏳ Onay Bekleyen Görevler: {stats['pending_approvals']}
 
 Detaylar için: {settings.FRONTEND_URL}/dashboard
 
 İyi çalışmalar!
-"""
-            
-            try:
-                send_mail(
-                    subject=subject,
-                    message=message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[owner.email],
-                    fail_silently=True,
-                )
-                emails_sent += 1
-            except:
-                pass
+""",
+            to=email
+        ))
     
+    try:
+        emails_sent = mail.send_messages(messages)
+    except mail.MailDeliveryError as e:
+        unsent = {message.to[0] for message in e.unsent}
+        raise self.retry(
+            kwargs={
+                'agency_name': agency_name,
+                'stats': stats,
+                'recipients': [r for r in recipients if r[0] in unsent],
+            },
+            exc=e,
+            countdown=_mail_backoff(self.request.retries + 1),
+            max_retries=MAIL_TASK_OPTIONS['retry_kwargs']['max_retries']
+        )
     return f"Daily digest emails sent: {emails_sent}"
+
+
+@shared_task
+def snapshot_dashboard_stats():
+    """
+    📸 Günlük Dashboard Özeti
+    Trend hesapları için tüm ajansların günlük sayaçlarını kaydeder
+    (GROUP BY agency_id ile 2 sorgu + tek toplu INSERT)
+    
+    Celery Beat ile scheduled: Her gün 23:55'te
+    """
+    from api.models import Agency
+    from api.services.dashboard import store_daily_snapshots
+    
+    agency_ids = list(Agency.objects.filter(is_active=True).values_list('id', flat=True))
+    if not agency_ids:
+        return "No active agencies"
+    
+    stored = store_daily_snapshots(agency_ids)
+    return f"Dashboard snapshots stored: {stored}"
+
+
+
+@shared_task
+def relay_notification_outbox():
+    """
+    🔔 WebSocket Relay
+    NotificationOutbox'taki vadesi gelen mesajları paketler halinde channel
+    layer'a iletir (request'ler sadece outbox'a yazar, Redis'i beklemez).
+    
+    - Tek çalışmada NOTIFICATION_RELAY_MAX_BATCHES pakete kadar boşaltır
+    - Lag metrikleri cache'e yazılır (NotificationService.relay_metrics, /health/)
+    
+    Celery Beat ile scheduled: NOTIFICATION_RELAY_INTERVAL saniyede bir
+    """
+    from django.core.cache import cache
+    from api.services.notification import NotificationService, RELAY_METRICS_KEY
+    
+    batch_size = getattr(settings, 'NOTIFICATION_RELAY_BATCH_SIZE', 500)
+    totals = {'delivered': 0, 'failed': 0, 'lag_max': 0.0, 'lag_avg': 0.0}
+    
+    for _ in range(getattr(settings, 'NOTIFICATION_RELAY_MAX_BATCHES', 20)):
+        result = NotificationService.relay(batch_size)
+        if result['delivered']:
+            delivered = totals['delivered'] + result['delivered']
+            totals['lag_avg'] = (
+                totals['lag_avg'] * totals['delivered'] + result['lag_avg'] * result['delivered']
+            ) / delivered
+            totals['delivered'] = delivered
+            totals['lag_max'] = max(totals['lag_max'], result['lag_max'])
+        totals['failed'] += result['failed']
+        if result['failed'] or result['delivered'] < batch_size:
+            break
+    
+    try:
+        cache.set(RELAY_METRICS_KEY, {**totals, 'finished_at': timezone.now().isoformat()}, None)
+    except Exception:
+        pass
+    
+    if totals['delivered'] or totals['failed']:
+        return (
+            f"Outbox relayed: {totals['delivered']} delivered, {totals['failed']} failed, "
+            f"lag avg {totals['lag_avg']:.2f}s max {totals['lag_max']:.2f}s"
+        )
+    return "Outbox empty"
+
+
+@shared_task
+def maintain_partitions():
+    """
+    🗂️ Partition Bakımı
+    Notification / AuditLog için gelecek ayların partition'larını açar,
+    saklama süresi dolan ayları DROP eder (DELETE yok)
+    
+    Celery Beat ile scheduled: Her gün 03:00'te
+    """
+    from io import StringIO
+    from django.core.management import call_command
+    
+    out = StringIO()
+    call_command('manage_partitions', stdout=out)
+    return out.getvalue().strip()
+
+
+@shared_task
+def abort_stale_uploads():
+    """
+    ⬆️ Yarım Kalan Yüklemeler
+    Süresi (UPLOAD_EXPIRY_HOURS) dolan parçalı yüklemeleri iptal eder;
+    depolamadaki yarım multipart parçaları silinir
+    
+    Celery Beat ile scheduled: Saatte bir
+    """
+    from api.services.uploads import abort_stale
+    
+    return f"Stale uploads aborted: {abort_stale()}"
+
+
+@shared_task
+def hash_file(file_id):
+    """
+    🧬 Dosya Hash'i
+    Depolamadaki object'i okuyup SHA-256'sını hesaplar ve blob'a bağlar;
+    ajansta aynı içerik varsa yeni kopya silinir (tamamlanan parçalı yüklemeler)
+    """
+    from api.services.blobs import hash_file as attach_hash
+    
+    blob = attach_hash(file_id)
+    return f"File {file_id} hashed: {blob.sha256 if blob else '-'}"
+
+
+@shared_task
+def hash_pending_files():
+    """
+    🧬 Hash'lenmemiş Dosyalar
+    Blob'a bağlanmamış dosyaları (eski kayıtlar / kaçan task'lar) sırayla hash'ler
+    
+    Celery Beat ile scheduled: 10 dakikada bir
+    """
+    from api.services.blobs import hash_file as attach_hash, pending_file_ids
+    from api.services.storage_service import StorageError
+    
+    hashed = 0
+    for file_id in pending_file_ids():
+        try:
+            attach_hash(file_id)
+        except (StorageError, OSError):
+            continue  # Object depolamada yok: sonraki turda tekrar denenir
+        hashed += 1
+    return f"Files hashed: {hashed}"
+
+
+@shared_task
+def reconcile_storage_usage():
+    """
+    💾 Depolama Sayaçları
+    Ajansların dosya tipine göre depolama sayaçlarını dosyalardan yeniden hesaplar
+    (sinyalsiz toplu işlemlerin bıraktığı sapmayı düzeltir)
+    
+    Celery Beat ile scheduled: Her gece 04:00
+    """
+    from api.services.storage_usage import reconcile
+    
+    return f"Storage usage rows fixed: {reconcile()}"
+
+
+@shared_task(autoretry_for=(Exception,), retry_backoff=True, retry_backoff_max=600, retry_kwargs={'max_retries': 20})
+def write_audit_logs(entries):
+    """
+    📝 Audit Log Yazımı
+    Process içi tampona sığmayan / process kapanırken yazılamayan audit kayıtları.
+    DB gelene kadar (~3 saat) tekrar denenir; kayıtların id'si sabit, tekrar denemede iki kez yazılmaz
+    """
+    from api.services.audit import from_payload, write
+    
+    write([from_payload(entry) for entry in entries], ignore_conflicts=True)
+    return f"Audit logs written: {len(entries)}"
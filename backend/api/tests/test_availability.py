@@ -0,0 +1,156 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Agency, Equipment, EquipmentReservation, User
+from api.services import availability, versions
+from api.services.availability import IntervalTree
+
+
+class IntervalTreeTests(SimpleTestCase):
+    """IntervalTree sorguları kaba kuvvet (tüm aralıkları tarama) ile karşılaştırılır"""
+
+    def setUp(self):
+        self.random = random.Random(2024)
+
+    @staticmethod
+    def brute_force(intervals, start, end, exclude=None):
+        # Yarı açık aralıklar: [a, b) ile [start, end) çakışır <=> a < end ve b > start
+        return {
+            value for value, (a, b) in intervals.items()
+            if a < end and b > start and value != exclude
+        }
+
+    def random_interval(self, span=1000, max_length=60):
+        start = self.random.randrange(span)
+        return start, start + self.random.randint(1, max_length)
+
+    def build(self, count):
+        tree = IntervalTree()
+        intervals = {}
+        for value in range(count):
+            start, end = self.random_interval()
+            tree.insert(start, end, value)
+            intervals[value] = (start, end)
+        return tree, intervals
+
+    def assert_matches(self, tree, intervals, queries=200):
+        for _ in range(queries):
+            start, end = self.random_interval(max_length=120)
+            expected = self.brute_force(intervals, start, end)
+
+            found = tree.overlapping(start, end)
+            self.assertEqual(len(found), len(set(found)))
+            self.assertEqual(set(found), expected)
+            self.assertEqual(tree.overlaps(start, end), bool(expected))
+
+            if expected:
+                exclude = self.random.choice(sorted(expected))
+                self.assertEqual(
+                    tree.overlaps(start, end, exclude=exclude),
+                    bool(self.brute_force(intervals, start, end, exclude=exclude))
+                )
+
+    def test_overlapping_matches_brute_force(self):
+        tree, intervals = self.build(500)
+        self.assertEqual(len(tree), 500)
+        self.assert_matches(tree, intervals)
+
+    def test_matches_after_removals(self):
+        tree, intervals = self.build(400)
+        for value in self.random.sample(sorted(intervals), 250):
+            tree.remove(*intervals.pop(value), value)
+        self.assertEqual(len(tree), len(intervals))
+        self.assert_matches(tree, intervals)
+
+        # Silinenlerin yerine yenileri: max_end rotasyonlardan sonra da doğru kalmalı
+        for value in range(400, 600):
+            start, end = self.random_interval()
+            tree.insert(start, end, value)
+            intervals[value] = (start, end)
+        self.assert_matches(tree, intervals)
+
+    def test_half_open_boundaries(self):
+        tree = IntervalTree()
+        tree.insert(10, 20, 'a')
+        tree.insert(20, 30, 'b')
+        tree.insert(10, 20, 'c')  # Aynı aralık, farklı rezervasyon
+
+        self.assertEqual(sorted(tree.overlapping(20, 25)), ['b'])
+        self.assertEqual(sorted(tree.overlapping(5, 10)), [])
+        self.assertEqual(sorted(tree.overlapping(19, 21)), ['a', 'b', 'c'])
+        self.assertFalse(tree.overlaps(30, 40))
+        self.assertTrue(tree.overlaps(15, 16, exclude='a'))
+
+        tree.remove(10, 20, 'a')
+        self.assertEqual(sorted(tree.overlapping(10, 20)), ['c'])
+
+    def test_datetime_intervals(self):
+        # Motor rezervasyonları datetime aralıklarıyla tutar
+        base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        tree = IntervalTree()
+        intervals = {}
+        for value in range(200):
+            start = base + timedelta(hours=self.random.randrange(24 * 60))
+            end = start + timedelta(hours=self.random.randint(1, 72))
+            tree.insert(start, end, value)
+            intervals[value] = (start, end)
+
+        for _ in range(100):
+            start = base + timedelta(hours=self.random.randrange(24 * 60))
+            end = start + timedelta(hours=self.random.randint(1, 96))
+            self.assertEqual(set(tree.overlapping(start, end)), self.brute_force(intervals, start, end))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AvailabilityVersionTests(TestCase):
+    """Process'ler arası müsaitlik versiyonu: kalıcı, monoton, Agency satırına dokunmaz"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.agency = Agency.objects.create(name='A', slug='a', plan='enterprise')
+        cls.user = User.objects.create_user(username='u', email='u@x.com', password='p')
+        cls.equipment = Equipment.objects.create(agency=cls.agency, name='Kamera', qr_code='q1')
+
+    def setUp(self):
+        cache.clear()
+        availability._engines.clear()
+        self.start = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+    def reserve(self, status='approved'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return EquipmentReservation.objects.create(
+                agency=self.agency, equipment=self.equipment, reserved_by=self.user,
+                start_date=self.start, end_date=self.start + timedelta(days=1), status=status
+            )
+
+    def test_write_bumps_counter_without_locking_agency(self):
+        before = versions.current(self.agency.pk, versions.AVAILABILITY)
+        with CaptureQueriesContext(connection) as queries:
+            self.reserve()
+        self.assertEqual(versions.current(self.agency.pk, versions.AVAILABILITY), before + 1)
+        self.assertFalse([q for q in queries if q['sql'].startswith('UPDATE "agencies_agency"')])
+
+    def test_stale_engine_rebuilt_after_cache_reset(self):
+        engine = availability.get_engine(self.agency.pk)
+        self.assertEqual(engine.free_items(self.start, self.start + timedelta(hours=1)), [self.equipment.pk])
+
+        # Başka bir process'in yazması: bu process'in motoru güncellenmez, Redis de sıfırlanır
+        stale = availability._engines.pop(self.agency.pk)
+        self.reserve()
+        cache.clear()
+        availability._engines[self.agency.pk] = stale
+
+        engine = availability.get_engine(self.agency.pk)
+        self.assertIsNot(engine, stale)
+        self.assertEqual(engine.free_items(self.start, self.start + timedelta(hours=1)), [])
+
+    def test_agency_save_keeps_counter(self):
+        self.reserve()
+        value = versions.current(self.agency.pk, versions.AVAILABILITY)
+        Agency.objects.get(pk=self.agency.pk).save()
+        self.assertEqual(versions.current(self.agency.pk, versions.AVAILABILITY), value)
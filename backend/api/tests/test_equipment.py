@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import (
+    Agency, AgencyMembership, AgencyRole, Equipment, EquipmentCategory, EquipmentReservation, User
+)
+from api.services import availability
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class BulkAvailabilityTests(TestCase):
+    """Toplu kontrol ile kit rezervasyonu aynı talepleri çakışma sayar"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.agency = Agency.objects.create(name='A', slug='a', plan='enterprise')
+        role = AgencyRole.objects.create(agency=cls.agency, name='Owner', can_manage_equipment=True)
+        cls.user = User.objects.create_user(username='u', email='u@x.com', password='p', current_agency=cls.agency)
+        AgencyMembership.objects.create(user=cls.user, agency=cls.agency, role=role, is_owner=True)
+        cls.category = EquipmentCategory.objects.create(agency=cls.agency, name='LED', slug='led')
+        cls.items = [
+            Equipment.objects.create(agency=cls.agency, category=cls.category, name=f'LED {i}', qr_code=f'q{i}')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        availability._engines.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.start = timezone.now() + timedelta(days=7)
+        self.end = self.start + timedelta(days=1)
+
+    def request_item(self, equipment, status='pending'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return EquipmentReservation.objects.create(
+                agency=self.agency, equipment=equipment, reserved_by=self.user,
+                start_date=self.start, end_date=self.end, status=status
+            )
+
+    def bulk(self, **body):
+        body = {'start_date': self.start.isoformat(), 'end_date': self.end.isoformat(), **body}
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/items/bulk_availability/', body, format='json', secure=True)
+
+    def test_pending_request_reported_and_blocks_reserve(self):
+        self.request_item(self.items[0])
+
+        response = self.bulk(items=[str(self.items[0].id)])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['all_available'])
+        self.assertFalse(response.data['reservable'])
+        item = response.data['items'][0]
+        self.assertEqual(len(item['pending_requests']), 1)
+        self.assertFalse(item['reservable'])
+
+        response = self.bulk(items=[str(self.items[0].id)], reserve=True)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(EquipmentReservation.objects.count(), 1)
+
+    def test_check_and_reserve_agree(self):
+        response = self.bulk(items=[str(self.items[0].id)])
+        self.assertTrue(response.data['reservable'])
+
+        response = self.bulk(items=[str(self.items[0].id)], reserve=True)
+        self.assertEqual(response.status_code, 201)
+        # Kitin açtığı talep artık bekleyen talep olarak görünür
+        response = self.bulk(items=[str(self.items[0].id)])
+        self.assertFalse(response.data['reservable'])
+
+    def test_category_allocation_skips_pending_items(self):
+        self.request_item(self.items[0])
+
+        response = self.bulk(categories=[{'category': str(self.category.id), 'quantity': 2}], reserve=True)
+        self.assertEqual(response.status_code, 201)
+        reserved = {r['equipment'] for r in response.data['reservations']}
+        self.assertEqual(reserved, {self.items[1].id, self.items[2].id})
+
+    def test_category_short_of_request_free_items(self):
+        self.request_item(self.items[0])
+        self.request_item(self.items[1], status='approved')
+
+        response = self.bulk(categories=[{'category': str(self.category.id), 'quantity': 2}])
+        category = response.data['categories'][0]
+        self.assertTrue(category['available'])
+        self.assertEqual(category['pending_count'], 1)
+        self.assertFalse(category['reservable'])
+        self.assertFalse(response.data['reservable'])
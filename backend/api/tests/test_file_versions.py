@@ -0,0 +1,172 @@
+from unittest import mock
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.models import Agency, AgencyMembership, AgencyRole, Blob, File, Project, StorageUsage, User
+from api.services import file_versions
+from api.services.storage_usage import GB
+
+
+class FileVersionTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agency = Agency.objects.create(name='A', slug='a', plan='enterprise')
+        cls.user = User.objects.create_user(username='u', email='u@x.com', password='p', current_agency=cls.agency)
+        cls.project = Project.objects.create(agency=cls.agency, title='Klip', created_by=cls.user)
+        cls.blob = Blob.objects.create(agency=cls.agency, sha256='a' * 64, size=10, storage_key='blobs/a')
+
+    def first(self, **fields):
+        return File.objects.create(**self.fields(**fields))
+
+    def version(self, parent, **fields):
+        return file_versions.create(parent, **self.fields(**fields))
+
+    def fields(self, **fields):
+        return {
+            'agency': self.agency, 'project': self.project, 'uploaded_by': self.user,
+            'file': 'project_files/a.png', 'original_name': 'a.png', 'file_type': 'image', 'file_size': 10,
+            **fields
+        }
+
+    def versions(self, file):
+        return list(file_versions.history(File.objects.all(), file).values_list('version', flat=True))
+
+
+class VersionNumberTests(FileVersionTestCase):
+    """Numara zincirin en büyüğü + 1: eski versiyondan türetme de çakışmaz"""
+
+    def test_numbers_increase_along_chain(self):
+        v1 = self.first()
+        v2 = self.version(v1)
+        v3 = self.version(v2)
+
+        self.assertEqual((v1.root_id, v2.root_id, v3.root_id), (v1.pk,) * 3)
+        self.assertEqual((v2.parent_id, v3.parent_id), (v1.pk, v2.pk))
+        self.assertEqual(self.versions(v1), [3, 2, 1])
+
+    def test_branch_from_old_version_gets_next_number(self):
+        v1 = self.first()
+        self.version(self.version(v1))
+
+        branch = self.version(v1)
+        self.assertEqual((branch.version, branch.parent_id), (4, v1.pk))
+        self.assertEqual(self.versions(branch), [4, 3, 2, 1])
+
+    def test_root_row_locked_before_reading_latest(self):
+        v1 = self.first()
+        v2 = self.version(v1)
+        events = []
+        lock, read = File.objects.select_for_update, File.objects.filter
+
+        def select_for_update():
+            events.append('lock')
+            return lock()
+
+        def filter(**kwargs):
+            events.append(kwargs)
+            return read(**kwargs)
+
+        with mock.patch.object(File.objects, 'select_for_update', side_effect=select_for_update), \
+                mock.patch.object(File.objects, 'filter', side_effect=filter):
+            self.version(v2)
+        # Paralel ekleme kilidi bekler, en büyük numarayı kilitten sonra okur
+        self.assertEqual(events[:2], ['lock', {'root_id': v1.pk}])
+
+    def test_duplicate_number_rejected(self):
+        v1 = self.first()
+        self.version(v1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            File.objects.create(**self.fields(root=v1, parent=v1, version=2))
+
+    def test_root_deleted_chain_continues(self):
+        v1 = self.first()
+        v2 = self.version(v1)
+        v3 = self.version(v2)
+
+        v1.delete()
+        v2.refresh_from_db()
+        v3.refresh_from_db()
+        self.assertEqual(v2.root_id, v2.pk)
+        self.assertEqual((v3.root_id, v3.parent_id), (v2.pk, v2.pk))
+        self.assertEqual(self.version(v3).version, 4)
+        self.assertEqual(self.versions(v2), [4, 3, 2])
+
+    def test_middle_deleted_children_relinked(self):
+        v1 = self.first()
+        v2 = self.version(v1)
+        v3 = self.version(v2)
+
+        v2.delete()
+        v3.refresh_from_db()
+        self.assertEqual(v3.parent_id, v1.pk)
+        self.assertEqual(self.versions(v1), [3, 1])
+
+
+class RollbackTests(FileVersionTestCase):
+    """Geri alma: eski içerik yeni (en büyük numaralı) versiyon olur, geçmiş ve depolama değişmez"""
+
+    def test_rollback_adds_latest_version_with_target_content(self):
+        v1 = self.first(blob=self.blob, file=self.blob.storage_key, description='ilk', tags=['renk'])
+        v2 = self.version(v1, original_name='b.png', file='project_files/b.png', file_size=20)
+
+        restored = file_versions.rollback(v1, self.user)
+        self.assertEqual((restored.version, restored.parent_id, restored.root_id), (3, v1.pk, v1.pk))
+        self.assertEqual(
+            (restored.blob_id, restored.file.name, restored.original_name, restored.file_size, restored.tags),
+            (self.blob.pk, self.blob.storage_key, 'a.png', 10, ['renk'])
+        )
+        self.assertEqual(restored.description, 'v1 geri yüklendi')
+        self.assertEqual(self.versions(v2), [3, 2, 1])
+
+        diff = file_versions.diff(v1, restored)
+        self.assertTrue(diff['same_content'])
+        self.assertNotIn('file_size', diff['changes'])
+
+        # Aynı blob'u gösterir: depolamada kopya yok, referans sayılır
+        self.blob.refresh_from_db()
+        self.assertEqual(self.blob.ref_count, 2)
+
+    def test_failed_rollback_allocates_nothing(self):
+        v1 = self.first()
+        self.version(v1)
+
+        with mock.patch.object(File.objects, 'create', side_effect=IntegrityError('çakışma')):
+            with self.assertRaises(IntegrityError):
+                file_versions.rollback(v1, self.user)
+        self.assertEqual(self.versions(v1), [2, 1])
+        self.assertEqual(file_versions.rollback(v1, self.user).version, 3)
+
+
+class RollbackEndpointTests(FileVersionTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        role = AgencyRole.objects.create(agency=cls.agency, name='Owner')
+        AgencyMembership.objects.create(user=cls.user, agency=cls.agency, role=role, is_owner=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def rollback(self, file):
+        return self.client.post(f'/api/files/{file.pk}/rollback/', secure=True)
+
+    def test_rollback_endpoint(self):
+        v1 = self.first()
+        self.version(v1)
+
+        response = self.rollback(v1)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['file']['version'], 3)
+        self.assertEqual(response.data['message'], 'v1 geri yüklendi (v3)')
+
+    def test_rollback_over_quota_rejected(self):
+        v1 = self.first()
+        Agency.objects.filter(pk=self.agency.pk).update(max_storage_gb=1)
+        StorageUsage.objects.filter(agency=self.agency).update(total_bytes=GB)
+
+        response = self.rollback(v1)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.versions(v1), [1])
@@ -0,0 +1,102 @@
+import smtplib
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from api import tasks
+from api.services import mail
+
+
+class FakeConnection:
+    """failing: her zaman hata veren alıcılar, flaky: ilk denemede bir kez hata veren alıcılar"""
+
+    def __init__(self, failing=(), flaky=()):
+        self.failing = set(failing)
+        self.flaky = set(flaky)
+        self.sent = []
+
+    def send_messages(self, messages):
+        (message,) = messages
+        (to,) = message.to
+        if to in self.failing:
+            raise smtplib.SMTPServerDisconnected('bağlantı koptu')
+        if to in self.flaky:
+            self.flaky.discard(to)
+            raise OSError('zaman aşımı')
+        self.sent.append(to)
+        return 1
+
+
+@override_settings(EMAIL_MAX_RETRIES=2, EMAIL_RATE_LIMIT_DEFAULT=0, EMAIL_RATE_LIMITS={})
+class MailRetryTestCase(SimpleTestCase):
+    def setUp(self):
+        for patcher in (mock.patch.object(mail.time, 'sleep'), mock.patch.object(mail, 'close_connection')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def connect(self, **kwargs):
+        connection = FakeConnection(**kwargs)
+        patcher = mock.patch.object(mail, '_connection', return_value=connection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return connection
+
+    def messages(self, *recipients):
+        return [mail.build_message('Konu', 'Gövde', to) for to in recipients]
+
+
+class SendMessagesTests(MailRetryTestCase):
+    def test_transient_errors_retried_per_message(self):
+        connection = self.connect(flaky={'b@x.com'})
+        with self.assertLogs(mail.logger, 'WARNING'):
+            self.assertEqual(mail.send_messages(self.messages('a@x.com', 'b@x.com', 'c@x.com')), 3)
+        self.assertEqual(connection.sent, ['a@x.com', 'b@x.com', 'c@x.com'])
+
+    def test_unsent_are_failed_message_and_rest(self):
+        connection = self.connect(failing={'b@x.com'})
+        messages = self.messages('a@x.com', 'b@x.com', 'c@x.com')
+        with self.assertLogs(mail.logger, 'WARNING'), self.assertRaises(mail.MailDeliveryError) as raised:
+            mail.send_messages(messages)
+
+        self.assertEqual(connection.sent, ['a@x.com'])
+        self.assertEqual(raised.exception.unsent, messages[1:])
+        self.assertIsInstance(raised.exception.cause, smtplib.SMTPServerDisconnected)
+
+    def test_payload_roundtrip(self):
+        message = self.messages('a@x.com')[0]
+        rebuilt = mail.from_payload(mail.to_payload(message))
+        self.assertEqual((rebuilt.subject, rebuilt.body, rebuilt.to), (message.subject, message.body, message.to))
+
+
+class PartialDeliveryTests(MailRetryTestCase):
+    """Gönderilmiş mailler tekrar denemede ikinci kez gitmez"""
+
+    def test_deliver_hands_off_only_unsent(self):
+        self.connect(failing={'b@x.com'})
+        with mock.patch.object(tasks.send_email_messages, 'apply_async') as apply_async, \
+                mock.patch.object(tasks, '_mail_backoff', side_effect=lambda n: n * 10 + 5), \
+                self.assertLogs(tasks.logger, 'WARNING'), self.assertLogs(mail.logger, 'WARNING'):
+            sent = tasks._deliver(self.messages('a@x.com', 'b@x.com', 'c@x.com'))
+
+        self.assertEqual(sent, 1)
+        (payloads,) = apply_async.call_args.kwargs['args']
+        self.assertEqual(apply_async.call_args.kwargs['countdown'], 5)
+        self.assertEqual([p[2] for p in payloads], [['b@x.com'], ['c@x.com']])
+
+    def test_send_email_messages_retries_with_still_unsent(self):
+        connection = self.connect(failing={'c@x.com'})
+        payloads = [mail.to_payload(m) for m in self.messages('b@x.com', 'c@x.com')]
+        task = tasks.send_email_messages
+        task.push_request(retries=2)
+        self.addCleanup(task.pop_request)
+
+        with mock.patch.object(task, 'retry', side_effect=RuntimeError('retry')) as retry, \
+                mock.patch.object(tasks, '_mail_backoff', side_effect=lambda n: n * 10), \
+                self.assertLogs(mail.logger, 'WARNING'):
+            with self.assertRaisesMessage(RuntimeError, 'retry'):
+                task.run(payloads)
+
+        self.assertEqual(connection.sent, ['b@x.com'])
+        kwargs = retry.call_args.kwargs
+        self.assertEqual(kwargs['args'], ([payloads[1]],))
+        self.assertEqual(kwargs['countdown'], 30)
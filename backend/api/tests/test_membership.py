@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Agency, AgencyMembership, AgencyRole, User
+from api.services import membership, versions
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PermissionVersionTests(TestCase):
+    """Yetki claim'leri ve cache kayıtları ajansın kalıcı yetki versiyonuyla geçersizleşir"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.agency = Agency.objects.create(name='A', slug='a', plan='enterprise')
+        cls.role = AgencyRole.objects.create(agency=cls.agency, name='Crew', can_manage_equipment=True)
+        cls.user = User.objects.create_user(username='u', email='u@x.com', password='p', current_agency=cls.agency)
+        AgencyMembership.objects.create(user=cls.user, agency=cls.agency, role=cls.role)
+
+    def setUp(self):
+        cache.clear()
+
+    def claims(self):
+        return membership.get_permissions(self.user.pk, self.agency.pk)
+
+    def demote(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.role.can_manage_equipment = False
+            self.role.save()
+
+    def test_current_claims_trusted_without_database(self):
+        claims = self.claims()
+        self.assertEqual(claims['perms'], ['can_manage_equipment'])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIs(membership.get_permissions(self.user.pk, self.agency.pk, claims), claims)
+        self.assertEqual(len(queries), 0)
+
+    def test_role_change_invalidates_claims(self):
+        claims = self.claims()
+        self.demote()
+        resolved = membership.get_permissions(self.user.pk, self.agency.pk, claims)
+        self.assertEqual(resolved['perms'], [])
+        self.assertGreater(resolved[membership.VERSION_CLAIM], claims[membership.VERSION_CLAIM])
+
+    def test_old_claims_rejected_after_cache_reset(self):
+        claims = self.claims()
+        self.demote()
+        # Redis sıfırlanır: versiyon DB'den okunur, 0'dan başlamaz
+        cache.clear()
+        self.assertEqual(membership.get_permissions(self.user.pk, self.agency.pk, claims)['perms'], [])
+
+    def test_version_never_goes_back(self):
+        self.demote()
+        version = versions.current(self.agency.pk, versions.PERMISSIONS)
+        self.assertGreater(version, 0)
+
+        # Agency.save() sayaca dokunmaz (eski değeri geri yazamaz)
+        Agency.objects.get(pk=self.agency.pk).save()
+        cache.clear()
+        self.assertEqual(self.claims()[membership.VERSION_CLAIM], version)
+
+    def test_membership_removal_revokes(self):
+        claims = self.claims()
+        with self.captureOnCommitCallbacks(execute=True):
+            AgencyMembership.objects.filter(user=self.user).delete()
+        self.assertIsNone(membership.get_permissions(self.user.pk, self.agency.pk, claims))
@@ -0,0 +1,152 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api.models import Agency, NotificationOutbox, User
+from api.services import notification
+from api.services.notification import NotificationService
+
+
+class NotificationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agency = Agency.objects.create(name='A', slug='a', plan='enterprise')
+        cls.users = [
+            User.objects.create_user(username=f'u{i}', email=f'u{i}@x.com', password='p', current_agency=cls.agency)
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        self.now = timezone.now()
+        patcher = mock.patch.object(NotificationService, 'push', return_value=0)
+        self.push = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def at(self, moment):
+        return mock.patch.object(notification.timezone, 'now', return_value=moment)
+
+    def relay(self, moment):
+        with self.at(moment):
+            return NotificationService.relay()
+
+
+@override_settings(NOTIFICATION_COALESCE_WINDOW=5)
+class CoalesceWindowTests(NotificationTestCase):
+    def assign(self, moment, user=None):
+        with self.at(moment):
+            return NotificationService.send_many(
+                [user or self.users[0]], self.agency, 'info', 'Yeni Görev', 'x', coalesce_key='task_assigned'
+            )
+
+    def test_burst_shares_deliver_after(self):
+        deadline = notification._coalesce_deadline(self.now, self.users[0].pk, 'task_assigned', 5)
+        self.assertTrue(self.now < deadline <= self.now + timedelta(seconds=5))
+
+        # Pencere içinde farklı anlarda gelen mesajlar aynı vadeyi alır
+        start = deadline - timedelta(seconds=4.5)
+        for offset in (0, 1.2, 3.7, 4.4):
+            self.assign(start + timedelta(seconds=offset))
+        self.assertEqual(set(NotificationOutbox.objects.values_list('deliver_after', flat=True)), {deadline})
+
+        # Sonraki pencere ayrı
+        self.assign(deadline + timedelta(seconds=0.1))
+        self.assertEqual(NotificationOutbox.objects.filter(deliver_after__gt=deadline).count(), 1)
+
+    def test_relay_sends_one_summary_per_window(self):
+        deadline = notification._coalesce_deadline(self.now, self.users[0].pk, 'task_assigned', 5)
+        for offset in (4.9, 3, 0.5):
+            self.assign(deadline - timedelta(seconds=offset))
+
+        self.assertEqual(self.relay(deadline - timedelta(seconds=0.1))['delivered'], 0)
+        self.assertEqual(self.relay(deadline)['delivered'], 3)
+
+        (messages,), _ = self.push.call_args
+        self.assertEqual(len(messages), 1)
+        user_id, payload = messages[0]
+        self.assertEqual(user_id, self.users[0].pk)
+        self.assertEqual(payload['count'], 3)
+        self.assertEqual(payload['message'], '3 yeni görev size atandı.')
+
+    def test_windows_are_per_recipient(self):
+        with self.at(self.now):
+            NotificationService.send_many(self.users, self.agency, 'info', 'Yeni Görev', 'x', coalesce_key='task_assigned')
+        for user in self.users:
+            deadline = notification._coalesce_deadline(self.now, user.pk, 'task_assigned', 5)
+            self.assertTrue(self.now < deadline <= self.now + timedelta(seconds=5))
+            self.assertEqual(NotificationOutbox.objects.get(recipient=user).deliver_after, deadline)
+
+    def test_uncoalesced_messages_due_immediately(self):
+        with self.at(self.now):
+            NotificationService.send_many([self.users[1]], self.agency, 'info', 'Bilgi', 'x')
+        self.assertEqual(NotificationOutbox.objects.get().deliver_after, self.now)
+
+
+@override_settings(NOTIFICATION_RELAY_LEASE=60, NOTIFICATION_RELAY_MAX_ATTEMPTS=3)
+class OutboxRelayTests(NotificationTestCase):
+    def enqueue(self, user, attempts=0):
+        row = NotificationService.enqueue([(user.pk, {'id': str(user.pk), 'title': 'x'})])[0]
+        NotificationOutbox.objects.filter(pk=row.pk).update(deliver_after=self.now, attempts=attempts)
+        return row
+
+    def test_rows_leased_before_push(self):
+        row = self.enqueue(self.users[0])
+
+        def push(messages):
+            # İletim sırasında satır kiralı: paralel relay onu almaz
+            leased = NotificationOutbox.objects.get(pk=row.pk)
+            self.assertEqual(leased.deliver_after, self.now + timedelta(seconds=60))
+            with self.at(self.now + timedelta(seconds=1)):
+                self.assertEqual(NotificationService.relay()['delivered'], 0)
+            return len(messages)
+
+        self.push.side_effect = push
+        result = self.relay(self.now)
+        self.assertEqual(result['delivered'], 1)
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+    def test_crashed_relay_redelivers_after_lease(self):
+        self.enqueue(self.users[0])
+        self.push.side_effect = KeyboardInterrupt  # Worker öldü: ne silindi ne backoff yazıldı
+        with self.assertRaises(KeyboardInterrupt):
+            self.relay(self.now)
+        self.push.side_effect = None
+
+        self.assertEqual(self.relay(self.now + timedelta(seconds=59))['delivered'], 0)
+        self.assertEqual(self.relay(self.now + timedelta(seconds=60))['delivered'], 1)
+
+    def test_failed_rows_back_off_per_attempt(self):
+        fresh = self.enqueue(self.users[0])
+        retried = self.enqueue(self.users[1], attempts=1)
+        self.push.side_effect = ConnectionError('redis yok')
+
+        failed_at = self.now + timedelta(seconds=2)
+        with mock.patch.object(notification.timezone, 'now', side_effect=[self.now, failed_at]):
+            with self.assertLogs(notification.logger, 'WARNING'):
+                self.assertEqual(NotificationService.relay()['failed'], 2)
+
+        fresh.refresh_from_db()
+        retried.refresh_from_db()
+        self.assertEqual((fresh.attempts, fresh.deliver_after), (1, failed_at + timedelta(seconds=2)))
+        self.assertEqual((retried.attempts, retried.deliver_after), (2, failed_at + timedelta(seconds=4)))
+
+    def test_rows_dropped_after_max_attempts(self):
+        self.enqueue(self.users[0], attempts=2)
+        kept = self.enqueue(self.users[1], attempts=1)
+        self.push.side_effect = ConnectionError('redis yok')
+
+        with self.assertLogs(notification.logger, 'WARNING'):
+            self.relay(self.now)
+        self.assertEqual(list(NotificationOutbox.objects.values_list('pk', flat=True)), [kept.pk])
+
+    def test_backoff_capped(self):
+        row = self.enqueue(self.users[0], attempts=50)
+        self.push.side_effect = ConnectionError('redis yok')
+
+        with override_settings(NOTIFICATION_RELAY_MAX_ATTEMPTS=100):
+            with mock.patch.object(notification.timezone, 'now', side_effect=[self.now, self.now]):
+                with self.assertLogs(notification.logger, 'WARNING'):
+                    NotificationService.relay()
+        row.refresh_from_db()
+        self.assertEqual(row.deliver_after, self.now + timedelta(seconds=notification.RELAY_MAX_BACKOFF))
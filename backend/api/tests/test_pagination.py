@@ -0,0 +1,178 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.db.models import F
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.models import Agency, Client, Project, Task
+from api.pagination import KeysetPagination, encode_cursor
+
+
+class _View:
+    keyset_ordering = ('-created_at',)
+    keyset_ordering_fields = ('created_at',)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agency = Agency.objects.create(name='A', slug='a', plan='enterprise')
+        clients = [Client(agency=cls.agency, name=f'Client {i}') for i in range(23)]
+        Client.objects.bulk_create(clients)
+
+        # Üç gruba aynı created_at: sayfa sınırları eşit değerlerin ortasına düşer
+        now = timezone.now().replace(microsecond=0)
+        for index, client in enumerate(clients):
+            client.created_at = now - timedelta(minutes=index % 3)
+        Client.objects.bulk_update(clients, ['created_at'])
+
+    def paginate(self, params):
+        request = Request(APIRequestFactory().get('/clients/', dict(params, pagination='cursor')))
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(Client.objects.all(), request, _View())
+        return page, paginator
+
+    def walk(self, **params):
+        """Tüm sayfaları cursor ile gezer, sıradaki id'leri döner"""
+        ids = []
+        cursor = None
+        for _ in range(50):
+            query = dict(params, **({'cursor': cursor} if cursor else {}))
+            page, paginator = self.paginate(query)
+            ids.extend(client.pk for client in page)
+            cursor = paginator.next_cursor
+            if cursor is None:
+                return ids
+        self.fail('Sayfalama bitmedi')
+
+    def test_equal_created_at_not_skipped_or_repeated(self):
+        for page_size in (1, 2, 4, 5, 7, 23, 50):
+            with self.subTest(page_size=page_size):
+                ids = self.walk(page_size=page_size)
+                expected = list(Client.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+                self.assertEqual(ids, expected)
+
+    def test_ascending_ordering(self):
+        ids = self.walk(page_size=4, ordering='created_at')
+        expected = list(Client.objects.order_by('created_at', 'id').values_list('pk', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_cursor_stable_when_rows_inserted(self):
+        page, paginator = self.paginate({'page_size': 5})
+        seen = [client.pk for client in page]
+
+        # İlk sayfa okunduktan sonra eklenen kayıt sonraki sayfaları kaydırmaz
+        Client.objects.create(agency=self.agency, name='New')
+        rest = []
+        cursor = paginator.next_cursor
+        while cursor:
+            page, paginator = self.paginate({'page_size': 5, 'cursor': cursor})
+            rest.extend(client.pk for client in page)
+            cursor = paginator.next_cursor
+
+        expected = list(
+            Client.objects.exclude(name='New').order_by('-created_at', '-id').values_list('pk', flat=True)
+        )
+        self.assertEqual(seen + rest, expected)
+
+    def test_last_page_has_no_cursor(self):
+        page, paginator = self.paginate({'page_size': 23})
+        self.assertEqual(len(page), 23)
+        self.assertIsNone(paginator.next_cursor)
+        self.assertIsNone(paginator.get_next_link())
+
+    def test_tampered_cursors_rejected(self):
+        def raw(data):
+            return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+        page, paginator = self.paginate({'page_size': 5})
+        valid = paginator.next_cursor
+        tampered = [
+            'not-a-cursor',
+            '%%%',
+            valid[:-3],
+            raw('{"created_at": 1}'),
+            raw(json.dumps(['2026-01-01T00:00:00+00:00'])),  # id eksik
+            raw(json.dumps(['2026-01-01T00:00:00+00:00', 'x', 'y'])),
+            raw(json.dumps(['dün', str(page[-1].pk)])),
+            raw(json.dumps(['2026-01-01T00:00:00+00:00', 'not-a-uuid'])),
+            raw(json.dumps([None, None])),
+        ]
+        for cursor in tampered:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(NotFound):
+                    self.paginate({'cursor': cursor})
+
+    def test_cursor_is_opaque_roundtrip(self):
+        page, paginator = self.paginate({'page_size': 3})
+        last = page[-1]
+        self.assertEqual(paginator.next_cursor, encode_cursor([last.created_at, last.pk]))
+
+    def test_page_number_by_default(self):
+        request = Request(APIRequestFactory().get('/clients/', {'page': 2, 'page_size': 10}))
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(Client.objects.all(), request, _View())
+        data = paginator.get_paginated_response([client.pk for client in page]).data
+
+        expected = list(Client.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+        self.assertEqual(data['count'], 23)
+        self.assertIsNotNone(data['previous'])
+        self.assertIsNotNone(data['next'])
+        self.assertEqual(data['results'], expected[10:20])
+
+
+class _TaskView:
+    keyset_ordering = ('-created_at',)
+    keyset_ordering_fields = ('created_at', 'due_date')
+
+
+class NullableOrderingTests(TestCase):
+    """due_date boş olabilir: boşlar her iki yönde sona, sayfa sınırında kaybolmaz"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.agency = Agency.objects.create(name='A', slug='a', plan='enterprise')
+        project = Project.objects.create(agency=cls.agency, title='Klip')
+        day = timezone.now().replace(microsecond=0)
+        Task.objects.bulk_create([
+            Task(
+                agency=cls.agency, project=project, title=f'Task {i}',
+                due_date=None if i % 3 == 0 else day + timedelta(days=i % 4)
+            )
+            for i in range(17)
+        ])
+
+    def walk(self, **params):
+        ids = []
+        cursor = None
+        for _ in range(50):
+            query = dict(params, pagination='cursor', **({'cursor': cursor} if cursor else {}))
+            request = Request(APIRequestFactory().get('/tasks/', query))
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(Task.objects.all(), request, _TaskView())
+            ids.extend(task.pk for task in page)
+            cursor = paginator.next_cursor
+            if cursor is None:
+                return ids
+        self.fail('Sayfalama bitmedi')
+
+    def test_due_date_ordering(self):
+        for ordering, expected in (
+            ('due_date', [F('due_date').asc(nulls_last=True), 'id']),
+            ('-due_date', [F('due_date').desc(nulls_last=True), '-id']),
+        ):
+            for page_size in (1, 2, 4, 5, 17):
+                with self.subTest(ordering=ordering, page_size=page_size):
+                    ids = self.walk(page_size=page_size, ordering=ordering)
+                    self.assertEqual(ids, list(Task.objects.order_by(*expected).values_list('pk', flat=True)))
+
+    def test_null_cursor_rejected_for_not_null_field(self):
+        cursor = encode_cursor([None, None])
+        request = Request(APIRequestFactory().get('/tasks/', {'cursor': cursor, 'ordering': 'due_date'}))
+        with self.assertRaises(NotFound):
+            KeysetPagination().paginate_queryset(Task.objects.all(), request, _TaskView())
@@ -0,0 +1,67 @@
+import datetime
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import Agency, AuditLog
+from apps.core import partitioning
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Partitioning sadece PostgreSQL')
+class PartitionTests(TestCase):
+    table = AuditLog._meta.db_table
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.agency = Agency.objects.create(name='A', slug='a', plan='enterprise')
+
+    def partition_of(self, cursor, pk):
+        cursor.execute(f'SELECT tableoid::regclass::text FROM "{self.table}" WHERE id = %s', [pk])
+        return cursor.fetchone()[0].strip('"')
+
+    def log_at(self, month, day=15):
+        created_at = datetime.datetime.combine(month.replace(day=day), datetime.time(12), tzinfo=datetime.timezone.utc)
+        return AuditLog.objects.create(agency=self.agency, action='other', description='x', created_at=created_at)
+
+    def test_table_converted(self):
+        with connection.cursor() as cursor:
+            self.assertTrue(partitioning.is_partitioned(cursor, self.table))
+            self.assertTrue(partitioning.has_default_partition(cursor, self.table))
+            current = partitioning.month_start(timezone.now())
+            self.assertIn(current, partitioning.list_partitions(cursor, self.table))
+
+    def test_rows_move_out_of_default_when_month_created(self):
+        # Partition'ı açılmamış uzak bir ay: insert hata vermez, DEFAULT'a düşer
+        month = partitioning.add_months(partitioning.month_start(timezone.now()), 24)
+        inside = self.log_at(month)
+        next_month = self.log_at(partitioning.add_months(month, 1), day=1)
+
+        with connection.cursor() as cursor:
+            default = partitioning.default_partition_name(self.table)
+            self.assertEqual(self.partition_of(cursor, inside.pk), default)
+
+            name = partitioning.create_partition(cursor, self.table, month)
+
+            self.assertEqual(self.partition_of(cursor, inside.pk), name)
+            # Ay dışındaki kayıt DEFAULT'ta kalır
+            self.assertEqual(self.partition_of(cursor, next_month.pk), default)
+            self.assertTrue(partitioning.has_default_partition(cursor, self.table))
+
+        self.assertEqual(AuditLog.objects.filter(pk__in=[inside.pk, next_month.pk]).count(), 2)
+
+    def test_expired_rows_deleted_from_default(self):
+        month = partitioning.add_months(partitioning.month_start(timezone.now()), -60)
+        with connection.cursor() as cursor:
+            existing = partitioning.list_partitions(cursor, self.table)
+        if month in existing:
+            self.skipTest('Eski ayın partition\'ı var')
+        old = self.log_at(month)
+        recent = self.log_at(partitioning.month_start(timezone.now()))
+
+        with connection.cursor() as cursor:
+            partitioning.drop_partitions_before(cursor, self.table, partitioning.add_months(month, 1))
+
+        self.assertFalse(AuditLog.objects.filter(pk=old.pk).exists())
+        self.assertTrue(AuditLog.objects.filter(pk=recent.pk).exists())
@@ -0,0 +1,129 @@
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import (
+    Agency, AgencyMembership, AgencyRole, File, FileUpload, Project, StorageReservation, StorageUsage, User
+)
+from api.services import storage_usage
+from api.services.storage_usage import GB, QuotaExceededError
+
+FREE = 100  # 1 GB kotanın boş kalan byte'ı
+
+
+class QuotaTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agency = Agency.objects.create(name='A', slug='a', plan='enterprise', max_storage_gb=1)
+        cls.user = User.objects.create_user(username='u', email='u@x.com', password='p', current_agency=cls.agency)
+        cls.project = Project.objects.create(agency=cls.agency, title='Klip', created_by=cls.user)
+        StorageUsage.objects.create(agency=cls.agency, file_type='video', total_bytes=GB - FREE, file_count=1)
+
+    def check(self, size):
+        with transaction.atomic():
+            storage_usage.check_quota(self.agency, size)
+
+
+class ReservationTests(QuotaTestCase):
+    """Tek istekli yükleme: kilit kısa, rezervasyon iş bitene kadar kotadan düşer"""
+
+    def test_held_reservation_counts_against_quota(self):
+        with storage_usage.reservation(self.agency, 60) as held:
+            self.assertEqual(held.size, 60)
+            self.assertEqual(storage_usage.reserved_bytes(self.agency.pk), 60)
+            # Paralel yükleme kalan 40 byte'tan fazlasını alamaz
+            self.check(40)
+            with self.assertRaises(QuotaExceededError):
+                self.check(41)
+
+        self.assertFalse(StorageReservation.objects.exists())
+        self.check(FREE)
+
+    def test_reservation_released_on_error(self):
+        with self.assertRaises(ValueError):
+            with storage_usage.reservation(self.agency, 60):
+                raise ValueError('hash hatası')
+        self.assertFalse(StorageReservation.objects.exists())
+
+    def test_over_quota_reserves_nothing(self):
+        with self.assertRaisesMessage(QuotaExceededError, 'Depolama kotası yetersiz'):
+            with storage_usage.reservation(self.agency, FREE + 1):
+                self.fail('blok çalışmamalı')
+        self.assertFalse(StorageReservation.objects.exists())
+
+    def test_unlimited_agency_holds_no_row(self):
+        self.agency.max_storage_gb = None  # enterprise: sınırsız
+        with storage_usage.reservation(self.agency, 10 * GB) as held:
+            self.assertIsNone(held)
+            self.assertFalse(StorageReservation.objects.exists())
+
+    def test_expired_reservation_ignored_and_purged(self):
+        now = timezone.now()
+        StorageReservation.objects.create(agency=self.agency, size=FREE, expires_at=now - timedelta(seconds=1))
+        live = StorageReservation.objects.create(agency=self.agency, size=10, expires_at=now + timedelta(minutes=5))
+
+        self.assertEqual(storage_usage.reserved_bytes(self.agency.pk), 10)
+        self.check(FREE - 10)
+
+        storage_usage.reconcile()
+        self.assertEqual(list(StorageReservation.objects.values_list('pk', flat=True)), [live.pk])
+
+    def test_unfinished_multipart_uploads_count(self):
+        def upload(status, size):
+            FileUpload.objects.create(
+                agency=self.agency, project=self.project, original_name='r.mov', total_size=size, part_size=8,
+                storage_key='k', storage_upload_id='u', status=status, expires_at=timezone.now() + timedelta(days=1)
+            )
+
+        upload('uploading', 30)
+        upload('completing', 20)
+        upload('completed', 1000)
+        upload('aborted', 1000)
+        self.assertEqual(storage_usage.reserved_bytes(self.agency.pk), 50)
+        with self.assertRaises(QuotaExceededError):
+            self.check(51)
+
+
+class FileCreateQuotaTests(QuotaTestCase):
+    """POST /files/: kota rezervasyonu hash'lemeden ve depolamaya yazmadan önce"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        role = AgencyRole.objects.create(agency=cls.agency, name='Owner')
+        AgencyMembership.objects.create(user=cls.user, agency=cls.agency, role=role, is_owner=True)
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, size):
+        body = {'project': str(self.project.id), 'file': SimpleUploadedFile('a.png', b'x' * size, 'image/png')}
+        return self.client.post('/api/files/', body, secure=True)
+
+    def test_over_quota_rejected_before_save(self):
+        response = self.upload(FREE + 1)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('kota', response.data['error'])
+        self.assertFalse(File.objects.exists())
+        self.assertFalse(StorageReservation.objects.exists())
+
+    def test_saved_file_replaces_reservation(self):
+        response = self.upload(FREE)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertFalse(StorageReservation.objects.exists())
+        self.assertEqual(storage_usage.used_bytes(self.agency.pk), GB)
+
+        # Kota doldu
+        self.assertEqual(self.upload(1).status_code, 400)
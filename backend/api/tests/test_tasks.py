@@ -0,0 +1,134 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from api import tasks
+from api.services import mail
+from api.models import Agency, Notification, NotificationOutbox, Project, Task, User
+from api.services.notification import NotificationService, decode_cursor
+
+
+class OverdueTaskTests(TestCase):
+    """check_overdue_tasks: dedup, sadece yazılan bildirimler, özetin resume cursor'ı"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.agency = Agency.objects.create(name='A', slug='a', plan='enterprise')
+        cls.users = [
+            User.objects.create_user(username=f'u{i}', email=f'u{i}@x.com', password='p', current_agency=cls.agency)
+            for i in range(2)
+        ]
+        project = Project.objects.create(agency=cls.agency, title='Klip')
+        due = timezone.now() - timedelta(days=2)
+        cls.tasks = [
+            Task.objects.create(agency=cls.agency, project=project, title=f'Görev {i}', due_date=due)
+            for i in range(3)
+        ]
+        for task in cls.tasks:
+            task.assigned_to.set(cls.users)
+        Task.objects.create(agency=cls.agency, project=project, title='Bitti', due_date=due, status='done')
+
+    def setUp(self):
+        # Görev atama bildirimleri (sinyaller) sayılmasın
+        Notification.objects.all().delete()
+        NotificationOutbox.objects.all().delete()
+
+    def summaries(self):
+        return {row.recipient_id: row.payload for row in NotificationOutbox.objects.all()}
+
+    def test_second_run_sends_nothing(self):
+        self.assertEqual(tasks.check_overdue_tasks(), 'Overdue notifications sent: 6')
+        NotificationOutbox.objects.all().delete()
+
+        self.assertEqual(tasks.check_overdue_tasks(), 'Overdue notifications sent: 0')
+        self.assertEqual(Notification.objects.count(), 6)
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+    def test_due_date_change_notifies_again(self):
+        tasks.check_overdue_tasks()
+        Task.objects.filter(pk=self.tasks[0].pk).update(due_date=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(tasks.check_overdue_tasks(), 'Overdue notifications sent: 2')
+
+    def test_earlier_month_notification_not_repeated(self):
+        # Geçen ayın partition'ındaki kayıt da görülür (unique index orayı kapsamaz)
+        task = self.tasks[0]
+        key = f'overdue:{task.pk}:{task.status}:{task.due_date.isoformat()}'
+        old = Notification.objects.create(
+            recipient=self.users[0], agency=self.agency, title='Görev Gecikti!', message='x', dedup_key=key
+        )
+        Notification.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=40))
+
+        self.assertEqual(tasks.check_overdue_tasks(), 'Overdue notifications sent: 5')
+        self.assertEqual(self.summaries()[self.users[0].pk]['count'], 2)
+
+    def test_skipped_conflicts_not_counted(self):
+        create = Notification.objects.bulk_create
+
+        def bulk_create(objs, **kwargs):
+            # Paralel yazıcının eklediği kayıt: ignore_conflicts bu satırı atlar
+            skipped = next(n for n in objs if n.recipient_id == self.users[0].pk)
+            return create([n for n in objs if n is not skipped], **kwargs)
+
+        with mock.patch.object(Notification.objects, 'bulk_create', side_effect=bulk_create):
+            self.assertEqual(tasks.check_overdue_tasks(), 'Overdue notifications sent: 5')
+
+        summaries = self.summaries()
+        self.assertEqual(summaries[self.users[0].pk]['count'], 2)
+        self.assertEqual(summaries[self.users[0].pk]['message'], '2 göreviniz gecikmiş durumda.')
+        self.assertEqual(summaries[self.users[1].pk]['count'], 3)
+
+    def test_summary_resumes_after_latest_notification(self):
+        tasks.check_overdue_tasks()
+        user = self.users[0]
+        payload = self.summaries()[user.pk]
+
+        latest = Notification.objects.filter(recipient=user).order_by('created_at', 'id').last()
+        self.assertEqual(payload['id'], str(latest.pk))
+        self.assertEqual(decode_cursor(payload['cursor']), (latest.created_at, latest.pk))
+
+        # Özetten sonra yeniden bağlanan istemci özetteki bildirimleri tekrar almaz
+        missed, has_more = NotificationService.missed_since(user.pk, payload['cursor'], 50)
+        self.assertEqual((missed, has_more), ([], False))
+        newer = NotificationService.send(user, self.agency, 'info', 'Yeni', 'x')
+        missed, _ = NotificationService.missed_since(user.pk, payload['cursor'], 50)
+        self.assertEqual([m['id'] for m in missed], [str(newer.pk)])
+
+
+class AgencyDigestRetryTests(TestCase):
+    """Kısmi gönderimde tekrar deneme sadece maili gitmeyen owner'lara, artan beklemeyle"""
+    stats = {'tasks_today': 1, 'shootings_today': 0, 'pending_approvals': 2}
+    recipients = [('a@x.com', 'A'), ('b@x.com', 'B'), ('c@x.com', 'C')]
+
+    def run_digest(self, retries, fail_from):
+        def send_messages(messages):
+            raise mail.MailDeliveryError(messages[fail_from:], OSError('smtp gitti'))
+
+        task = tasks.send_agency_digest
+        task.push_request(retries=retries)
+        self.addCleanup(task.pop_request)
+        with mock.patch.object(mail, 'send_messages', side_effect=send_messages), \
+                mock.patch.object(tasks, '_mail_backoff', side_effect=lambda n: n * 10), \
+                mock.patch.object(task, 'retry', side_effect=RuntimeError('retry')) as retry:
+            with self.assertRaisesMessage(RuntimeError, 'retry'):
+                task.run('Ajans', self.stats, [list(r) for r in self.recipients])
+        return retry.call_args.kwargs
+
+    def test_retry_only_unsent_recipients(self):
+        retry = self.run_digest(retries=0, fail_from=1)
+        self.assertEqual(retry['kwargs']['recipients'], [['b@x.com', 'B'], ['c@x.com', 'C']])
+        self.assertEqual(retry['kwargs']['stats'], self.stats)
+        self.assertEqual(retry['max_retries'], tasks.MAIL_TASK_OPTIONS['retry_kwargs']['max_retries'])
+
+    def test_backoff_grows_from_first_retry(self):
+        # İlk tekrar da beklemeli (retries=0 -> 1. deneme aralığı), sonraki daha uzun
+        self.assertEqual(self.run_digest(retries=0, fail_from=2)['countdown'], 10)
+        self.assertEqual(self.run_digest(retries=3, fail_from=2)['countdown'], 40)
+
+    def test_all_sent(self):
+        with mock.patch.object(mail, 'send_messages', return_value=3) as send:
+            result = tasks.send_agency_digest.run('Ajans', self.stats, self.recipients)
+        self.assertEqual(result, 'Daily digest emails sent: 3')
+        self.assertEqual([m.to for m in send.call_args.args[0]], [[r[0]] for r in self.recipients])
@@ -0,0 +1,251 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+
+from api.models import Agency, File, FileUpload, Project, StorageReservation, User
+from api.services import storage_service, uploads
+from api.services.storage_service import LocalBackend, StorageError
+
+PART_SIZE = 8
+
+
+class UploadTestCase(TestCase):
+    """Yerel disk backend'i (geçici MEDIA_ROOT), 8 byte'lık parçalar"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.agency = Agency.objects.create(name='A', slug='a', plan='enterprise', max_storage_gb=1)
+        cls.user = User.objects.create_user(username='u', email='u@x.com', password='p', current_agency=cls.agency)
+        cls.project = Project.objects.create(agency=cls.agency, title='Klip', created_by=cls.user)
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.backend = LocalBackend(self.root)
+        settings = override_settings(UPLOAD_PART_SIZE=PART_SIZE, MEDIA_ROOT=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        for patcher in (
+            mock.patch.object(storage_service.backend, '_wrapped', self.backend),
+            mock.patch.object(uploads, 'MIN_PART_SIZE', PART_SIZE),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Hash task'ı kuyruğa gider (broker yok)
+        patcher = mock.patch('api.tasks.hash_file.delay')
+        self.hash_delay = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def start(self, content, **kwargs):
+        return uploads.start(self.agency, self.user, self.project, 'rush.mov', len(content), **kwargs)
+
+    def put_part(self, upload, number, content):
+        data = content[(number - 1) * PART_SIZE:number * PART_SIZE]
+        stream = tempfile.SpooledTemporaryFile()
+        stream.write(data)
+        stream.seek(0)
+        return uploads.receive_part(upload, number, stream, len(data))
+
+    def read_object(self, key):
+        with self.backend.open(key) as stored:
+            return stored.read()
+
+
+class UploadCompletionTests(UploadTestCase):
+    content = b'0123456789abcdefXYZ'  # 3 parça: 8 + 8 + 3
+
+    def uploaded(self):
+        upload = self.start(self.content)
+        for number in (1, 2, 3):
+            upload = self.put_part(upload, number, self.content)
+        return upload
+
+    def test_start_opens_multipart_outside_quota_lock(self):
+        depth = len(connection.atomic_blocks)
+        create = self.backend.create_multipart
+
+        def create_multipart(*args, **kwargs):
+            # Kota kontrolünün transaction'ı (ajans satırı kilidi) kapanmış olmalı
+            self.assertEqual(len(connection.atomic_blocks), depth)
+            self.assertTrue(StorageReservation.objects.filter(agency=self.agency).exists())
+            return create(*args, **kwargs)
+
+        with mock.patch.object(self.backend, 'create_multipart', side_effect=create_multipart):
+            upload = self.start(self.content)
+        self.assertEqual(upload.status, 'uploading')
+        # Geçici rezervasyon silinir, yeri 'uploading' satırı tutar
+        self.assertFalse(StorageReservation.objects.exists())
+
+    def test_storage_completion_outside_transaction(self):
+        upload = self.uploaded()
+        depth = len(connection.atomic_blocks)
+        complete = self.backend.complete_multipart
+
+        def complete_multipart(*args):
+            self.assertEqual(len(connection.atomic_blocks), depth)
+            self.assertEqual(FileUpload.objects.get(pk=upload.pk).status, 'completing')
+            return complete(*args)
+
+        with mock.patch.object(self.backend, 'complete_multipart', side_effect=complete_multipart):
+            with self.captureOnCommitCallbacks(execute=True):
+                upload = uploads.complete(upload)
+
+        self.assertEqual(upload.status, 'completed')
+        self.assertEqual(upload.file.file_size, len(self.content))
+        self.assertEqual(self.read_object(upload.storage_key), self.content)
+        # İçerik istekte değil, task'ta hash'lenir
+        self.assertIsNone(upload.file.blob_id)
+        self.hash_delay.assert_called_once_with(upload.file.id)
+
+    def test_completing_upload_rejects_parts(self):
+        upload = self.uploaded()
+        FileUpload.objects.filter(pk=upload.pk).update(status='completing')
+        with self.assertRaises(uploads.UploadError):
+            self.put_part(FileUpload.objects.get(pk=upload.pk), 1, self.content)
+
+    def test_retry_after_file_create_fails(self):
+        upload = self.uploaded()
+        with mock.patch.object(uploads, '_create_file', side_effect=DatabaseError('db gitti')):
+            with self.assertRaises(DatabaseError):
+                uploads.complete(upload)
+
+        # Depolamada birleşti, multipart id tüketildi; yükleme 'completing'de kalır
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, 'completing')
+        self.assertEqual(self.read_object(upload.storage_key), self.content)
+        self.assertFalse(File.objects.exists())
+
+        upload = uploads.complete(upload)
+        self.assertEqual(upload.status, 'completed')
+        self.assertEqual(File.objects.get().pk, upload.file_id)
+        # Tekrar çağrı aynı File'ı döner
+        self.assertEqual(uploads.complete(upload).file_id, upload.file_id)
+
+    def test_storage_failure_reopens_upload(self):
+        upload = self.uploaded()
+        with mock.patch.object(self.backend, 'complete_multipart', side_effect=StorageError('parça bozuk')):
+            with self.assertRaises(StorageError):
+                uploads.complete(upload)
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, 'uploading')
+        # Parçalar yeniden gönderilebilir, ardından tamamlanır
+        upload = self.put_part(upload, 2, self.content)
+        self.assertEqual(uploads.complete(upload).status, 'completed')
+
+
+class LocalBackendRoundTripTests(UploadTestCase):
+    """Presigned akışın yerel karşılığı: imzalı token'lı parça URL'i + ETag onayı"""
+    content = b'presigned-multipart'  # 3 parça: 8 + 8 + 3
+
+    def presigned_put(self, url, data):
+        response = self.client.put(url, data, content_type='application/octet-stream')
+        self.assertEqual(response.status_code, 200, getattr(response, 'data', None))
+        return response['ETag']
+
+    def upload_presigned(self, upload, numbers):
+        urls = uploads.presign_parts(upload, numbers)
+        return {
+            n: self.presigned_put(urls[n], self.content[(n - 1) * PART_SIZE:n * PART_SIZE])
+            for n in numbers
+        }
+
+    def test_presigned_round_trip(self):
+        upload = self.start(self.content)
+        self.assertEqual(uploads.part_count(upload), 3)
+        self.assertEqual(uploads.missing_parts(upload), [1, 2, 3])
+
+        etags = self.upload_presigned(upload, [1, 2, 3])
+        upload = uploads.confirm_parts(upload, etags)
+        self.assertEqual(uploads.missing_parts(upload), [])
+        self.assertEqual(upload.received_bytes, len(self.content))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            upload = uploads.complete(upload)
+        self.assertEqual(upload.status, 'completed')
+        self.assertEqual(self.read_object(upload.storage_key), self.content)
+        self.assertEqual(upload.file.file_size, len(self.content))
+        # Parça dizini birleştirmeden sonra silinir
+        with self.assertRaises(StorageError):
+            self.backend.list_parts(upload.storage_key, upload.storage_upload_id)
+
+    def test_presigned_put_checks_size_and_token(self):
+        upload = self.start(self.content)
+        url = uploads.presign_parts(upload, [1])[1]
+
+        response = self.client.put(url, b'short', content_type='application/octet-stream')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.put(url[:-3] + 'xx/', b'x' * PART_SIZE, content_type='application/octet-stream')
+        self.assertEqual(response.status_code, 403)
+
+    def test_confirm_rejects_wrong_etag_and_unknown_part(self):
+        upload = self.start(self.content)
+        etags = self.upload_presigned(upload, [1])
+
+        with self.assertRaisesMessage(uploads.UploadError, 'ETag uyuşmuyor'):
+            uploads.confirm_parts(upload, {1: '"00000000000000000000000000000000"'})
+        with self.assertRaisesMessage(uploads.UploadError, 'bulunamadı'):
+            uploads.confirm_parts(upload, {2: etags[1]})
+        self.assertEqual(FileUpload.objects.get(pk=upload.pk).parts, {})
+
+        # Tırnaksız ETag da kabul edilir (istemciler header'ı farklı okur)
+        upload = uploads.confirm_parts(upload, {1: etags[1].strip('"')})
+        self.assertEqual(uploads.missing_parts(upload), [2, 3])
+
+    def test_complete_rejects_missing_parts(self):
+        upload = self.start(self.content)
+        upload = uploads.confirm_parts(upload, self.upload_presigned(upload, [1, 3]))
+
+        with self.assertRaisesMessage(uploads.UploadError, 'Eksik parçalar (1): 2'):
+            uploads.complete(upload)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, 'uploading')
+        self.assertFalse(File.objects.exists())
+
+        # Yüklenmiş ama onaylanmamış parça da eksik sayılır
+        self.upload_presigned(upload, [2])
+        with self.assertRaises(uploads.UploadError):
+            uploads.complete(upload)
+
+    def test_abort_removes_parts(self):
+        upload = self.start(self.content)
+        self.upload_presigned(upload, [1])
+
+        upload = uploads.abort(upload)
+        self.assertEqual(upload.status, 'aborted')
+        with self.assertRaises(StorageError):
+            self.backend.list_parts(upload.storage_key, upload.storage_upload_id)
+        with self.assertRaises(uploads.UploadError):
+            uploads.presign_parts(upload)
+        with self.assertRaises(uploads.UploadError):
+            uploads.abort(upload)
+
+    def test_abort_stale(self):
+        stale = self.start(self.content)
+        self.upload_presigned(stale, [1])
+        fresh = self.start(self.content)
+        FileUpload.objects.filter(pk=fresh.pk).update(expires_at=stale.expires_at + timedelta(hours=1))
+
+        self.assertEqual(uploads.abort_stale(stale.expires_at), 1)
+        self.assertEqual(FileUpload.objects.get(pk=fresh.pk).status, 'uploading')
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, 'aborted')
+        with self.assertRaises(StorageError):
+            self.backend.list_parts(stale.storage_key, stale.storage_upload_id)
+
+    def test_abort_stale_finishes_interrupted_completion(self):
+        upload = self.start(self.content)
+        upload = uploads.confirm_parts(upload, self.upload_presigned(upload, [1, 2, 3]))
+        with mock.patch.object(uploads, '_create_file', side_effect=DatabaseError('db gitti')):
+            with self.assertRaises(DatabaseError):
+                uploads.complete(upload)
+
+        # Object depolamada: iptal edilmez, File oluşturulur
+        self.assertEqual(uploads.abort_stale(upload.expires_at), 0)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, 'completed')
+        self.assertEqual(self.read_object(upload.file.file.name), self.content)
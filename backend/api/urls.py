@@ -4,13 +4,16 @@ from api.views.project import ProjectViewSet
 from api.views.task import TaskViewSet
 from api.views.equipment import EquipmentViewSet, ReservationViewSet, CategoryViewSet
 from api.views.client import ClientViewSet
+from api.views.tag import TagViewSet
 from api.views.location import LocationViewSet
 from api.views.file import FileViewSet
+from api.views.upload import FileUploadViewSet, StoragePartView
 from api.views.finance_schedule import ExpenseViewSet, ShootingDayViewSet, CallSheetViewSet
 from api.views.user import UserViewSet
 from api.views.transfer import TransferViewSet
 from api.views.notification import NotificationViewSet
 from api.views.dashboard import DashboardStatsView
+from api.views.search import GlobalSearchView
 from api.views.health import health_check
 from api.views import auth
 
@@ -28,8 +31,10 @@ router.register(r'transfers', TransferViewSet)
 router.register(r'projects', ProjectViewSet)
 router.register(r'tasks', TaskViewSet)
 router.register(r'clients', ClientViewSet)
+router.register(r'tags', TagViewSet)
 router.register(r'locations', LocationViewSet)
 router.register(r'files', FileViewSet)
+router.register(r'uploads', FileUploadViewSet)
 
 # Finance & Schedule
 router.register(r'expenses', ExpenseViewSet)
@@ -45,6 +50,8 @@ urlpatterns = [
     # System
     path('health/', health_check, name='health-check'),
     path('dashboard/stats/', DashboardStatsView.as_view(), name='dashboard-stats'),
+    path('search/', GlobalSearchView.as_view(), name='global-search'),
+    path('storage/parts/<str:token>/', StoragePartView.as_view(), name='storage-part'),
     
     # Authentication
     path('auth/register/', auth.register, name='auth-register'),
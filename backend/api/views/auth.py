@@ -2,10 +2,11 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from django.contrib.auth import authenticate
 from api.models import User, Agency, AgencyMembership, AgencyRole
 from api.serializers.user import UserSerializer
+from api.services import membership as membership_cache
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -83,9 +84,6 @@ def register(request):
         is_active=True
     )
     
-    # JWT token oluştur
-    refresh = RefreshToken.for_user(user)
-    
     return Response({
         'message': 'Kayıt başarılı',
         'user': UserSerializer(user).data,
@@ -95,10 +93,8 @@ def register(request):
             'slug': agency.slug,
             'plan': agency.plan
         },
-        'tokens': {
-            'refresh': str(refresh),
-            'access': str(refresh.access_token),
-        }
+        # JWT token oluştur (yetki claim'leri ile)
+        'tokens': membership_cache.tokens_for_user(user)
     }, status=status.HTTP_201_CREATED)
 
 
@@ -130,34 +126,28 @@ def login(request):
     if not user.is_active:
         return Response({'error': 'Hesap devre dışı'}, status=403)
     
-    # JWT token oluştur
-    refresh = RefreshToken.for_user(user)
+    # JWT token oluştur (yetki claim'leri ile)
+    tokens = membership_cache.tokens_for_user(user)
     
     # Agency bilgisi
     agency_data = None
     if user.current_agency:
-        membership = AgencyMembership.objects.filter(
-            user=user,
-            agency=user.current_agency
-        ).first()
+        membership = membership_cache.get_permissions(user.id, user.current_agency_id)
         
         agency_data = {
             'id': user.current_agency.id,
             'name': user.current_agency.name,
             'slug': user.current_agency.slug,
             'plan': user.current_agency.plan,
-            'role': membership.role.name if membership and membership.role else 'Member',
-            'is_owner': membership.is_owner if membership else False
+            'role': membership['role'] if membership and membership['role'] else 'Member',
+            'is_owner': membership['is_owner'] if membership else False
         }
     
     return Response({
         'message': 'Giriş başarılı',
         'user': UserSerializer(user).data,
         'agency': agency_data,
-        'tokens': {
-            'refresh': str(refresh),
-            'access': str(refresh.access_token),
-        }
+        'tokens': tokens
     })
 
 
@@ -195,8 +185,14 @@ def refresh_token(request):
     
     try:
         refresh_token = RefreshToken(refresh)
+        access = refresh_token.access_token
+        # Yetki claim'lerini güncelle (rol değişmiş / ajans değiştirilmiş olabilir)
+        user = User.objects.filter(id=refresh_token['user_id']).first()
+        if user is not None:
+            access.payload.pop(membership_cache.CLAIM, None)
+            membership_cache.add_claims(access, user)
         return Response({
-            'access': str(refresh_token.access_token),
+            'access': str(access),
         })
     except Exception as e:
         return Response({'error': 'Geçersiz refresh token'}, status=401)
@@ -235,7 +231,9 @@ def switch_agency(request):
                 'slug': membership.agency.slug,
                 'role': membership.role.name if membership.role else 'Member',
                 'is_owner': membership.is_owner
-            }
+            },
+            # Yeni ajansın yetki claim'leriyle access token
+            'access': str(membership_cache.add_claims(AccessToken.for_user(request.user), request.user))
         })
     except AgencyMembership.DoesNotExist:
         return Response({'error': 'Bu agency\'ye erişim yetkiniz yok'}, status=403)
@@ -1,7 +1,6 @@
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
-from api.models import AuditLog
-import json
+from api.services import audit
 
 class AgencyModelViewSet(viewsets.ModelViewSet):
     """
@@ -17,18 +16,8 @@ class AgencyModelViewSet(viewsets.ModelViewSet):
         return self.queryset.filter(agency=user.current_agency)
 
     def log_action(self, action, instance, changes=None):
-        try:
-            AuditLog.objects.create(
-                agency=self.request.user.current_agency,
-                action=action,
-                model_name=instance._meta.model_name,
-                object_id=str(instance.id),
-                object_repr=str(instance),
-                user=self.request.user,
-                changes=changes or {}
-            )
-        except Exception:
-            pass # Log başarısız olursa işlem durmasın
+        # DB'ye yazmaz: commit sonrası tampona eklenir, arka planda toplu yazılır
+        audit.record(self.request, action, instance, changes)
 
     def perform_create(self, serializer):
         save_kwargs = {'agency': self.request.user.current_agency}
@@ -38,10 +27,12 @@ class AgencyModelViewSet(viewsets.ModelViewSet):
         self.log_action('create', instance)
 
     def perform_update(self, serializer):
-        # Değişiklikleri yakalamak zor ama basitçe loglayalım
+        # Alan bazlı diff: kaydetmeden önceki değerler vs validated_data
+        before = audit.snapshot(serializer.instance, serializer.validated_data)
         instance = serializer.save()
-        self.log_action('update', instance)
+        self.log_action('update', instance, audit.diff(instance, before, serializer.validated_data))
 
     def perform_destroy(self, instance):
+        # delete() sonrası pk None olur: kaydı önce oluştur
         self.log_action('delete', instance)
         instance.delete()
@@ -1,6 +1,9 @@
 from api.views.base import AgencyModelViewSet
-from api.models import Client
+from api.filters import FullTextSearchFilter, TagFilterBackend
+from api.models import Client, Project
 from api.serializers.client import ClientSerializer
+from api.services import client_stats, project_stats
+from api.services import tags as tag_service
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import filters
@@ -18,12 +21,16 @@ class ClientViewSet(AgencyModelViewSet):
     - Segmentasyon (tags)
     - Müşteri notları
     """
-    queryset = Client.objects.all().prefetch_related('projects')
+    queryset = Client.objects.all()
     serializer_class = ClientSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['company_name', 'contact_person', 'email', 'phone']
-    filterset_fields = ['tags']
-    ordering_fields = ['company_name', 'created_at']
+    filter_backends = [DjangoFilterBackend, TagFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
+    search_fields = ['name', 'contact_person', 'email', 'phone']
+    search_title_field = 'name'
+    ordering_fields = ['name', 'created_at']
+
+    def get_queryset(self):
+        # project_count serializer'da annotation'dan okunur (müşteri başına COUNT yok)
+        return super().get_queryset().annotate(project_count=Count('projects'))
 
     @action(detail=True, methods=['get'])
     def projects(self, request, pk=None):
@@ -34,26 +41,21 @@ class ClientViewSet(AgencyModelViewSet):
         client = self.get_object()
         projects = client.projects.all().order_by('-created_at')
         
-        from api.serializers.project import ProjectSerializer
-        serializer = ProjectSerializer(projects, many=True)
-        
-        # Stats
-        stats = {
-            'total_projects': projects.count(),
-            'completed': projects.filter(status='completed').count(),
-            'in_progress': projects.filter(status='in_progress').count(),
-            'planned': projects.filter(status='planned').count(),
-        }
+        from api.serializers.project import ProjectListSerializer
+        serializer = ProjectListSerializer(project_stats.annotate_team_count(projects), many=True)
         
-        # Total budget
-        total_budget = projects.aggregate(
-            total=Sum('budget_actual')
-        )['total'] or 0
+        # Stats (tek aggregate)
+        stats = projects.aggregate(
+            total_projects=Count('id'),
+            total_budget=Sum('budget_estimated'),
+            **{status: Count('id', filter=Q(status=status)) for status, _ in Project.STATUS_CHOICES}
+        )
+        total_budget = stats.pop('total_budget') or 0
         
         return Response({
             'client': {
                 'id': client.id,
-                'company_name': client.company_name,
+                'company_name': client.name,
                 'contact_person': client.contact_person
             },
             'stats': {
@@ -99,7 +101,7 @@ class ClientViewSet(AgencyModelViewSet):
         Segmentasyon için (VIP, Kurumsal, Startup, vs.)
         """
         client = self.get_object()
-        tag = request.data.get('tag', '').strip()
+        tag = tag_service.normalize(request.data.get('tag', ''))
         
         if not tag:
             return Response({'error': 'Tag boş olamaz'}, status=400)
@@ -107,7 +109,7 @@ class ClientViewSet(AgencyModelViewSet):
         if not client.tags:
             client.tags = []
         
-        if tag not in client.tags:
+        if tag_service.key(tag) not in {tag_service.key(t) for t in tag_service.clean(client.tags)}:
             client.tags.append(tag)
             client.save()
             return Response({
@@ -124,10 +126,12 @@ class ClientViewSet(AgencyModelViewSet):
     def remove_tag(self, request, pk=None):
         """🏷️ Tag Çıkar"""
         client = self.get_object()
-        tag = request.data.get('tag')
+        tag = tag_service.normalize(request.data.get('tag'))
+        current = tag_service.clean(client.tags)
+        remaining = [t for t in current if tag_service.key(t) != tag_service.key(tag)] if tag else current
         
-        if client.tags and tag in client.tags:
-            client.tags.remove(tag)
+        if len(remaining) < len(current):
+            client.tags = remaining
             client.save()
             return Response({
                 'message': 'Tag çıkarıldı',
@@ -142,27 +146,9 @@ class ClientViewSet(AgencyModelViewSet):
         ⭐ En Değerli Müşteriler
         En çok proje yapılan veya en yüksek revenue'lü
         """
-        # Proje sayısına göre
-        top_by_projects = self.get_queryset().annotate(
-            project_count=Count('projects')
-        ).filter(project_count__gt=0).order_by('-project_count')[:10]
-        
-        result = []
-        for client in top_by_projects:
-            total_revenue = client.projects.aggregate(
-                total=Sum('budget_actual')
-            )['total'] or 0
-            
-            result.append({
-                'id': client.id,
-                'company_name': client.company_name,
-                'project_count': client.projects.count(),
-                'total_revenue': float(total_revenue),
-                'tags': client.tags or []
-            })
-        
+        # Proje sayısı + ciro tek GROUP BY sorgusuyla, ajans başına kısa süre cache'li
         return Response({
-            'top_clients': result
+            'top_clients': client_stats.get_top_clients(request.user.current_agency_id)
         })
 
     @action(detail=False, methods=['get'])
@@ -175,9 +161,9 @@ class ClientViewSet(AgencyModelViewSet):
         if not tag:
             return Response({'error': 'tag parametresi gerekli'}, status=400)
         
-        # JSONField içinde arama
-        clients = self.get_queryset().filter(
-            tags__contains=[tag]
+        # tags @> '["VIP"]' (GIN index), yazım farkı sözlükten düzeltilir
+        clients = tag_service.filter_queryset(
+            self.get_queryset(), request.user.current_agency_id, [tag]
         )
         
         serializer = self.get_serializer(clients, many=True)
@@ -192,29 +178,4 @@ class ClientViewSet(AgencyModelViewSet):
         """
         📊 Müşteri İstatistikleri (Agency-wide)
         """
-        total_clients = self.get_queryset().count()
-        
-        # Active clients (son 6 ayda proje yaptırmış)
-        from datetime import timedelta
-        from django.utils import timezone
-        six_months_ago = timezone.now() - timedelta(days=180)
-        
-        active_clients = self.get_queryset().filter(
-            projects__created_at__gte=six_months_ago
-        ).distinct().count()
-        
-        # Tag breakdown
-        all_tags = []
-        for client in self.get_queryset():
-            if client.tags:
-                all_tags.extend(client.tags)
-        
-        from collections import Counter
-        tag_counts = Counter(all_tags)
-        
-        return Response({
-            'total_clients': total_clients,
-            'active_clients': active_clients,
-            'inactive_clients': total_clients - active_clients,
-            'tag_distribution': dict(tag_counts.most_common(10))
-        })
+        return Response(client_stats.get_stats(request.user.current_agency_id))
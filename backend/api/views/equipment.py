@@ -1,31 +1,83 @@
 from api.views.base import AgencyModelViewSet
+from api.filters import FullTextSearchFilter
 from api.models import Equipment, EquipmentCategory, EquipmentReservation
 from api.serializers.equipment import EquipmentSerializer, CategorySerializer, EquipmentReservationSerializer
-from rest_framework import filters, status
+from api.pagination import KeysetPagination
+from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
-from django.db.models import Q
+from django.db import transaction
 from datetime import datetime
+import uuid
 
 from api.permissions import HasAgencyPermission
+from api.services import availability, project_stats
 from rest_framework.permissions import IsAuthenticated
 
+# Tek istekte kontrol edilebilecek maksimum ekipman sayısı
+BULK_AVAILABILITY_MAX_ITEMS = 200
+
+# Kit rezervasyonunda çakışma sayılan durumlar: kitin kendi açtığı talepler 'pending'
+# olduğundan paralel kitlerin talepleri de birbirini görsün
+KIT_CLASH_STATUSES = (*availability.BLOCKING_STATUSES, 'pending')
+# Müsaitlik motoru bunları bloklayıcı saymaz; toplu kontrol ayrıca raporlar (rezervasyonu engeller)
+PENDING_CLASH_STATUSES = tuple(s for s in KIT_CLASH_STATUSES if s not in availability.BLOCKING_STATUSES)
+
+
+def reservation_detail(reservation):
+    return {
+        'project': str(reservation.project) if reservation.project else 'Bireysel Rezervasyon',
+        'reserved_by': reservation.reserved_by.get_full_name() or reservation.reserved_by.email,
+        'start_date': reservation.start_date,
+        'end_date': reservation.end_date,
+        'status': reservation.get_status_display()
+    }
+
+
+def parse_date_range(data):
+    """
+    start_date / end_date (ISO 8601) alanlarını parse eder.
+    Returns: (start, end, error)
+    """
+    start_date = data.get('start_date')
+    end_date = data.get('end_date')
+    
+    if not start_date or not end_date:
+        return None, None, 'start_date ve end_date gerekli'
+    
+    try:
+        start = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
+        end = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None, None, 'Geçersiz tarih formatı (ISO 8601 kullanın)'
+    
+    if timezone.is_naive(start):
+        start = timezone.make_aware(start)
+    if timezone.is_naive(end):
+        end = timezone.make_aware(end)
+    
+    if end <= start:
+        return None, None, 'end_date, start_date\'ten sonra olmalı'
+    
+    return start, end, None
+
 class EquipmentViewSet(AgencyModelViewSet):
     queryset = Equipment.objects.all()
     serializer_class = EquipmentSerializer
     permission_classes = [IsAuthenticated, HasAgencyPermission]
     required_role_permission = 'can_manage_equipment'
 
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
     
     def get_permissions(self):
-        if self.action in ['list', 'retrieve', 'scan_qr', 'check_availability']:
+        if self.action in ['list', 'retrieve', 'scan_qr', 'check_availability', 'available', 'bulk_availability']:
             return [IsAuthenticated()]
         return [IsAuthenticated(), HasAgencyPermission()]
     
     search_fields = ['name', 'serial_number', 'brand', 'model']
+    search_title_field = 'name'
     filterset_fields = ['category', 'status']
 
     @action(detail=False, methods=['post'])
@@ -66,29 +118,20 @@ class EquipmentViewSet(AgencyModelViewSet):
         Tarih aralığı verince, ekipman müsait mi / değilse ne zaman boşalır
         """
         equipment = self.get_object()
-        start_date = request.data.get('start_date')
-        end_date = request.data.get('end_date')
-        
-        if not start_date or not end_date:
-            return Response({'error': 'start_date ve end_date gerekli'}, status=400)
+        start, end, error = parse_date_range(request.data)
+        if error:
+            return Response({'error': error}, status=400)
         
-        # Parse dates
-        try:
-            start = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-            end = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-        except:
-            return Response({'error': 'Geçersiz tarih formatı (ISO 8601 kullanın)'}, status=400)
-        
-        # Çakışma kontrolü
-        conflicts = EquipmentReservation.objects.filter(
-            equipment=equipment,
-            agency=request.user.current_agency,
-            status__in=['approved', 'active']
-        ).filter(
-            Q(start_date__lt=end) & Q(end_date__gt=start)
-        )
+        # Çakışma kontrolü (bellekteki interval tree, DB'ye gitmez)
+        engine = availability.get_engine(equipment.agency_id)
+        conflict_ids = engine.conflicts(equipment.id, start, end)
         
-        if conflicts.exists():
+        if conflict_ids:
+            # Detaylar için tek sorgu (N+1 yok)
+            conflicts = EquipmentReservation.objects.filter(
+                id__in=conflict_ids
+            ).select_related('project', 'reserved_by').order_by('start_date')
+            
             conflict_details = []
             for c in conflicts:
                 conflict_details.append({
@@ -112,6 +155,259 @@ class EquipmentViewSet(AgencyModelViewSet):
                 'equipment_name': equipment.name
             })
 
+    @action(detail=False, methods=['get'])
+    def available(self, request):
+        """
+        📅 Tarih Aralığında Boş Ekipmanlar
+        ?start_date=...&end_date=...&category=<uuid>
+        """
+        agency = request.user.current_agency
+        if not agency:
+            return Response({'error': 'Aktif ajans bulunamadı'}, status=400)
+        
+        start, end, error = parse_date_range(request.query_params)
+        if error:
+            return Response({'error': error}, status=400)
+        
+        engine = availability.get_engine(agency.id)
+        free_ids = engine.free_items(start, end, category_id=request.query_params.get('category'))
+        
+        items = self.get_queryset().filter(id__in=free_ids).select_related('category').order_by('name')
+        serializer = self.get_serializer(items, many=True)
+        return Response({
+            'start_date': start,
+            'end_date': end,
+            'count': len(serializer.data),
+            'items': serializer.data
+        })
+
+
+    @action(detail=False, methods=['post'])
+    def bulk_availability(self, request):
+        """
+        🎒 Toplu Müsaitlik Kontrolü + Kit Rezervasyonu
+        Çekim planlarken 30-80 ekipmanı tek istekte kontrol eder.
+        
+        Body:
+        {
+            "start_date": "...", "end_date": "...",
+            "items": ["<equipment_uuid>", ...],
+            "categories": [{"category": "<category_uuid>", "quantity": 4}],
+            "reserve": true,           # Opsiyonel: hepsi müsaitse rezervasyonları oluştur
+            "project": "<project_uuid>",
+            "notes": ""
+        }
+
+        Onay bekleyen talepler müsaitliği bozmaz ama kit rezervasyonunu engeller:
+        ayrıca 'pending_requests' olarak raporlanır, 'reservable' ikisini birlikte gösterir.
+        """
+        agency = request.user.current_agency
+        if not agency:
+            return Response({'error': 'Aktif ajans bulunamadı'}, status=400)
+        
+        start, end, error = parse_date_range(request.data)
+        if error:
+            return Response({'error': error}, status=400)
+        
+        try:
+            item_ids = list(dict.fromkeys(str(uuid.UUID(str(i))) for i in request.data.get('items') or []))
+        except ValueError:
+            return Response({'error': 'items geçerli ekipman ID listesi olmalı'}, status=400)
+        try:
+            quotas = [
+                (str(uuid.UUID(str(q['category']))), int(q.get('quantity', 1)))
+                for q in request.data.get('categories') or []
+            ]
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return Response({'error': 'categories: [{"category": id, "quantity": n}] formatında olmalı'}, status=400)
+        if any(quantity < 1 for _, quantity in quotas):
+            return Response({'error': 'quantity en az 1 olmalı'}, status=400)
+        
+        if not item_ids and not quotas:
+            return Response({'error': 'items veya categories gerekli'}, status=400)
+        if len(item_ids) + sum(q for _, q in quotas) > BULK_AVAILABILITY_MAX_ITEMS:
+            return Response({'error': f'En fazla {BULK_AVAILABILITY_MAX_ITEMS} ekipman kontrol edilebilir'}, status=400)
+        
+        engine = availability.get_engine(agency.id)
+        
+        # Kategori kotalarının boş adayları (isimleri ve bekleyen talepleri tek sorguda)
+        candidate_ids = set()
+        free_by_category = {}
+        for category_id, _ in quotas:
+            if category_id not in free_by_category:
+                free_by_category[category_id] = engine.free_items(start, end, category_id=category_id)
+                candidate_ids.update(free_by_category[category_id])
+        
+        # Onay bekleyen talepler: rezervasyon yolu bunları çakışma sayar (KIT_CLASH_STATUSES)
+        pending_by_equipment = {}
+        for c in EquipmentReservation.objects.filter(
+            agency=agency,
+            equipment_id__in=[*item_ids, *candidate_ids],
+            status__in=PENDING_CLASH_STATUSES,
+            start_date__lt=end,
+            end_date__gt=start
+        ).select_related('project', 'reserved_by').order_by('start_date'):
+            pending_by_equipment.setdefault(str(c.equipment_id), []).append(reservation_detail(c))
+        
+        # 1. Tek tek istenen ekipmanlar (tek sorgu)
+        equipment_map = {
+            str(e.id): e for e in self.get_queryset().filter(id__in=item_ids).select_related('category')
+        }
+        
+        item_results = []
+        conflict_ids = []
+        for equipment_id in item_ids:
+            equipment = equipment_map.get(equipment_id)
+            if equipment is None:
+                item_results.append({'id': equipment_id, 'available': False, 'reason': 'not_found'})
+                continue
+            
+            conflicts = engine.conflicts(equipment.id, start, end)
+            conflict_ids.extend(conflicts)
+            if equipment.status in availability.UNAVAILABLE_EQUIPMENT_STATUSES:
+                reason = equipment.status
+            else:
+                reason = 'conflict' if conflicts else None
+            pending = pending_by_equipment.get(equipment_id, [])
+            item_results.append({
+                'id': equipment_id,
+                'name': equipment.name,
+                'available': reason is None,
+                'reason': reason,
+                'conflicts': conflicts,
+                'pending_requests': pending,
+                'reservable': reason is None and not pending,
+            })
+        
+        # 2. Kategori kotaları ("4x LED panel") - boşlardan önce talepsizleri, isim sırasına göre ayır
+        category_names = dict(
+            EquipmentCategory.objects.filter(
+                agency=agency, id__in=[c for c, _ in quotas]
+            ).values_list('id', 'name')
+        )
+        category_names = {str(k): v for k, v in category_names.items()}
+        
+        candidate_names = dict(
+            Equipment.objects.filter(id__in=candidate_ids).values_list('id', 'name')
+        ) if candidate_ids else {}
+        
+        taken = set(item_ids)
+        category_results = []
+        for category_id, quantity in quotas:
+            free = sorted(
+                (i for i in free_by_category[category_id] if str(i) not in taken),
+                key=lambda i: (str(i) in pending_by_equipment, candidate_names.get(i, ''))
+            )
+            allocated = free[:quantity]
+            taken.update(str(i) for i in allocated)
+            available = category_id in category_names and len(allocated) == quantity
+            category_results.append({
+                'category': category_id,
+                'category_name': category_names.get(category_id),
+                'requested': quantity,
+                'available_count': len(free),
+                'pending_count': sum(1 for i in free if str(i) in pending_by_equipment),
+                'available': available,
+                'reservable': available and not any(str(i) in pending_by_equipment for i in allocated),
+                'allocated': [
+                    {'id': i, 'name': candidate_names.get(i), 'pending_requests': pending_by_equipment.get(str(i), [])}
+                    for i in allocated
+                ],
+            })
+        
+        # 3. Çakışma detayları (tek sorgu)
+        conflict_details = {}
+        if conflict_ids:
+            for c in EquipmentReservation.objects.filter(id__in=conflict_ids).select_related('project', 'reserved_by'):
+                conflict_details[str(c.id)] = reservation_detail(c)
+        for result in item_results:
+            if 'conflicts' in result:
+                result['conflicts'] = [conflict_details[str(c)] for c in result['conflicts'] if str(c) in conflict_details]
+        
+        all_available = all(r['available'] for r in item_results) and all(r['available'] for r in category_results)
+        reservable = all_available and all(r['reservable'] for r in item_results) and all(
+            r['reservable'] for r in category_results
+        )
+        response = {
+            'start_date': start,
+            'end_date': end,
+            'all_available': all_available,
+            'reservable': reservable,
+            'items': item_results,
+            'categories': category_results,
+        }
+        
+        if str(request.data.get('reserve')).lower() != 'true':
+            return Response(response)
+        
+        if not all_available:
+            return Response({**response, 'error': 'Tüm ekipmanlar müsait değil, rezervasyon yapılmadı'}, status=409)
+        if not reservable:
+            return Response({**response, 'error': 'Bazı ekipmanlar için onay bekleyen talep var, rezervasyon yapılmadı'}, status=409)
+        
+        # 4. Kit rezervasyonu (tek transaction, tek çakışma kontrolü)
+        project = None
+        project_id = request.data.get('project')
+        if project_id:
+            from api.models import Project
+            project = Project.objects.filter(id=project_id, agency=agency).first()
+            if project is None:
+                return Response({'error': 'Proje bulunamadı'}, status=404)
+        
+        equipment_ids = [r['id'] for r in item_results] + [
+            a['id'] for r in category_results for a in r['allocated']
+        ]
+        with transaction.atomic():
+            # Aynı anda başka bir kit aynı ekipmanları alamasın: kilit kitleri sıralar,
+            # çakışma kontrolü bekleyen (pending) talepleri de sayar
+            list(Equipment.objects.select_for_update().filter(id__in=equipment_ids).values_list('id', flat=True))
+            
+            clashing = set(
+                EquipmentReservation.objects.filter(
+                    equipment_id__in=equipment_ids,
+                    status__in=KIT_CLASH_STATUSES,
+                    start_date__lt=end,
+                    end_date__gt=start
+                ).values_list('equipment_id', flat=True)
+            )
+            if clashing:
+                return Response({
+                    **response,
+                    'all_available': False,
+                    'error': 'Bazı ekipmanlar bu tarihlerde rezerve edilmiş veya talep edilmiş',
+                    'clashing': list(clashing)
+                }, status=409)
+            
+            reservations = EquipmentReservation.objects.bulk_create([
+                EquipmentReservation(
+                    agency=agency,
+                    equipment_id=equipment_id,
+                    project=project,
+                    reserved_by=request.user,
+                    start_date=start,
+                    end_date=end,
+                    notes=request.data.get('notes', '')
+                )
+                for equipment_id in equipment_ids
+            ])
+            
+            # bulk_create post_save sinyali tetiklemez: proje istatistikleri elle geçersiz kılınır,
+            # yöneticilere kit için tek bildirim
+            if project is not None:
+                transaction.on_commit(lambda: project_stats.invalidate(agency.id, [project.pk]))
+            from api.services.notification import NotificationService
+            equipment_names = [r['name'] for r in item_results] + [
+                a['name'] for r in category_results for a in r['allocated']
+            ]
+            NotificationService.notify_reservation_requested(
+                agency, request.user, equipment_names, '/equipment/requests'
+            )
+        
+        return Response({
+            **response,
+            'reserved': True,
+            'reservations': EquipmentReservationSerializer(reservations, many=True).data
+        }, status=status.HTTP_201_CREATED)
 
 class ReservationViewSet(AgencyModelViewSet):
     queryset = EquipmentReservation.objects.all().select_related(
@@ -120,6 +416,11 @@ class ReservationViewSet(AgencyModelViewSet):
     serializer_class = EquipmentReservationSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['status', 'equipment', 'project', 'reserved_by']
+
+    # Takvim sırası korunur: (start_date, id) üzerinden cursor
+    pagination_class = KeysetPagination
+    keyset_ordering = ('start_date',)
+    keyset_ordering_fields = ('start_date', 'created_at')
     
     def perform_create(self, serializer):
         serializer.save(
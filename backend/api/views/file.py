@@ -1,11 +1,17 @@
 from api.views.base import AgencyModelViewSet
+from api.filters import FullTextSearchFilter, TagFilterBackend
 from api.models import File
+from api.pagination import KeysetPagination
 from api.serializers.file import FileSerializer
+from api.services import blobs, file_versions, storage_usage, uploads
+from api.services.storage_usage import QuotaExceededError
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework import filters, status
+from rest_framework import status
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
 from django.utils import timezone
+import uuid
 
 class FileViewSet(AgencyModelViewSet):
     """
@@ -19,40 +25,61 @@ class FileViewSet(AgencyModelViewSet):
     - Preview support
     """
     queryset = File.objects.all().select_related(
-        'uploaded_by', 'project', 'task'
+        'uploaded_by', 'project'
     ).order_by('-created_at')
     
     serializer_class = FileSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    search_fields = ['file_name', 'description']
-    filterset_fields = ['project', 'task', 'file_type', 'folder_path']
+    filter_backends = [DjangoFilterBackend, TagFilterBackend, FullTextSearchFilter]
+    search_fields = ['original_name', 'description']
+    search_title_field = 'original_name'
+    filterset_fields = ['project', 'file_type']
+
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at',)
+    keyset_ordering_fields = ('created_at',)
+
+    def create(self, request, *args, **kwargs):
+        try:
+            return super().create(request, *args, **kwargs)
+        except QuotaExceededError as e:
+            return Response({'error': str(e)}, status=400)
 
     def perform_create(self, serializer):
         """
-        Dosya upload edilirken:
-        - Agency set et
-        - Uploader set et
+        Küçük dosyalar (tek istekte multipart form) için.
+        Büyük dosyalar /uploads/ ile parça parça yüklenir (api/services/uploads.py).
+        - Agency / uploader set et
+        - Kota rezervasyonu (depolamaya yazmadan önce, kısa kilit)
         - File metadata al (size, type)
+        - İçerik ajansta zaten varsa tekrar yazılmaz, mevcut blob'u gösterir
         """
         file_obj = self.request.FILES.get('file')
+        agency = self.request.user.current_agency
         
-        # File metadata
-        if file_obj:
-            file_name = file_obj.name
-            file_size = file_obj.size
-            file_type = file_obj.content_type.split('/')[0]  # image, video, application
-        else:
-            file_name = serializer.validated_data.get('file_name', 'unknown')
-            file_size = 0
-            file_type = 'unknown'
-        
-        serializer.save(
-            agency=self.request.user.current_agency,
-            uploaded_by=self.request.user,
-            file_name=file_name,
-            file_size=file_size,
-            file_type=file_type
-        )
+        # Ajans kilidi sadece kota rezervasyonu sürer; hash ve depolamaya yazma kilitsiz
+        with storage_usage.reservation(agency, file_obj.size):
+            sha256, blob = self._find_blob(agency, file_obj)
+            with transaction.atomic():
+                instance = serializer.save(
+                    agency=agency,
+                    uploaded_by=self.request.user,
+                    original_name=serializer.validated_data.get('original_name') or file_obj.name,
+                    file_size=file_obj.size,
+                    file_type=uploads.file_type_for(file_obj.content_type),  # image, video, application
+                    **self._blob_fields(blob)
+                )
+                if blob is None:
+                    blobs.attach(instance, sha256, file_obj.size, file_obj.content_type)
+        self.log_action('create', instance)
+
+    def _find_blob(self, agency, file_obj):
+        """(sha256, ajansta aynı içerikli blob veya None)"""
+        sha256 = blobs.hash_uploaded(file_obj)
+        return sha256, blobs.find(agency.id, sha256)
+
+    def _blob_fields(self, blob):
+        # Mevcut blob: dosya depolamaya yazılmaz, File blob'un object'ini gösterir
+        return {'file': blob.storage_key, 'blob': blob} if blob else {}
 
     @action(detail=False, methods=['get'])
     def by_project(self, request):
@@ -113,7 +140,9 @@ class FileViewSet(AgencyModelViewSet):
     def create_version(self, request, pk=None):
         """
         🔄 Yeni Versiyon Oluştur
-        Aynı dosyanın yeni bir versiyonunu yükle
+        Aynı dosyanın yeni bir versiyonunu yükle (küçük dosyalar).
+        Büyük dosyalarda /uploads/ ile `version_of` gönderilir.
+        Eski bir versiyondan da türetilebilir: numara zincirdeki en yeni + 1 olur.
         """
         original_file = self.get_object()
         new_file_obj = request.FILES.get('file')
@@ -122,21 +151,27 @@ class FileViewSet(AgencyModelViewSet):
             return Response({'error': 'file gerekli'}, status=400)
         
         # Yeni versiyon oluştur
-        new_version = File.objects.create(
-            agency=self.request.user.current_agency,
-            uploaded_by=self.request.user,
-            project=original_file.project,
-            task=original_file.task,
-            file_name=new_file_obj.name,
-            file_type=new_file_obj.content_type.split('/')[0],
-            file_size=new_file_obj.size,
-            file_url=None,  # S3'e upload edilecek (TODO)
-            folder_path=original_file.folder_path,
-            version=original_file.version + 1,
-            description=request.data.get('description', f'v{original_file.version + 1}')
-        )
-        
-        # TODO: S3'e upload
+        agency = self.request.user.current_agency
+        try:
+            with storage_usage.reservation(agency, new_file_obj.size):
+                sha256, blob = self._find_blob(agency, new_file_obj)
+                with transaction.atomic():
+                    new_version = file_versions.create(
+                        original_file,
+                        agency=agency,
+                        uploaded_by=self.request.user,
+                        project=original_file.project,
+                        original_name=new_file_obj.name,
+                        file_type=uploads.file_type_for(new_file_obj.content_type),
+                        file_size=new_file_obj.size,
+                        description=request.data.get('description', ''),
+                        tags=original_file.tags,
+                        **(self._blob_fields(blob) or {'file': new_file_obj})
+                    )
+                    if blob is None:
+                        blobs.attach(new_version, sha256, new_file_obj.size, new_file_obj.content_type)
+        except QuotaExceededError as e:
+            return Response({'error': str(e)}, status=400)
         
         serializer = self.get_serializer(new_version)
         return Response({
@@ -148,28 +183,63 @@ class FileViewSet(AgencyModelViewSet):
     def versions(self, request, pk=None):
         """
         📜 Dosya Versiyonları
-        Aynı dosyanın tüm versiyonlarını listele
+        Dosyanın zincirindeki tüm versiyonlar, en yeni önce (tek sorgu, (root, version) index'i)
         """
         file = self.get_object()
-        
-        # Aynı folder_path ve similar file_name ile versiyonları bul
-        # (Basit implementation - ileride parent_file_id ile yapılabilir)
-        base_name = file.file_name.rsplit('.', 1)[0]  # Extension'ı çıkar
-        
-        versions = File.objects.filter(
-            agency=self.request.user.current_agency,
-            project=file.project,
-            task=file.task,
-            folder_path=file.folder_path,
-            file_name__startswith=base_name
-        ).order_by('-version')
+        versions = list(file_versions.history(self.get_queryset(), file))
         
         serializer = self.get_serializer(versions, many=True)
         return Response({
-            'base_file': file.file_name,
+            'root': file_versions.lineage_id(file),
+            'latest': versions[0].id if versions else file.id,
+            'count': len(versions),
             'versions': serializer.data
         })
 
+    @action(detail=True, methods=['get'])
+    def diff(self, request, pk=None):
+        """
+        🔍 Versiyon Farkı
+        ?to=<file_id> (aynı zincirden; boşsa türetildiği versiyon ile karşılaştırılır)
+        """
+        file = self.get_object()
+        other_id = request.query_params.get('to') or file.parent_id
+        if not other_id:
+            return Response({'error': 'Karşılaştırılacak versiyon yok (to parametresi gerekli)'}, status=400)
+        try:
+            other_id = uuid.UUID(str(other_id))
+        except ValueError:
+            return Response({'error': 'Geçersiz to parametresi'}, status=400)
+        
+        other = file_versions.history(self.get_queryset(), file).filter(pk=other_id).first()
+        if other is None:
+            return Response({'error': 'Dosya bu dosyanın versiyonu değil'}, status=400)
+        
+        old, new = sorted([other, file], key=lambda f: f.version)
+        return Response(file_versions.diff(old, new))
+
+    @action(detail=True, methods=['post'])
+    def rollback(self, request, pk=None):
+        """
+        ⏪ Versiyona Geri Dön
+        Bu versiyonun içeriği zincirin en yeni versiyonu olarak eklenir (geçmiş silinmez,
+        içerik depolamada kopyalanmaz)
+        """
+        target = self.get_object()
+        try:
+            with transaction.atomic():
+                storage_usage.check_quota(target.agency, target.file_size)
+                new_version = file_versions.rollback(target, request.user)
+        except QuotaExceededError as e:
+            return Response({'error': str(e)}, status=400)
+        self.log_action('create', new_version)
+        
+        serializer = self.get_serializer(new_version)
+        return Response({
+            'message': f'v{target.version} geri yüklendi (v{new_version.version})',
+            'file': serializer.data
+        }, status=status.HTTP_201_CREATED)
+
     @action(detail=False, methods=['get'])
     def recent(self, request):
         """
@@ -190,37 +260,6 @@ class FileViewSet(AgencyModelViewSet):
     def storage_stats(self, request):
         """
         💾 Depolama İstatistikleri
-        Agency'nin toplam storage kullanımı
+        Agency'nin toplam storage kullanımı (sayaç satırlarından, dosya sayısından bağımsız)
         """
-        from django.db.models import Sum
-        
-        total_size = self.get_queryset().aggregate(
-            total=Sum('file_size')
-        )['total'] or 0
-        
-        # Type'a göre breakdown
-        by_type = {}
-        for file_type in ['image', 'video', 'application', 'audio']:
-            size = self.get_queryset().filter(
-                file_type=file_type
-            ).aggregate(total=Sum('file_size'))['total'] or 0
-            
-            by_type[file_type] = {
-                'size_bytes': size,
-                'size_mb': round(size / (1024 * 1024), 2),
-                'count': self.get_queryset().filter(file_type=file_type).count()
-            }
-        
-        # Agency limit kontrolü
-        agency = request.user.current_agency
-        max_storage_bytes = float(agency.max_storage_gb) * 1024 * 1024 * 1024
-        usage_percentage = (total_size / max_storage_bytes) * 100 if max_storage_bytes > 0 else 0
-        
-        return Response({
-            'total_size_bytes': total_size,
-            'total_size_gb': round(total_size / (1024 * 1024 * 1024), 2),
-            'max_storage_gb': float(agency.max_storage_gb),
-            'usage_percentage': round(usage_percentage, 1),
-            'by_type': by_type,
-            'total_files': self.get_queryset().count()
-        })
+        return Response(storage_usage.summary(request.user.current_agency))
@@ -36,5 +36,12 @@ def health_check(request):
         status['status'] = 'unhealthy'
         status['cache'] = f'error: {str(e)}'
     
+    # WebSocket outbox relay gecikmesi (bilgi amaçlı, sağlık durumunu etkilemez)
+    try:
+        from api.services.notification import NotificationService
+        status['notification_relay'] = NotificationService.relay_metrics()
+    except Exception as e:
+        status['notification_relay'] = f'error: {str(e)}'
+    
     http_status = 200 if status['status'] == 'healthy' else 503
     return Response(status, status=http_status)
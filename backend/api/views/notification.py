@@ -1,5 +1,7 @@
 from api.views.base import AgencyModelViewSet
 from api.models import Notification
+from api.pagination import KeysetPagination
+from apps.core import partitioning
 from api.serializers.notification import NotificationSerializer
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -12,13 +14,20 @@ class NotificationViewSet(AgencyModelViewSet):
     """
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         # Sadece kullanıcının kendi bildirimlerini göster
-        return Notification.objects.filter(
-            user=self.request.user,
+        queryset = Notification.objects.filter(
+            recipient=self.request.user,
             agency=self.request.user.current_agency
-        ).order_by('-created_at')
+        )
+        # Planın saklama süresi: daha eski aylar listelenmez (partition pruning)
+        agency = self.request.user.current_agency
+        cutoff = agency and partitioning.retention_cutoff('users.Notification', agency.plan)
+        if cutoff:
+            queryset = queryset.filter(created_at__gte=cutoff)
+        return queryset.order_by('-created_at')
 
     @action(detail=False, methods=['get'])
     def unread(self, request):
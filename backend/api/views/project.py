@@ -1,12 +1,20 @@
+import datetime
 from api.views.base import AgencyModelViewSet
-from api.models import Project
+from api.filters import FullTextSearchFilter, TagFilterBackend
+from api.models import Project, User
 from api.serializers.project import ProjectSerializer
+from api.serializers.user import prefetch_agency_memberships
+from api.services import project_stats
+from api.services import timeline as timeline_service
 from rest_framework.decorators import action
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.response import Response
 from rest_framework import filters, status
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Count, Q, Sum
+from django.db.models import Count, Prefetch, Q, Sum
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 class ProjectViewSet(AgencyModelViewSet):
     """
@@ -19,16 +27,37 @@ class ProjectViewSet(AgencyModelViewSet):
     4. Takip edilir (progress tracking)
     5. Tamamlanır
     """
-    queryset = Project.objects.all().select_related(
-        'client', 'created_by'
-    ).prefetch_related('team_members', 'tasks', 'equipment_reservations')
+    queryset = Project.objects.all().select_related('created_by').order_by('-created_at')
     
     serializer_class = ProjectSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['title', 'description', 'client__company_name']
+    filter_backends = [DjangoFilterBackend, TagFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
+    search_fields = ['title', 'description', 'client_name']
+    search_title_field = 'title'
     filterset_fields = ['status', 'priority', 'client']
     ordering_fields = ['start_date', 'end_date', 'created_at', 'priority']
 
+    def get_queryset(self):
+        """
+        Ekip üyeleri ajanstaki rolleriyle birlikte tek seferde çekilir:
+        proje x ekip üyesi başına membership/role sorgusu yok (N+1).
+        İlerleme listede denormalize sayaçlardan, detayda canlı aggregate'ten okunur.
+        """
+        queryset = super().get_queryset()
+        if self.action in ('stats', 'timeline'):
+            # Kendi aggregate / UNION sorgularını yaparlar
+            return queryset
+
+        team = User.objects.prefetch_related(
+            prefetch_agency_memberships(self.request.user.current_agency)
+        )
+        queryset = queryset.prefetch_related(
+            Prefetch('assigned_team', queryset=team)
+        )
+        queryset = project_stats.annotate_team_count(queryset)
+        if self.action == 'retrieve':
+            queryset = project_stats.annotate_task_counts(queryset)
+        return queryset
+
     def perform_create(self, serializer):
         """Proje oluştururken agency ve creator set et"""
         serializer.save(
@@ -44,9 +73,6 @@ class ProjectViewSet(AgencyModelViewSet):
         """
         active_projects = self.get_queryset().filter(
             status__in=['planned', 'in_progress']
-        ).annotate(
-            task_count=Count('tasks'),
-            completed_tasks=Count('tasks', filter=Q(tasks__status='done'))
         ).order_by('-priority', 'start_date')
         
         serializer = self.get_serializer(active_projects, many=True)
@@ -61,73 +87,16 @@ class ProjectViewSet(AgencyModelViewSet):
         📊 Proje İstatistikleri
         - Görev durumları
         - Ekipman kullanımı
-        - Budget tracking
+        - Budget tracking (onaylı giderler)
         - İlerleme yüzdesi
+
+        Proje başlığı bu endpoint'i sık sorgular: cevap cache'ten döner,
+        ilgili kayıtlar değişince sinyallerle silinir (api/services/project_stats.py)
         """
-        project = self.get_object()
-        
-        # Task stats
-        tasks = project.tasks.all()
-        task_stats = {
-            'total': tasks.count(),
-            'not_started': tasks.filter(status='not_started').count(),
-            'in_progress': tasks.filter(status='in_progress').count(),
-            'in_review': tasks.filter(status='in_review').count(),
-            'revision_needed': tasks.filter(status='revision_needed').count(),
-            'done': tasks.filter(status='done').count(),
-            'blocked': tasks.filter(status='blocked').count(),
-        }
-        
-        # Progress percentage
-        if task_stats['total'] > 0:
-            progress = (task_stats['done'] / task_stats['total']) * 100
-        else:
-            progress = 0
-        
-        # Equipment reservations
-        equipment_stats = {
-            'total_reservations': project.equipment_reservations.count(),
-            'active_reservations': project.equipment_reservations.filter(status='active').count()
-        }
-        
-        # Team
-        team_stats = {
-            'team_size': project.team_members.count(),
-            'team_members': [
-                {
-                    'id': member.id,
-                    'name': member.get_full_name() or member.email,
-                    'email': member.email
-                }
-                for member in project.team_members.all()
-            ]
-        }
-        
-        # Budget (if exists)
-        budget_stats = {
-            'estimated_budget': float(project.budget_estimated) if project.budget_estimated else 0,
-            'actual_budget': float(project.budget_actual) if project.budget_actual else 0,
-        }
-        if project.budget_estimated and project.budget_estimated > 0:
-            budget_stats['budget_usage_percentage'] = (
-                (project.budget_actual or 0) / project.budget_estimated
-            ) * 100
-        
-        return Response({
-            'project_id': project.id,
-            'project_title': project.title,
-            'status': project.status,
-            'progress_percentage': round(progress, 1),
-            'tasks': task_stats,
-            'equipment': equipment_stats,
-            'team': team_stats,
-            'budget': budget_stats,
-            'dates': {
-                'start': project.start_date,
-                'end': project.end_date,
-                'created': project.created_at
-            }
-        })
+        data = project_stats.get_cached_stats(request.user.current_agency_id, pk)
+        if data is None:
+            data = project_stats.get_stats(self.get_object())
+        return Response(data)
 
     @action(detail=True, methods=['post'])
     def add_team_member(self, request, pk=None):
@@ -140,19 +109,18 @@ class ProjectViewSet(AgencyModelViewSet):
         if not user_id:
             return Response({'error': 'user_id gerekli'}, status=400)
         
-        from api.models import User
         try:
             user = User.objects.get(
                 id=user_id,
                 memberships__agency=self.request.user.current_agency
             )
-            project.team_members.add(user)
+            project.assigned_team.add(user)
             
             # TODO: Notification gönder
             
             return Response({
                 'message': f'{user.get_full_name()} projeye eklendi',
-                'team_size': project.team_members.count()
+                'team_size': project.assigned_team.count()
             })
         except User.DoesNotExist:
             return Response({'error': 'Kullanıcı bulunamadı'}, status=404)
@@ -166,13 +134,12 @@ class ProjectViewSet(AgencyModelViewSet):
         if not user_id:
             return Response({'error': 'user_id gerekli'}, status=400)
         
-        from api.models import User
         try:
             user = User.objects.get(id=user_id)
-            project.team_members.remove(user)
+            project.assigned_team.remove(user)
             return Response({
                 'message': f'{user.get_full_name()} projeden çıkarıldı',
-                'team_size': project.team_members.count()
+                'team_size': project.assigned_team.count()
             })
         except User.DoesNotExist:
             return Response({'error': 'Kullanıcı bulunamadı'}, status=404)
@@ -211,40 +178,57 @@ class ProjectViewSet(AgencyModelViewSet):
     def timeline(self, request, pk=None):
         """
         📅 Proje Timeline'ı
-        Tüm görevleri ve rezervasyonları tarih sırasıyla
+        Görevler, rezervasyonlar, çekim günleri ve giderler tarih sırasıyla (tek UNION ALL sorgusu)
+
+        Query Params:
+        - from / to: Tarih penceresi (YYYY-MM-DD veya ISO datetime), to hariç
+        - cursor: Önceki cevaptaki 'next'
+        - page_size: Varsayılan 200, en fazla 1000
+
+        Cevap stream edilir: {"project": {...}, "items": [...], "next": "<cursor>" | null}
         """
         project = self.get_object()
-        
-        # Tasks timeline
-        tasks_timeline = []
-        for task in project.tasks.all().order_by('due_date'):
-            tasks_timeline.append({
-                'type': 'task',
-                'id': task.id,
-                'title': task.title,
-                'status': task.status,
-                'assigned_to': task.assigned_to.get_full_name() if task.assigned_to else None,
-                'due_date': task.due_date,
-                'priority': task.priority
-            })
-        
-        # Equipment reservations timeline
-        reservations_timeline = []
-        for res in project.equipment_reservations.all().order_by('start_date'):
-            reservations_timeline.append({
-                'type': 'equipment_reservation',
-                'id': res.id,
-                'equipment': res.equipment.name,
-                'start_date': res.start_date,
-                'end_date': res.end_date,
-                'status': res.status,
-                'reserved_by': res.reserved_by.get_full_name()
-            })
-        
-        return Response({
-            'project': project.title,
-            'start_date': project.start_date,
-            'end_date': project.end_date,
-            'tasks': tasks_timeline,
-            'equipment_reservations': reservations_timeline
-        })
+
+        try:
+            start = _parse_date_param(request.query_params.get('from'))
+            end = _parse_date_param(request.query_params.get('to'))
+        except ValueError:
+            return Response({'error': 'from/to YYYY-MM-DD formatında olmalı'}, status=400)
+
+        after = None
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            try:
+                after = timeline_service.parse_cursor(cursor)
+            except ValueError:
+                return Response({'error': 'Geçersiz cursor'}, status=400)
+
+        try:
+            page_size = int(request.query_params.get('page_size', timeline_service.DEFAULT_PAGE_SIZE))
+        except ValueError:
+            page_size = timeline_service.DEFAULT_PAGE_SIZE
+        page_size = max(1, min(page_size, timeline_service.MAX_PAGE_SIZE))
+
+        url = request.build_absolute_uri()
+        return StreamingHttpResponse(
+            timeline_service.stream(
+                project, start, end, after, page_size,
+                link=lambda next_cursor: replace_query_param(url, 'cursor', next_cursor)
+            ),
+            content_type='application/json'
+        )
+
+
+def _parse_date_param(value):
+    """'2026-05-01' veya ISO datetime -> aware datetime (boşsa None)"""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        parsed = datetime.datetime.combine(day, datetime.time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
@@ -0,0 +1,39 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from api.services import search
+
+class GlobalSearchView(APIView):
+    """
+    🔎 Global Arama
+    ?q=klip               -> proje, görev, müşteri, dosya ve ekipmanlarda, en alakalı önce
+    ?types=project,task   -> sadece bu tipler
+    ?limit=10             -> en fazla sonuç (varsayılan 20, en fazla 50)
+
+    Tüm tipler tek sorguda aranır (bkz. api/services/search.py)
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        agency = request.user.current_agency
+        if not agency:
+            return Response({"error": "No active agency found for user"}, status=400)
+
+        types = [t for t in request.query_params.get('types', '').split(',') if t]
+        unknown = [t for t in types if t not in search.SOURCES]
+        if unknown:
+            return Response({'error': f"Geçersiz tip: {', '.join(unknown)}"}, status=400)
+
+        try:
+            limit = int(request.query_params.get('limit', search.DEFAULT_LIMIT))
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return Response({'error': 'limit pozitif bir sayı olmalı'}, status=400)
+        limit = min(limit, search.MAX_LIMIT)
+
+        query = request.query_params.get('q', '')
+        return Response({
+            'query': query,
+            'results': search.search(agency.id, query, types or None, limit)
+        })
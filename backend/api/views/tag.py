@@ -0,0 +1,21 @@
+from api.views.base import AgencyModelViewSet
+from api.models import Tag
+from api.serializers.tag import TagSerializer
+from api.services import tags
+
+class TagViewSet(AgencyModelViewSet):
+    """
+    🏷️ Tag Sözlüğü (Autocomplete)
+    ?q=vi -> 'vi' ile başlayan tag'ler, en çok kullanılan önce
+
+    Tag'ler Client / Project / File kaydedilirken otomatik oluşur, buradan yazılmaz.
+    """
+    queryset = Tag.objects.all()
+    serializer_class = TagSerializer
+    http_method_names = ['get', 'head', 'options']
+    pagination_class = None
+
+    def get_queryset(self):
+        if self.action == 'list':
+            return tags.autocomplete(self.request.user.current_agency_id, self.request.query_params.get('q', ''))
+        return super().get_queryset()
@@ -1,9 +1,11 @@
 from api.views.base import AgencyModelViewSet
+from api.filters import FullTextSearchFilter
 from api.models import Task
+from api.pagination import KeysetPagination
 from api.serializers.task import TaskSerializer
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework import filters, status
+from rest_framework import status
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 
@@ -20,13 +22,18 @@ class TaskViewSet(AgencyModelViewSet):
     - blocked: Engellendi (Bağımlılık var)
     """
     queryset = Task.objects.all().select_related(
-        'project', 'assigned_to', 'created_by'
-    ).prefetch_related('equipment_used')
+        'project', 'created_by'
+    ).prefetch_related('assigned_to')
     serializer_class = TaskSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
     search_fields = ['title', 'description']
-    filterset_fields = ['project', 'status', 'priority', 'assigned_to']
-    ordering_fields = ['due_date', 'priority', 'created_at']
+    search_title_field = 'title'
+    filterset_fields = ['project', 'status', 'assigned_to']
+
+    # Sayfa numarası varsayılan, ?pagination=cursor ile keyset (bkz. api/pagination.py)
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at',)
+    keyset_ordering_fields = ('created_at', 'updated_at', 'due_date')
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -135,7 +142,7 @@ class TaskViewSet(AgencyModelViewSet):
         
         # Email gönder (Celery async)
         from api.tasks import send_task_revision_email
-        send_task_revision_email.delay(task.id)
+        send_task_revision_email.delay(task.id, revision_note)
         
         # Notification service
         from api.services.notification import NotificationService
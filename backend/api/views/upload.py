@@ -0,0 +1,197 @@
+from api.views.base import AgencyModelViewSet
+from api.models import FileUpload
+from api.serializers.upload import ConfirmPartsSerializer, FileUploadSerializer, PresignPartsSerializer
+from api.serializers.file import FileSerializer
+from api.services import uploads
+from api.services.storage_usage import QuotaExceededError
+from api.services.storage_service import StorageError, backend, read_part_token
+from rest_framework.decorators import action
+from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework import status
+from django.conf import settings
+
+
+def _content_length(request):
+    try:
+        return int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return 0
+
+
+class FileUploadViewSet(AgencyModelViewSet):
+    """
+    ⬆️ PARÇALI / DEVAM EDEBİLEN YÜKLEME (büyük dosyalar, rush'lar)
+
+    POST   /uploads/                  -> yükleme başlat (part_size, part_count döner; kota burada kontrol edilir)
+    POST   /uploads/{id}/presign/     -> parçalar için presigned PUT URL'leri (doğrudan depolamaya)
+    POST   /uploads/{id}/confirm/     -> doğrudan yüklenen parçaların ETag'lerini bildir
+    POST   /uploads/{id}/reuse/       -> (yeni versiyon) önceki versiyonla aynı parçaları kopyala
+    PUT    /uploads/{id}/parts/{n}/   -> (alternatif) n. parça app üzerinden: ham gövde
+    GET    /uploads/{id}/             -> durum; missing_parts ile kaldığı yerden devam
+    POST   /uploads/{id}/complete/    -> parçaları birleştir, File oluştur
+    DELETE /uploads/{id}/             -> iptal
+
+    Presigned akışta byte'lar app worker'larından hiç geçmez; parça PUT'unda da
+    app belleğinde tutulmadan depolamaya (S3 multipart / disk) akar.
+    """
+    queryset = FileUpload.objects.all().select_related('project').order_by('-created_at')
+    serializer_class = FileUploadSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # Sadece kullanıcının yarım kalan yüklemeleri (devam ettirilebilecekler)
+            queryset = queryset.filter(uploaded_by=self.request.user, status='uploading')
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            upload = uploads.start(request.user.current_agency, request.user, **serializer.validated_data)
+        except QuotaExceededError as e:
+            return Response({'error': str(e)}, status=400)
+        except StorageError as e:
+            return Response({'error': f'Depolama hatası: {e}'}, status=status.HTTP_502_BAD_GATEWAY)
+
+        self.log_action('create', upload)
+        return Response(self.get_serializer(upload).data, status=status.HTTP_201_CREATED)
+
+    def update(self, request, *args, **kwargs):
+        raise MethodNotAllowed(request.method)
+
+    def destroy(self, request, *args, **kwargs):
+        try:
+            uploads.abort(self.get_object())
+        except uploads.UploadError as e:
+            return Response({'error': str(e)}, status=400)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['put'], url_path=r'parts/(?P<part_number>[0-9]+)')
+    def upload_part(self, request, pk=None, part_number=None):
+        """
+        📦 Parça Yükle
+        Gövde parse edilmez: request stream'i bloklar halinde depolamaya akar.
+        Aynı parça tekrar gönderilebilir (üzerine yazılır).
+        """
+        upload = self.get_object()
+        number = int(part_number)
+        size = _content_length(request)
+        if size <= 0:
+            return Response({'error': 'Content-Length gerekli'}, status=411)
+
+        try:
+            upload = uploads.receive_part(upload, number, request.stream, size)
+        except uploads.UploadError as e:
+            return Response({'error': str(e)}, status=400)
+        except StorageError as e:
+            return Response({'error': f'Depolama hatası: {e}'}, status=status.HTTP_502_BAD_GATEWAY)
+
+        return Response({
+            'part_number': number,
+            'etag': upload.parts[str(number)]['etag'],
+            'received_bytes': upload.received_bytes,
+            'total_size': upload.total_size
+        })
+
+    @action(detail=True, methods=['post'])
+    def presign(self, request, pk=None):
+        """
+        🔗 Presigned Parça URL'leri
+        Body: {"parts": [1, 2, 3]} (boşsa eksik parçalar, en fazla 100)
+        İstemci her parçayı kendi URL'ine PUT eder, cevaptaki ETag header'ını /confirm/ ile bildirir.
+        """
+        serializer = PresignPartsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            urls = uploads.presign_parts(self.get_object(), serializer.validated_data.get('parts'))
+        except uploads.UploadError as e:
+            return Response({'error': str(e)}, status=400)
+
+        return Response({
+            'expires_in': settings.UPLOAD_PART_URL_EXPIRY,
+            'urls': {str(n): request.build_absolute_uri(url) for n, url in urls.items()}
+        })
+
+    @action(detail=True, methods=['post'])
+    def confirm(self, request, pk=None):
+        """
+        ☑️ Parça Onayı (doğrudan yüklenen parçalar)
+        Body: {"parts": [{"part_number": 1, "etag": "\"9b2c...\""}]}
+        ETag ve boyut depolamadaki parça listesiyle doğrulanır.
+        """
+        serializer = ConfirmPartsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        claimed = {part['part_number']: part['etag'] for part in serializer.validated_data['parts']}
+        try:
+            upload = uploads.confirm_parts(self.get_object(), claimed)
+        except uploads.UploadError as e:
+            return Response({'error': str(e)}, status=400)
+        except StorageError as e:
+            return Response({'error': f'Depolama hatası: {e}'}, status=status.HTTP_502_BAD_GATEWAY)
+
+        return Response(self.get_serializer(upload).data)
+
+    @action(detail=True, methods=['post'])
+    def reuse(self, request, pk=None):
+        """
+        ♻️ Delta Yükleme (version_of dolu yüklemeler)
+        Body: {"parts": [{"part_number": 1, "etag": "<parçanın MD5'i>"}]} (en fazla 100)
+        Önceki versiyonda aynı olan parçalar depolamada kopyalanır; kalanlar normal yüklenir.
+        """
+        serializer = ConfirmPartsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        claimed = {part['part_number']: part['etag'] for part in serializer.validated_data['parts']}
+        try:
+            upload, reused = uploads.reuse_parts(self.get_object(), claimed)
+        except uploads.UploadError as e:
+            return Response({'error': str(e)}, status=400)
+        except StorageError as e:
+            return Response({'error': f'Depolama hatası: {e}'}, status=status.HTTP_502_BAD_GATEWAY)
+
+        return Response({'reused_parts': reused, 'upload': self.get_serializer(upload).data})
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """✅ Yüklemeyi Tamamla -> File"""
+        try:
+            upload = uploads.complete(self.get_object())
+        except uploads.UploadError as e:
+            return Response({'error': str(e)}, status=400)
+        except StorageError as e:
+            return Response({'error': f'Depolama hatası: {e}'}, status=status.HTTP_502_BAD_GATEWAY)
+
+        return Response({
+            'upload': self.get_serializer(upload).data,
+            'file': FileSerializer(upload.file, context=self.get_serializer_context()).data
+        }, status=status.HTTP_201_CREATED)
+
+
+class StoragePartView(APIView):
+    """
+    🗄️ Yerel Disk Presigned Parça URL'i (S3 yoksa, dev/test)
+    S3'teki presigned upload_part isteğinin karşılığı: yetki URL'deki imzalı token'dır,
+    cevapta S3 gibi ETag header'ı döner.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def put(self, request, token):
+        try:
+            key, upload_id, part_number, size = read_part_token(token)
+        except StorageError as e:
+            return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+
+        if _content_length(request) != size:
+            return Response({'error': f'Content-Length {size} olmalı'}, status=400)
+        try:
+            etag = backend.upload_part(key, upload_id, part_number, request.stream, size)
+        except StorageError as e:
+            return Response({'error': str(e)}, status=400)
+
+        response = Response(status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        return response
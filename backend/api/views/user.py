@@ -3,7 +3,8 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from api.models import User, AgencyMembership
-from api.serializers.user import UserSerializer, AgencyMembershipSerializer
+from api.serializers.user import UserSerializer, AgencyMembershipSerializer, prefetch_agency_memberships
+from api.services import membership as membership_cache
 from django.db.models import Q, Count
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -39,11 +40,8 @@ class UserViewSet(viewsets.ModelViewSet):
         """
         serializer = self.get_serializer(request.user)
         
-        # Extra info
-        membership = AgencyMembership.objects.filter(
-            user=request.user,
-            agency=request.user.current_agency
-        ).first()
+        # Extra info (yetkiler token claim'inden / cache'ten)
+        membership = membership_cache.for_request(request)
         
         extra = {
             'current_agency': {
@@ -51,8 +49,9 @@ class UserViewSet(viewsets.ModelViewSet):
                 'name': request.user.current_agency.name,
                 'plan': request.user.current_agency.plan
             } if request.user.current_agency else None,
-            'role': membership.role.name if membership and membership.role else None,
-            'is_owner': membership.is_owner if membership else False,
+            'role': membership['role'] if membership else None,
+            'is_owner': membership['is_owner'] if membership else False,
+            'permissions': membership['perms'] if membership else [],
         }
         
         return Response({
@@ -66,15 +65,14 @@ class UserViewSet(viewsets.ModelViewSet):
         👥 Ekip Listesi
         Agency'deki tüm aktif kullanıcılar
         """
-        team_members = self.get_queryset().select_related(
-            'current_agency'
-        ).prefetch_related('memberships')
+        # Üyelik + rol tek prefetch sorgusuyla (kullanıcı başına sorgu yok)
+        team_members = self.get_queryset().prefetch_related(
+            prefetch_agency_memberships(request.user.current_agency)
+        )
         
         result = []
         for user in team_members:
-            membership = user.memberships.filter(
-                agency=request.user.current_agency
-            ).first()
+            membership = next(iter(user.agency_memberships), None)
             
             result.append({
                 'id': user.id,
@@ -214,12 +212,9 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response({'error': 'role_id gerekli'}, status=400)
         
         # Permission check: Sadece owner değiştirebilir
-        requester_membership = AgencyMembership.objects.filter(
-            user=request.user,
-            agency=request.user.current_agency
-        ).first()
+        requester_membership = membership_cache.for_request(request)
         
-        if not requester_membership or not requester_membership.is_owner:
+        if not requester_membership or not requester_membership['is_owner']:
             return Response({'error': 'Sadece owner rol değiştirebilir'}, status=403)
         
         # Rol değiştir
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:25
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField()),
+                ('active_projects', models.IntegerField(default=0)),
+                ('pending_tasks', models.IntegerField(default=0)),
+                ('completed_tasks', models.IntegerField(default=0)),
+                ('urgent_tasks', models.IntegerField(default=0)),
+                ('monthly_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('agency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='agencies.agency')),
+            ],
+            options={
+                'verbose_name': 'Dashboard Özeti',
+                'ordering': ['-date'],
+                'unique_together': {('agency', 'date')},
+            },
+        ),
+    ]
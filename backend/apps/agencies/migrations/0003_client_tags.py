@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0002_dashboardsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='tags',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
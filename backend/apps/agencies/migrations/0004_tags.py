@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:51
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0003_client_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=100)),
+                ('normalized', models.CharField(max_length=100)),
+                ('usage_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Tag',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tags'], name='client_tags_gin', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='agency',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='agencies.agency'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['agency', '-usage_count'], name='tag_agency_usage_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='tag',
+            unique_together={('agency', 'normalized')},
+        ),
+    ]
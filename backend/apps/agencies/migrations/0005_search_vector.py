@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:55
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+from django.db import migrations
+
+from apps.core.search import install_trigger, remove_trigger
+
+SEARCH_TABLES = ('agencies_client',)
+
+
+def install_search_triggers(apps, schema_editor):
+    # Sadece Postgres: search_vector'ü trigger doldurur, mevcut satırlar burada indexlenir
+    for table in SEARCH_TABLES:
+        install_trigger(schema_editor.connection, table)
+
+
+def remove_search_triggers(apps, schema_editor):
+    for table in SEARCH_TABLES:
+        remove_trigger(schema_editor.connection, table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0004_tags'),
+    ]
+
+    operations = [
+        # gin_trgm_ops index'leri için (diğer uygulamaların arama migration'ları buna bağlı)
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.AddField(
+            model_name='client',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='client_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='client_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(install_search_triggers, remove_search_triggers),
+    ]
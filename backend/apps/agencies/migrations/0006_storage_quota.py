@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0005_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agency',
+            name='max_storage_gb',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Depolama Kotası (GB)'),
+        ),
+    ]
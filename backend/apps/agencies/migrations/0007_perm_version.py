@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0006_storage_quota'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agency',
+            name='perm_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0007_perm_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agency',
+            name='availability_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
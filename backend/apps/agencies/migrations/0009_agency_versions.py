@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:39
+
+import uuid
+from django.db import migrations, models
+
+
+def copy_availability_versions(apps, schema_editor):
+    # Sayaç kaldığı yerden devam etsin: eski bir motor versiyonu tekrar güncel sanılmasın
+    Agency = apps.get_model('agencies', 'Agency')
+    AgencyVersion = apps.get_model('agencies', 'AgencyVersion')
+    AgencyVersion.objects.bulk_create([
+        AgencyVersion(agency_id=agency_id, name='availability', value=value)
+        for agency_id, value in Agency.objects.filter(availability_version__gt=0).values_list('id', 'availability_version')
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0008_availability_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgencyVersion',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('agency_id', models.UUIDField()),
+                ('name', models.CharField(max_length=30)),
+                ('value', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('agency_id', 'name')},
+            },
+        ),
+        migrations.RunPython(copy_availability_versions, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='agency',
+            name='availability_version',
+        ),
+    ]
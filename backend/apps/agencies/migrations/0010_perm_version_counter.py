@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def copy_perm_versions(apps, schema_editor):
+    # Sayaç kaldığı yerden devam etsin: eski versiyonlu token claim'leri tekrar geçerli olmasın
+    Agency = apps.get_model('agencies', 'Agency')
+    AgencyVersion = apps.get_model('agencies', 'AgencyVersion')
+    AgencyVersion.objects.bulk_create([
+        AgencyVersion(agency_id=agency_id, name='permissions', value=value)
+        for agency_id, value in Agency.objects.filter(perm_version__gt=0).values_list('id', 'perm_version')
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0009_agency_versions'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_perm_versions, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='agency',
+            name='perm_version',
+        ),
+    ]
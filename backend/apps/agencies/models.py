@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from apps.core.models import BaseModel
 
@@ -11,6 +13,12 @@ class Agency(BaseModel):
         ('pro', 'Pro'),
         ('enterprise', 'Enterprise'),
     )
+    # Plan başına depolama kotası (GB), None = sınırsız
+    PLAN_STORAGE_GB = {
+        'free': 5,
+        'pro': 1024,
+        'enterprise': None,
+    }
 
     name = models.CharField(max_length=255, verbose_name="Ajans Adı")
     slug = models.SlugField(unique=True, verbose_name="URL Slug")
@@ -18,6 +26,8 @@ class Agency(BaseModel):
     
     logo = models.ImageField(upload_to='agency_logos/', null=True, blank=True)
     plan = models.CharField(max_length=20, choices=PLAN_CHOICES, default='free')
+    # Boşsa planın kotası (PLAN_STORAGE_GB)
+    max_storage_gb = models.PositiveIntegerField(null=True, blank=True, verbose_name="Depolama Kotası (GB)")
     
     is_active = models.BooleanField(default=True)
     settings = models.JSONField(default=dict, blank=True)
@@ -29,6 +39,18 @@ class Agency(BaseModel):
     def __str__(self):
         return self.name
 
+    @property
+    def storage_limit_gb(self):
+        if self.max_storage_gb is not None:
+            return self.max_storage_gb
+        return self.PLAN_STORAGE_GB.get(self.plan)
+
+    @property
+    def storage_limit_bytes(self):
+        """Depolama kotası (byte), None = sınırsız"""
+        limit = self.storage_limit_gb
+        return None if limit is None else limit * 1024 ** 3
+
 class AgencyRole(BaseModel):
     """
     Her ajansın kendi tanımladığı dinamik roller.
@@ -52,6 +74,25 @@ class AgencyRole(BaseModel):
     def __str__(self):
         return f"{self.name} ({self.agency.name})"
 
+class AgencyVersion(BaseModel):
+    """
+    Ajans başına monoton sayaçlar (örn: 'availability'): değişiklikle aynı transaction'da
+    artar, hiç azalmaz (bkz. api/services/versions.py).
+    Agency satırında tutulmaz: sık artan sayaç ajans satırını kilitlemesin, Agency.save()
+    eski değeri geri yazmasın. agency_id FK değil: ajans silinirken (cascade sırasında)
+    gelen artırmalar kısıta takılmaz, satırlar ajans silinince temizlenir.
+    """
+    agency_id = models.UUIDField()
+    name = models.CharField(max_length=30)
+    value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('agency_id', 'name')
+
+    def __str__(self):
+        return f"{self.agency_id} - {self.name}: {self.value}"
+
+
 class AgencyAwareModel(BaseModel):
     """
     Ajansa bağlı her model bu sınıfı miras almalı.
@@ -71,7 +112,58 @@ class Client(AgencyAwareModel):
     tax_office = models.CharField(max_length=100, blank=True)
     tax_number = models.CharField(max_length=50, blank=True)
     notes = models.TextField(blank=True)
+    tags = models.JSONField(default=list, blank=True) # ["VIP", "Kurumsal"]
+    # Full-text arama: Postgres trigger'ı doldurur (apps/core/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # tags @> '["VIP"]' sorguları için (sadece Postgres, bkz. api/services/tags.py)
+            GinIndex(fields=['tags'], opclasses=['jsonb_path_ops'], name='client_tags_gin'),
+            GinIndex(fields=['search_vector'], name='client_search_gin'),
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='client_name_trgm'),
+        ]
 
     def __str__(self):
         return self.name
 
+
+class Tag(AgencyAwareModel):
+    """
+    Ajansın tag sözlüğü.
+    Client / Project / File tags alanlarındaki her tag burada bir kez bulunur:
+    autocomplete kullanım sayısına göre sıralanır, 'vip' / 'VIP' gibi yazımlar tek tag'de birleşir.
+    """
+    name = models.CharField(max_length=100)
+    normalized = models.CharField(max_length=100) # Karşılaştırma anahtarı (casefold)
+    usage_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('agency', 'normalized')
+        indexes = [models.Index(fields=['agency', '-usage_count'], name='tag_agency_usage_idx')]
+        verbose_name = "Tag"
+
+    def __str__(self):
+        return self.name
+
+
+
+class DashboardSnapshot(AgencyAwareModel):
+    """
+    Ajansın günlük dashboard istatistikleri.
+    Trend değerleri (haftalık/aylık değişim) bu kayıtlardan hesaplanır.
+    """
+    date = models.DateField()
+    active_projects = models.IntegerField(default=0)
+    pending_tasks = models.IntegerField(default=0)
+    completed_tasks = models.IntegerField(default=0)
+    urgent_tasks = models.IntegerField(default=0)
+    monthly_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('agency', 'date')
+        ordering = ['-date']
+        verbose_name = "Dashboard Özeti"
+
+    def __str__(self):
+        return f"{self.agency_id} - {self.date}"
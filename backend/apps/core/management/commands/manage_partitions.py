@@ -0,0 +1,55 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.core import partitioning
+
+
+class Command(BaseCommand):
+    """
+    Aylık partition bakımı (Celery Beat: api.tasks.maintain_partitions)
+    - Önümüzdeki PARTITION_MONTHS_AHEAD ayın partition'larını açar
+    - En uzun plan saklama süresini aşan ayların partition'larını DROP eder
+    """
+    help = "Notification / AuditLog aylık partition'larını oluşturur ve süresi dolanları siler"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Değişiklik yapmadan oluşturulacak/silinecek partition'ları listele")
+
+    def handle(self, *args, **options):
+        if not partitioning.is_supported(connection):
+            self.stdout.write("Partitioning sadece PostgreSQL'de destekleniyor, atlandı.")
+            return
+
+        months_ahead = getattr(settings, 'PARTITION_MONTHS_AHEAD', 3)
+        current = partitioning.month_start(timezone.now())
+
+        for label in partitioning.PARTITIONED_MODELS:
+            table = apps.get_model(label)._meta.db_table
+            with transaction.atomic(), connection.cursor() as cursor:
+                if not partitioning.is_partitioned(cursor, table):
+                    self.stdout.write(self.style.WARNING(f"{table} partitioned değil (migrate çalıştırıldı mı?)"))
+                    continue
+
+                dry_run = options['dry_run']
+                if dry_run:
+                    created = [
+                        partitioning.partition_name(table, month)
+                        for month in partitioning.missing_partitions(cursor, table, months_ahead)
+                    ]
+                else:
+                    created = partitioning.ensure_partitions(cursor, table, months_ahead)
+
+                dropped = []
+                months = partitioning.retention_months(label)
+                if months:
+                    cutoff = partitioning.add_months(current, -months + 1)
+                    if dry_run:
+                        dropped = partitioning.expired_partitions(cursor, table, cutoff)
+                    else:
+                        dropped = partitioning.drop_partitions_before(cursor, table, cutoff)
+
+            verb = ('oluşturulacak', 'silinecek') if dry_run else ('oluşturuldu', 'silindi')
+            self.stdout.write(f"{table}: {created} {verb[0]}, {dropped} {verb[1]}")
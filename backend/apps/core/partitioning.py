@@ -0,0 +1,289 @@
+"""
+🗂️ Aylık Tablo Bölümleme (Postgres declarative partitioning)
+
+Büyüyen log tabloları (Notification, AuditLog) created_at üzerinden aylık
+RANGE partition'lara bölünür:
+- Listeleme sorguları sadece ilgili ayların partition'larını tarar (partition pruning)
+- Saklama süresi dolan ay DELETE ile değil, partition DROP ile silinir
+- Gelecek ayların partition'ları `manage_partitions` komutu (Celery Beat) ile önceden açılır
+- Partition'ı henüz açılmamış bir aya düşen kayıt (ileri/geri tarihli created_at, kaçan
+  bakım) insert'i hata vermez, DEFAULT partition'a yazılır; o ayın partition'ı açılırken
+  kayıtları DEFAULT'tan taşınır
+
+Postgres dışındaki veritabanlarında (dev/test sqlite) tablolar normal kalır,
+fonksiyonlar hiçbir şey yapmaz.
+
+Kısıtlar:
+- Partitioned tabloda primary key partition anahtarını içermek zorunda: (id, created_at)
+- Parent tabloda partition anahtarı olmayan UNIQUE kısıt olamaz; bu tür kısıtlar
+  her partition'da ayrı unique index olarak açılır (LOCAL_UNIQUE_INDEXES)
+"""
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+PARTITION_KEY = 'created_at'
+
+# model label -> saklama süresi ayarı (plan -> ay)
+PARTITIONED_MODELS = {
+    'users.Notification': 'NOTIFICATION_RETENTION_MONTHS',
+    'users.AuditLog': 'AUDIT_LOG_RETENTION_MONTHS',
+}
+
+# Tablo -> partition başına açılacak unique index'ler: (ad soneki, kolonlar, WHERE)
+LOCAL_UNIQUE_INDEXES = {
+    # Aynı olay için tekrar bildirim gitmesin (bkz. Notification.dedup_key)
+    'users_notification': [('dedup', '(recipient_id, dedup_key)', "dedup_key <> ''")],
+}
+
+
+def is_supported(connection):
+    return connection.vendor == 'postgresql'
+
+
+def month_start(value):
+    if isinstance(value, datetime.datetime):
+        value = timezone.localtime(value, datetime.timezone.utc).date() if timezone.is_aware(value) else value.date()
+    return value.replace(day=1)
+
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return datetime.date(month.year + years, month_index + 1, 1)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def retention_months(model_label, plan=None):
+    """
+    Planın saklama süresi (ay). plan verilmezse en uzun süre döner:
+    partition'lar tüm ajanslarca paylaşıldığından ancak o süre dolunca silinebilir.
+    """
+    retention = getattr(settings, PARTITIONED_MODELS[model_label], {})
+    if plan is None:
+        return max(retention.values()) if retention else None
+    return retention.get(plan)
+
+
+def retention_cutoff(model_label, plan):
+    """Bu plandaki ajans için görünür en eski kayıt zamanı (None: sınırsız)"""
+    months = retention_months(model_label, plan)
+    if not months:
+        return None
+    start = add_months(month_start(timezone.now()), -months + 1)
+    return datetime.datetime.combine(start, datetime.time.min, tzinfo=datetime.timezone.utc)
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def _quote(name):
+    return '"%s"' % name.replace('"', '""')
+
+
+def is_partitioned(cursor, table):
+    cursor.execute(
+        "SELECT c.relkind FROM pg_class c "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relname = %s AND n.nspname = current_schema()",
+        [table]
+    )
+    row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def list_partitions(cursor, table):
+    """{ay başı (date): partition adı}"""
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = %s",
+        [table]
+    )
+    prefix = f'{table}_p'
+    partitions = {}
+    for (name,) in cursor.fetchall():
+        suffix = name[len(prefix):]
+        if name.startswith(prefix) and len(suffix) == 6 and suffix.isdigit():
+            partitions[datetime.date(int(suffix[:4]), int(suffix[4:]), 1)] = name
+    return partitions
+
+
+def _create_local_indexes(cursor, table, name):
+    for suffix, columns, where in LOCAL_UNIQUE_INDEXES.get(table, []):
+        cursor.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {_quote(f'{name}_{suffix}_uniq')} "
+            f"ON {_quote(name)} {columns} WHERE {where}"
+        )
+
+
+def has_default_partition(cursor, table):
+    cursor.execute(
+        "SELECT 1 FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = %s AND child.relname = %s",
+        [table, default_partition_name(table)]
+    )
+    return cursor.fetchone() is not None
+
+
+def create_default_partition(cursor, table):
+    name = default_partition_name(table)
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {_quote(name)} PARTITION OF {_quote(table)} DEFAULT")
+    _create_local_indexes(cursor, table, name)
+    return name
+
+
+def create_partition(cursor, table, month):
+    """
+    Ayın partition'ını açar. DEFAULT partition'da o aya ait kayıt varsa Postgres
+    partition'ı eklemeye izin vermez: DEFAULT ayrılır, partition açılır, kayıtlar
+    taşınır ve DEFAULT geri bağlanır (çağıran transaction içinde, tablo kilitli)
+    """
+    name = partition_name(table, month)
+    start = f"'{month.isoformat()} 00:00:00+00'"
+    end = f"'{add_months(month, 1).isoformat()} 00:00:00+00'"
+    default = default_partition_name(table)
+
+    moving = False
+    if has_default_partition(cursor, table):
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {_quote(default)} "
+            f"WHERE {PARTITION_KEY} >= {start} AND {PARTITION_KEY} < {end})"
+        )
+        moving = cursor.fetchone()[0]
+    if moving:
+        cursor.execute(f"ALTER TABLE {_quote(table)} DETACH PARTITION {_quote(default)}")
+
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {_quote(name)} PARTITION OF {_quote(table)} "
+        f"FOR VALUES FROM ({start}) TO ({end})"
+    )
+    _create_local_indexes(cursor, table, name)
+
+    if moving:
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {_quote(default)} "
+            f"WHERE {PARTITION_KEY} >= {start} AND {PARTITION_KEY} < {end} RETURNING *) "
+            f"INSERT INTO {_quote(table)} SELECT * FROM moved"
+        )
+        cursor.execute(f"ALTER TABLE {_quote(table)} ATTACH PARTITION {_quote(default)} DEFAULT")
+    return name
+
+
+def missing_partitions(cursor, table, months_ahead, start=None):
+    """start (varsayılan: bu ay) ile bu aydan months_ahead sonrası arasında partition'ı olmayan aylar"""
+    current = month_start(timezone.now())
+    month = month_start(start) if start else current
+    existing = list_partitions(cursor, table)
+    missing = []
+    while month <= add_months(current, months_ahead):
+        if month not in existing:
+            missing.append(month)
+        month = add_months(month, 1)
+    return missing
+
+
+def ensure_partitions(cursor, table, months_ahead, start=None):
+    """
+    Eksik aylık partition'ları (ve yoksa DEFAULT partition'ı) açar; transaction içinde çağrılmalı.
+    Returns: oluşturulan aylık partition adları
+    """
+    create_default_partition(cursor, table)
+    return [create_partition(cursor, table, month) for month in missing_partitions(cursor, table, months_ahead, start)]
+
+
+def expired_partitions(cursor, table, cutoff_month):
+    """Tamamı cutoff_month'tan önce kalan partition adları"""
+    return [
+        name for month, name in sorted(list_partitions(cursor, table).items())
+        if add_months(month, 1) <= cutoff_month
+    ]
+
+
+def drop_partitions_before(cursor, table, cutoff_month):
+    """
+    Süresi dolan partition'ları ayırıp siler (DROP). DEFAULT partition'a düşmüş
+    eski kayıtlar silinmez, DELETE ile temizlenir.
+    """
+    dropped = expired_partitions(cursor, table, cutoff_month)
+    for name in dropped:
+        cursor.execute(f"ALTER TABLE {_quote(table)} DETACH PARTITION {_quote(name)}")
+        cursor.execute(f"DROP TABLE {_quote(name)}")
+    if has_default_partition(cursor, table):
+        cursor.execute(
+            f"DELETE FROM {_quote(default_partition_name(table))} "
+            f"WHERE {PARTITION_KEY} < '{cutoff_month.isoformat()} 00:00:00+00'"
+        )
+    return dropped
+
+
+def convert_to_partitioned(connection, table, months_ahead=3):
+    """
+    Mevcut tabloyu aylık partitioned tabloya çevirir (migration'dan çağrılır).
+    Index ve foreign key'ler aynı adlarla yeniden oluşturulur, veriler taşınır.
+    """
+    if not is_supported(connection):
+        return
+
+    with connection.cursor() as cursor:
+        if is_partitioned(cursor, table):
+            return
+        legacy = f'{table}_legacy'
+
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'",
+            [table]
+        )
+        primary_key = cursor.fetchone()[0]
+
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype IN ('f', 'c')",
+            [table]
+        )
+        constraints = cursor.fetchall()
+
+        # Kısıtlara bağlı olmayan index'ler (Django'nun FK / Meta.indexes index'leri)
+        cursor.execute(
+            "SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x "
+            "JOIN pg_class i ON i.oid = x.indexrelid "
+            "WHERE x.indrelid = %s::regclass "
+            "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)",
+            [table]
+        )
+        indexes = cursor.fetchall()
+
+        cursor.execute(f"ALTER TABLE {_quote(table)} RENAME TO {_quote(legacy)}")
+        cursor.execute(f"ALTER TABLE {_quote(legacy)} DROP CONSTRAINT {_quote(primary_key)}")
+        for name, _ in constraints:
+            cursor.execute(f"ALTER TABLE {_quote(legacy)} DROP CONSTRAINT {_quote(name)}")
+        for name, _ in indexes:
+            cursor.execute(f"DROP INDEX {_quote(name)}")
+
+        cursor.execute(
+            f"CREATE TABLE {_quote(table)} (LIKE {_quote(legacy)} INCLUDING DEFAULTS) "
+            f"PARTITION BY RANGE ({PARTITION_KEY})"
+        )
+        cursor.execute(
+            f"ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(primary_key)} PRIMARY KEY (id, {PARTITION_KEY})"
+        )
+
+        cursor.execute(f"SELECT MIN({PARTITION_KEY}) FROM {_quote(legacy)}")
+        oldest = cursor.fetchone()[0]
+        ensure_partitions(cursor, table, months_ahead, start=oldest)
+
+        cursor.execute(f"INSERT INTO {_quote(table)} SELECT * FROM {_quote(legacy)}")
+        cursor.execute(f"DROP TABLE {_quote(legacy)}")
+
+        # Index'ler veri taşındıktan sonra (daha hızlı); pg_get_indexdef tablo adını içerir
+        for _, definition in indexes:
+            cursor.execute(definition)
+        for name, definition in constraints:
+            cursor.execute(f"ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(name)} {definition}")
@@ -0,0 +1,80 @@
+"""
+🔎 Full-Text Arama Index'i (Postgres tsvector + trigger)
+
+Aranabilir modellerde `search_vector` (tsvector) kolonu bulunur:
+- Kolonu Postgres trigger'ı doldurur (INSERT / ilgili kolonların UPDATE'i):
+  save(), bulk_create, queryset.update() ve raw SQL'de de güncel kalır,
+  Python tarafında sinyal gerekmez
+- Türkçe stemming ('turkish' config): "çekimler" araması "çekim" geçen kaydı bulur
+- Kolonlar ağırlıklıdır (A: başlık, B: müşteri/marka vb., C: açıklama);
+  sıralama (ts_rank) başlıkta geçen kaydı öne alır
+- Başlık alanlarında ayrıca trigram (pg_trgm) GIN index'i vardır: yazım hatası /
+  kelime ortası eşleşmeleri için (bkz. api/services/search.py)
+
+Postgres dışındaki veritabanlarında (dev/test sqlite) kolon boş kalır,
+fonksiyonlar hiçbir şey yapmaz; arama ILIKE'a döner.
+"""
+SEARCH_CONFIG = 'turkish'
+SEARCH_VECTOR_FIELD = 'search_vector'
+
+# tablo -> [(kolon, ağırlık)]
+SEARCH_COLUMNS = {
+    'projects_project': [('title', 'A'), ('client_name', 'B'), ('description', 'C')],
+    'tasks_task': [('title', 'A'), ('description', 'C')],
+    'agencies_client': [('name', 'A'), ('contact_person', 'B'), ('email', 'B'), ('phone', 'B'), ('notes', 'C')],
+    'projects_file': [('original_name', 'A'), ('description', 'C')],
+    'equipment_equipment': [('name', 'A'), ('brand', 'B'), ('model', 'B'), ('serial_number', 'B'), ('notes', 'C')],
+}
+
+
+def is_supported(connection):
+    return connection.vendor == 'postgresql'
+
+
+def _vector_sql(connection, columns, row=''):
+    quote = connection.ops.quote_name
+    return ' || '.join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({row}{quote(column)}, '')), '{weight}')"
+        for column, weight in columns
+    )
+
+
+def _names(table):
+    return f'{table}_search_vector_update', f'{table}_search_vector'
+
+
+def install_trigger(connection, table):
+    """
+    search_vector'ü güncel tutan trigger'ı kurar ve mevcut satırları doldurur.
+    Tekrar çalıştırılabilir (kolon listesi değişince yeni migration'da yeniden çağrılır).
+    """
+    if not is_supported(connection):
+        return
+    columns = SEARCH_COLUMNS[table]
+    function, trigger = _names(table)
+    quote = connection.ops.quote_name
+    watched = ', '.join(quote(column) for column, _ in columns)
+    vector = quote(SEARCH_VECTOR_FIELD)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$ "
+            f"BEGIN NEW.{vector} := {_vector_sql(connection, columns, 'NEW.')}; RETURN NEW; END "
+            f"$$ LANGUAGE plpgsql"
+        )
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger} ON {quote(table)}")
+        # UPDATE OF: sadece aranan kolonlar SET'te ise (sayaç güncellemeleri vektörü yeniden hesaplamaz)
+        cursor.execute(
+            f"CREATE TRIGGER {trigger} BEFORE INSERT OR UPDATE OF {watched}, {vector} "
+            f"ON {quote(table)} FOR EACH ROW EXECUTE FUNCTION {function}()"
+        )
+        cursor.execute(f"UPDATE {quote(table)} SET {vector} = {_vector_sql(connection, columns)}")
+
+
+def remove_trigger(connection, table):
+    if not is_supported(connection):
+        return
+    function, trigger = _names(table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger} ON {connection.ops.quote_name(table)}")
+        cursor.execute(f"DROP FUNCTION IF EXISTS {function}()")
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0002_dashboardsnapshot'),
+        ('equipment', '0002_initial'),
+        ('projects', '0003_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipmentreservation',
+            index=models.Index(fields=['agency', 'start_date', 'id'], name='reservation_agency_start_idx'),
+        ),
+    ]
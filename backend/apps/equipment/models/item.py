@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from apps.agencies.models import AgencyAwareModel
 from apps.users.models import User
@@ -32,9 +34,16 @@ class Equipment(AgencyAwareModel):
     notes = models.TextField(blank=True)
     images = models.JSONField(default=list, blank=True)
 
+    # Full-text arama: Postgres trigger'ı doldurur (apps/core/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         verbose_name = "Ekipman"
         verbose_name_plural = "Ekipmanlar"
+        indexes = [
+            GinIndex(fields=['search_vector'], name='equipment_search_gin'),
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='equipment_name_trgm'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.status})"
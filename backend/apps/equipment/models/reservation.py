@@ -32,6 +32,9 @@ class EquipmentReservation(AgencyAwareModel):
         ordering = ['start_date']
         verbose_name = "Rezervasyon"
         verbose_name_plural = "Rezervasyonlar"
+        indexes = [
+            models.Index(fields=['agency', 'start_date', 'id'], name='reservation_agency_start_idx'),
+        ]
 
     def __str__(self):
         return f"{self.equipment.name} -> {self.reserved_by.email} ({self.status})"
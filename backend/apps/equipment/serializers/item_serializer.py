@@ -8,5 +8,5 @@ class EquipmentSerializer(AgencyModelSerializer):
 
     class Meta:
         model = Equipment
-        fields = '__all__'
+        exclude = ['search_vector']
         read_only_fields = ['created_by', 'agency', 'qr_code']
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0002_dashboardsnapshot'),
+        ('projects', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['agency', '-created_at', '-id'], name='file_agency_created_idx'),
+        ),
+    ]
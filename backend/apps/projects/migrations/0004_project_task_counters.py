@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:45
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    Task = apps.get_model('tasks', 'Task')
+
+    def count(queryset):
+        subquery = queryset.order_by().values('project').annotate(c=Count('*')).values('c')
+        return Coalesce(Subquery(subquery, output_field=IntegerField()), Value(0))
+
+    tasks = Task.objects.filter(project=OuterRef('pk'))
+    Project.objects.update(
+        tasks_total=count(tasks),
+        tasks_done=count(tasks.filter(status='done'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_keyset_pagination_indexes'),
+        ('tasks', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='tasks_done',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_total',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
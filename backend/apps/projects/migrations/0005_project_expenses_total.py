@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:46
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_expenses_total(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    Expense = apps.get_model('projects', 'Expense')
+
+    output = DecimalField(max_digits=14, decimal_places=2)
+    spent = Expense.objects.filter(
+        project=OuterRef('pk'),
+        status__in=('approved', 'paid')
+    ).order_by().values('project').annotate(
+        total=Sum(F('amount') * F('exchange_rate'), output_field=output)
+    ).values('total')
+    Project.objects.update(
+        expenses_total=Coalesce(Subquery(spent, output_field=output), Value(Decimal('0')), output_field=output)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_project_task_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='expenses_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.RunPython(backfill_expenses_total, migrations.RunPython.noop),
+    ]
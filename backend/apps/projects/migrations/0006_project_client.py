@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def link_clients(apps, schema_editor):
+    """
+    Serbest metin client_name'i aynı ajanstaki birebir aynı isimli CRM kaydına bağla.
+    Büyük/küçük harf farkı eşleşmez: benzer isimli başka müşteriye bağlanmaktansa boş kalır
+    """
+    Project = apps.get_model('projects', 'Project')
+    Client = apps.get_model('agencies', 'Client')
+    match = Client.objects.filter(
+        agency=OuterRef('agency'),
+        name=OuterRef('client_name')
+    ).order_by('created_at').values('pk')[:1]
+    Project.objects.filter(client__isnull=True).exclude(client_name='').update(client=Subquery(match))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0003_client_tags'),
+        ('projects', '0005_project_expenses_total'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='client',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='projects', to='agencies.client'),
+        ),
+        migrations.RunPython(link_clients, migrations.RunPython.noop),
+    ]
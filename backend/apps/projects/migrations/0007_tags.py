@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:51
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations
+
+
+def build_tag_dictionary(apps, schema_editor):
+    """
+    Mevcut tags alanlarından ajans başına tag sözlüğünü kurar.
+    Aynı tag'in farklı yazımları ('vip', 'VIP') ilk görülen yazımda birleştirilir.
+    """
+    Tag = apps.get_model('agencies', 'Tag')
+    models = [apps.get_model('agencies', 'Client'), apps.get_model('projects', 'Project'), apps.get_model('projects', 'File')]
+
+    names = {}   # (agency_id, key) -> yazım
+    counts = {}  # (agency_id, key) -> kullanım
+    for model in models:
+        for pk, agency_id, tags in model.objects.values_list('pk', 'agency_id', 'tags').iterator():
+            if not isinstance(tags, list):
+                continue
+            seen = set()
+            canonical = []
+            for tag in tags:
+                name = ' '.join(tag.split())[:100] if isinstance(tag, str) else ''
+                key = (agency_id, name.casefold())
+                if not name or key in seen:
+                    continue
+                seen.add(key)
+                names.setdefault(key, name)
+                canonical.append(names[key])
+            for key in seen:
+                counts[key] = counts.get(key, 0) + 1
+            if canonical != tags:
+                model.objects.filter(pk=pk).update(tags=canonical)
+
+    Tag.objects.bulk_create(
+        [
+            Tag(agency_id=agency_id, name=names[(agency_id, key)], normalized=key, usage_count=count)
+            for (agency_id, key), count in counts.items()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0004_tags'),
+        ('projects', '0006_project_client'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='file',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tags'], name='file_tags_gin', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tags'], name='project_tags_gin', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.RunPython(build_tag_dictionary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:55
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+from apps.core.search import install_trigger, remove_trigger
+
+SEARCH_TABLES = ('projects_project', 'projects_file')
+
+
+def install_search_triggers(apps, schema_editor):
+    # Sadece Postgres: search_vector'ü trigger doldurur, mevcut satırlar burada indexlenir
+    for table in SEARCH_TABLES:
+        install_trigger(schema_editor.connection, table)
+
+
+def remove_search_triggers(apps, schema_editor):
+    for table in SEARCH_TABLES:
+        remove_trigger(schema_editor.connection, table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0005_search_vector'),
+        ('projects', '0007_tags'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='file_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['original_name'], name='file_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='project_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='project_title_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(install_search_triggers, remove_search_triggers),
+    ]
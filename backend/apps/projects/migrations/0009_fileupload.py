@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:59
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0005_search_vector'),
+        ('projects', '0008_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('original_name', models.CharField(max_length=255)),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('tags', models.JSONField(blank=True, default=list)),
+                ('total_size', models.BigIntegerField()),
+                ('part_size', models.BigIntegerField()),
+                ('storage_key', models.CharField(max_length=500)),
+                ('storage_upload_id', models.CharField(max_length=255)),
+                ('parts', models.JSONField(blank=True, default=dict)),
+                ('received_bytes', models.BigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('uploading', 'Yükleniyor'), ('completed', 'Tamamlandı'), ('aborted', 'İptal')], default='uploading', max_length=20)),
+                ('expires_at', models.DateTimeField()),
+                ('agency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='agencies.agency')),
+                ('file', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload', to='projects.file')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='projects.project')),
+                ('uploaded_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='file_uploads', to=settings.AUTH_USER_MODEL)),
+                ('version_of', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='pending_versions', to='projects.file')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='upload_status_expires_idx')],
+            },
+        ),
+    ]
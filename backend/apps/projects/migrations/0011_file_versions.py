@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_roots(apps, schema_editor):
+    # Eski dosyalar kendi zincirlerinin ilk halkası (eski versiyonlar isimden tahmin edilmez)
+    File = apps.get_model('projects', 'File')
+    File.objects.filter(root__isnull=True).update(root=F('id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0010_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='projects.file'),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='root',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lineage', to='projects.file'),
+        ),
+        migrations.RunPython(backfill_roots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='file',
+            constraint=models.UniqueConstraint(fields=('root', 'version'), name='file_root_version_uniq'),
+        ),
+    ]
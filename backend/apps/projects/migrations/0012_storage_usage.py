@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:13
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+
+
+def backfill_usage(apps, schema_editor):
+    # Mevcut dosyalardan sayaçları oluştur (api/services/storage_usage.reconcile ile aynı hesap)
+    File = apps.get_model('projects', 'File')
+    Blob = apps.get_model('projects', 'Blob')
+    StorageUsage = apps.get_model('projects', 'StorageUsage')
+
+    counters = {}
+    for row in File.objects.order_by().values('agency_id', 'file_type').annotate(
+        total=Sum('file_size'), count=Count('id'), unhashed=Sum('file_size', filter=Q(blob__isnull=True))
+    ):
+        counters[row['agency_id'], row['file_type']] = [row['total'] or 0, row['count'], row['unhashed'] or 0]
+
+    owner_type = File.objects.filter(blob=OuterRef('pk')).order_by('created_at').values('file_type')[:1]
+    blobs = Blob.objects.annotate(file_type=Subquery(owner_type))
+    for row in blobs.order_by().values('agency_id', 'file_type').annotate(total=Sum('size')):
+        counters.setdefault((row['agency_id'], row['file_type'] or 'unknown'), [0, 0, 0])[2] += row['total'] or 0
+
+    StorageUsage.objects.bulk_create([
+        StorageUsage(agency_id=agency_id, file_type=file_type, total_bytes=total, file_count=count, physical_bytes=physical)
+        for (agency_id, file_type), (total, count, physical) in counters.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0006_storage_quota'),
+        ('projects', '0011_file_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageUsage',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('file_type', models.CharField(max_length=50)),
+                ('total_bytes', models.BigIntegerField(default=0)),
+                ('file_count', models.IntegerField(default=0)),
+                ('physical_bytes', models.BigIntegerField(default=0)),
+                ('agency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='agencies.agency')),
+            ],
+            options={
+                'unique_together': {('agency', 'file_type')},
+            },
+        ),
+        migrations.RunPython(backfill_usage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:30
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0008_availability_version'),
+        ('projects', '0012_storage_usage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageReservation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('size', models.BigIntegerField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('agency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='agencies.agency')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
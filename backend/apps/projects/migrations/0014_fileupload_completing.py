@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0013_storage_reservation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fileupload',
+            name='status',
+            field=models.CharField(choices=[('uploading', 'Yükleniyor'), ('completing', 'Tamamlanıyor'), ('completed', 'Tamamlandı'), ('aborted', 'İptal')], default='uploading', max_length=20),
+        ),
+    ]
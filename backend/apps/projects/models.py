@@ -1,6 +1,8 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from apps.core.models import BaseModel
-from apps.agencies.models import AgencyAwareModel
+from apps.agencies.models import AgencyAwareModel, Client
 from apps.users.models import User
 
 class Project(AgencyAwareModel):
@@ -27,7 +29,8 @@ class Project(AgencyAwareModel):
     title = models.CharField(max_length=255, verbose_name="Proje Başlığı")
     description = models.TextField(blank=True, verbose_name="Açıklama")
     
-    # Müşteri (Şimdilik string, ileride Client modeline bağlanabilir)
+    # Müşteri: CRM kaydı (client) + serbest metin (eski kayıtlar / CRM'de olmayan müşteri)
+    client = models.ForeignKey(Client, on_delete=models.SET_NULL, null=True, blank=True, related_name='projects')
     client_name = models.CharField(max_length=255, blank=True, verbose_name="Müşteri")
     
     status = models.CharField(max_length=30, choices=STATUS_CHOICES, default='standard_planning')
@@ -46,6 +49,23 @@ class Project(AgencyAwareModel):
     
     tags = models.JSONField(default=list, blank=True) # ["Klip", "Dış Çekim"]
 
+    # Denormalize görev sayaçları (proje listesi COUNT yapmasın)
+    # Task kaydedilince/silinince api/services/project_stats.py günceller
+    tasks_total = models.PositiveIntegerField(default=0, editable=False)
+    tasks_done = models.PositiveIntegerField(default=0, editable=False)
+    # Onaylanan/ödenen giderlerin toplamı (kur çevrilmiş), Expense yazılınca güncellenir
+    expenses_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+
+    # Full-text arama: Postgres trigger'ı doldurur (apps/core/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['tags'], opclasses=['jsonb_path_ops'], name='project_tags_gin'),
+            GinIndex(fields=['search_vector'], name='project_search_gin'),
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='project_title_trgm'),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.get_status_display()})"
 
@@ -62,20 +82,143 @@ class Location(AgencyAwareModel):
     def __str__(self):
         return self.name
 
+class Blob(AgencyAwareModel):
+    """
+    İçerik adresli depolama: aynı içerik (SHA-256) ajans içinde bir kez saklanır.
+    Aynı çekimin farklı projelere / versiyonlara yüklenmesi yeni kopya oluşturmaz,
+    File kayıtları aynı blob'u gösterir (bkz. api/services/blobs.py)
+    """
+    sha256 = models.CharField(max_length=64)
+    size = models.BigIntegerField()
+    content_type = models.CharField(max_length=100, blank=True)
+    storage_key = models.CharField(max_length=500)
+    # Bu blob'u gösteren File sayısı; 0'a inince object depolamadan silinir
+    ref_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('agency', 'sha256')
+
+    def __str__(self):
+        return self.sha256
+
+
 class File(AgencyAwareModel):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='files')
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='uploaded_files')
     file = models.FileField(upload_to='project_files/')
+    # İçerik (hash'lenince bağlanır; boşsa henüz hash'lenmedi, bkz. api/tasks.py hash_pending_files)
+    blob = models.ForeignKey(Blob, on_delete=models.RESTRICT, null=True, blank=True, related_name='files')
     original_name = models.CharField(max_length=255)
     file_type = models.CharField(max_length=50, blank=True)
     file_size = models.BigIntegerField(default=0)
+    # Versiyon zinciri: root = ilk versiyon (kendisi dahil tüm versiyonlarda aynı),
+    # parent = türetildiği versiyon. version zincirde artan numara (bkz. api/services/file_versions.py)
+    root = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='lineage')
+    parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='children')
     version = models.IntegerField(default=1)
     description = models.TextField(blank=True)
     tags = models.JSONField(default=list, blank=True)
-    
+    # Full-text arama: Postgres trigger'ı doldurur (apps/core/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['agency', '-created_at', '-id'], name='file_agency_created_idx'),
+            GinIndex(fields=['tags'], opclasses=['jsonb_path_ops'], name='file_tags_gin'),
+            GinIndex(fields=['search_vector'], name='file_search_gin'),
+            GinIndex(fields=['original_name'], opclasses=['gin_trgm_ops'], name='file_name_trgm'),
+            # Henüz hash'lenmemiş dosyalar (hash_pending_files)
+            models.Index(fields=['created_at'], condition=models.Q(blob__isnull=True), name='file_unhashed_idx'),
+        ]
+        constraints = [
+            # Versiyon geçmişi tek index taraması: root = X ORDER BY version DESC
+            models.UniqueConstraint(fields=['root', 'version'], name='file_root_version_uniq'),
+        ]
+
     def __str__(self):
         return self.original_name
 
+
+class FileUpload(AgencyAwareModel):
+    """
+    Parça parça (resumable) dosya yükleme oturumu.
+    Her parça geldiğinde `parts` güncellenir; kesilen yükleme eksik parçadan devam eder.
+    Tamamlanınca File kaydı oluşturulur (bkz. api/services/uploads.py)
+    """
+    STATUS_CHOICES = (
+        ('uploading', 'Yükleniyor'),
+        ('completing', 'Tamamlanıyor'),  # Parçalar depolamada birleştiriliyor, yeni parça kabul edilmez
+        ('completed', 'Tamamlandı'),
+        ('aborted', 'İptal'),
+    )
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='uploads')
+    uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='file_uploads')
+    # Doluysa tamamlanınca bu dosyanın yeni versiyonu oluşturulur
+    version_of = models.ForeignKey(File, on_delete=models.CASCADE, null=True, blank=True, related_name='pending_versions')
+
+    original_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    description = models.TextField(blank=True)
+    tags = models.JSONField(default=list, blank=True)
+    # İstemcinin bildirdiği SHA-256: ajansta aynı içerik varsa byte yüklenmeden tamamlanır
+    sha256 = models.CharField(max_length=64, blank=True)
+
+    total_size = models.BigIntegerField()
+    part_size = models.BigIntegerField()
+
+    storage_key = models.CharField(max_length=500)
+    storage_upload_id = models.CharField(max_length=255) # S3 multipart UploadId
+    # Onaylanan parçalar: {"1": {"etag": "\"...\"", "size": 67108864}}
+    parts = models.JSONField(default=dict, blank=True)
+    received_bytes = models.BigIntegerField(default=0)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    file = models.OneToOneField(File, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload')
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # Süresi dolan yüklemelerin temizliği (abort_stale_uploads)
+            models.Index(fields=['status', 'expires_at'], name='upload_status_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.original_name} ({self.get_status_display()})"
+
+
+class StorageUsage(AgencyAwareModel):
+    """
+    Ajansın dosya tipine göre depolama sayaçları (storage_stats ve kota kontrolü SUM yapmasın).
+    File oluşturulunca / silinince aynı transaction'da F() ile güncellenir,
+    gece reconcile ile yeniden hesaplanır (bkz. api/services/storage_usage.py)
+    """
+    file_type = models.CharField(max_length=50)
+    total_bytes = models.BigIntegerField(default=0)  # Dosya boyutları toplamı (kota buna göre)
+    file_count = models.IntegerField(default=0)
+    # Depolamada gerçekten tutulan (tekilleştirme sonrası); tipler arası dağılımı yaklaşık, toplamı doğru
+    physical_bytes = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('agency', 'file_type')
+
+    def __str__(self):
+        return f"{self.agency_id} - {self.file_type}"
+
+
+class StorageReservation(AgencyAwareModel):
+    """
+    Tek istekte yüklenen dosyanın kota rezervasyonu: ajans kilidi sadece kota kontrolü
+    ve bu satırın oluşturulması sürer, hash'leme / depolamaya yazma kilitsiz yapılır.
+    İş bitince silinir; process ölürse expires_at'ten sonra sayılmaz
+    (bkz. api/services/storage_usage.py)
+    """
+    size = models.BigIntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.agency_id} - {self.size}"
+
 class ExpenseCategory(AgencyAwareModel):
     name = models.CharField(max_length=100)
     slug = models.SlugField()
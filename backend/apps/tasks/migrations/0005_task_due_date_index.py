@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['agency', 'due_date', 'id'], name='task_agency_due_idx'),
+        ),
+    ]
@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from apps.core.models import BaseModel
 from apps.agencies.models import AgencyAwareModel
@@ -36,5 +38,18 @@ class Task(AgencyAwareModel):
     
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='created_tasks')
 
+    # Full-text arama: Postgres trigger'ı doldurur (apps/core/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination: (created_at, id) < (cursor) aralığı index'ten okunur
+            models.Index(fields=['agency', '-created_at', '-id'], name='task_agency_created_idx'),
+            # ?ordering=due_date (boşlar sonda, Postgres ASC varsayılanı)
+            models.Index(fields=['agency', 'due_date', 'id'], name='task_agency_due_idx'),
+            GinIndex(fields=['search_vector'], name='task_search_gin'),
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='task_title_trgm'),
+        ]
+
     def __str__(self):
         return self.title
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:33
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_notification_dedup_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('coalesce_key', models.CharField(blank=True, default='', max_length=50)),
+                ('deliver_after', models.DateTimeField()),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_outbox', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['deliver_after'],
+                'indexes': [models.Index(fields=['deliver_after'], name='notif_outbox_deliver_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:39
+
+from django.db import migrations, models
+
+from apps.core.partitioning import convert_to_partitioned
+
+
+def partition_tables(apps, schema_editor):
+    # Sadece Postgres: tabloları aylık RANGE (created_at) partition'lara çevir
+    for table in ('users_notification', 'users_auditlog'):
+        convert_to_partitioned(schema_editor.connection, table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agencies', '0002_dashboardsnapshot'),
+        ('users', '0003_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='notification',
+            name='unique_notification_dedup_key',
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['agency', '-created_at'], name='audit_agency_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['agency', '-created_at'], name='notif_agency_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', '-created_at'], name='notif_recipient_created_idx'),
+        ),
+        migrations.RunPython(partition_tables, migrations.RunPython.noop),
+    ]
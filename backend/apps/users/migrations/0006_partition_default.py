@@ -0,0 +1,25 @@
+from django.db import migrations
+
+from apps.core.partitioning import create_default_partition, is_partitioned, is_supported
+
+
+def add_default_partitions(apps, schema_editor):
+    # Partition'ı olmayan aya düşen kayıtlar insert hatası vermesin, DEFAULT'a yazılsın
+    connection = schema_editor.connection
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        for table in ('users_notification', 'users_auditlog'):
+            if is_partitioned(cursor, table):
+                create_default_partition(cursor, table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_auditlog_event_time'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_default_partitions, migrations.RunPython.noop),
+    ]
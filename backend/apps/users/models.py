@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 from apps.core.models import BaseModel
 from apps.agencies.models import Agency, AgencyRole
 
@@ -67,11 +68,37 @@ class Notification(AgencyAwareModel):
     link = models.CharField(max_length=500, blank=True)
     is_read = models.BooleanField(default=False)
     read_at = models.DateTimeField(null=True, blank=True)
+    # Aynı olay için tekrar bildirim gitmesin (örn: "overdue:<task_id>:<status>:<due_date>")
+    # Tablo aylık partitioned olduğundan (recipient, dedup_key) unique index'i her
+    # partition'da ayrıdır (apps/core/partitioning.py); aylar arası kontrol uygulamada yapılır
+    dedup_key = models.CharField(max_length=255, blank=True, default='')
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['agency', '-created_at'], name='notif_agency_created_idx'),
+            models.Index(fields=['recipient', '-created_at'], name='notif_recipient_created_idx'),
+        ]
     def __str__(self):
         return f"{self.recipient.email} - {self.title}"
 
+class NotificationOutbox(BaseModel):
+    """
+    Gönderilmeyi bekleyen WebSocket mesajları (transactional outbox).
+    Request sadece satır yazar; relay_notification_outbox task'ı channel layer'a
+    iletip satırı siler (at-least-once: iletimden sonra silinir).
+    """
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notification_outbox')
+    payload = models.JSONField(default=dict)
+    # Aynı anahtarlı mesajlar relay sırasında kullanıcı başına tek özet mesaja birleştirilir
+    coalesce_key = models.CharField(max_length=50, blank=True, default='')
+    deliver_after = models.DateTimeField()
+    attempts = models.PositiveIntegerField(default=0)
+    class Meta:
+        ordering = ['deliver_after']
+        indexes = [models.Index(fields=['deliver_after'], name='notif_outbox_deliver_idx')]
+    def __str__(self):
+        return f"{self.recipient_id} - {self.payload.get('title', '')}"
+
 class AuditLog(AgencyAwareModel):
     ACTION_CHOICES = (
         ('create', 'Oluşturma'),
@@ -89,8 +116,13 @@ class AuditLog(AgencyAwareModel):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
     changes = models.JSONField(default=dict, blank=True)
+    # Olayın zamanı: tampondan toplu yazılırken üzerine yazılmasın (api/services/audit.py)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['agency', '-created_at'], name='audit_agency_created_idx'),
+        ]
     def __str__(self):
         return f"{self.user} - {self.action}"
 
@@ -13,6 +13,9 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Task'leri otomatik bul
 app.autodiscover_tasks()
 
+# settings.NOTIFICATION_RELAY_INTERVAL ile aynı (settings burada henüz yüklenmemiş olabilir)
+NOTIFICATION_RELAY_INTERVAL = float(os.environ.get('NOTIFICATION_RELAY_INTERVAL', 2))
+
 # ============================================================================
 # CELERY BEAT SCHEDULE (Scheduled Tasks)
 # ============================================================================
@@ -40,6 +43,43 @@ app.conf.beat_schedule = {
         'task': 'api.tasks.daily_digest_email',
         'schedule': crontab(hour=8, minute=0),  # Her gün 08:00
     },
+    
+    # Her gün 23:55'te dashboard trendleri için günlük özet
+    'dashboard-snapshot-daily': {
+        'task': 'api.tasks.snapshot_dashboard_stats',
+        'schedule': crontab(hour=23, minute=55),  # Her gün 23:55
+    },
+    
+    # Her gün 03:00'te Notification / AuditLog partition bakımı
+    'maintain-partitions-daily': {
+        'task': 'api.tasks.maintain_partitions',
+        'schedule': crontab(hour=3, minute=0),  # Her gün 03:00
+    },
+    
+    # Saatte bir süresi dolan parçalı yüklemeleri iptal et
+    'abort-stale-uploads-hourly': {
+        'task': 'api.tasks.abort_stale_uploads',
+        'schedule': crontab(minute=30),  # Her saat :30
+    },
+    
+    # 10 dakikada bir blob'a bağlanmamış dosyaları hash'le (tekilleştirme)
+    'hash-pending-files': {
+        'task': 'api.tasks.hash_pending_files',
+        'schedule': crontab(minute='*/10'),
+    },
+    
+    # Her gece depolama sayaçlarını dosyalardan yeniden hesapla
+    'reconcile-storage-usage-daily': {
+        'task': 'api.tasks.reconcile_storage_usage',
+        'schedule': crontab(hour=4, minute=0),  # Her gün 04:00
+    },
+    
+    # Birkaç saniyede bir WebSocket outbox'ını channel layer'a ilet
+    'relay-notification-outbox': {
+        'task': 'api.tasks.relay_notification_outbox',
+        'schedule': NOTIFICATION_RELAY_INTERVAL,
+        'options': {'expires': NOTIFICATION_RELAY_INTERVAL * 5},
+    },
 }
 
 app.conf.timezone = 'Europe/Istanbul'
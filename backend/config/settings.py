@@ -27,6 +27,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # Full-text / trigram arama (SearchVector, %> lookup'ları)
     
     # Third Party
     'rest_framework',
@@ -130,6 +131,21 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Aynı türden bildirimlerin (örn: görev atama) tek WebSocket mesajında toplandığı pencere (saniye)
+NOTIFICATION_COALESCE_WINDOW = int(os.environ.get('NOTIFICATION_COALESCE_WINDOW', 5))
+
+# Outbox relay (api.tasks.relay_notification_outbox)
+NOTIFICATION_RELAY_INTERVAL = float(os.environ.get('NOTIFICATION_RELAY_INTERVAL', 2))  # saniye
+NOTIFICATION_RELAY_BATCH_SIZE = 500
+NOTIFICATION_RELAY_MAX_BATCHES = 20
+NOTIFICATION_RELAY_MAX_ATTEMPTS = 10
+NOTIFICATION_RELAY_LEASE = 60  # saniye: alınan satırlar bu süre başka relay'e görünmez
+
+# WebSocket: yeniden bağlanınca gönderilecek en fazla kaçırılmış bildirim ve
+# canlı mesajların tek frame'de toplandığı pencere (saniye)
+NOTIFICATION_WS_CATCHUP_LIMIT = 200
+NOTIFICATION_WS_BATCH_WINDOW = 0.05
+
 # ============================================================================
 # CELERY (Task Queue)
 # ============================================================================
@@ -244,6 +260,40 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'Todo Production <noreply@todopro.app>')
 
+# Mail dispatch (api/services/mail.py)
+EMAIL_MAX_RETRIES = int(os.environ.get('EMAIL_MAX_RETRIES', 3))  # Mesaj başına backoff'lu deneme
+EMAIL_CONNECTION_MAX_IDLE = 60  # saniye, sonrasında bağlantı yeniden açılır
+# Sağlayıcı (EMAIL_HOST) başına worker process limiti (mesaj/saniye)
+EMAIL_RATE_LIMITS = {
+    'smtp.gmail.com': 5,
+}
+EMAIL_RATE_LIMIT_DEFAULT = float(os.environ.get('EMAIL_RATE_LIMIT', 10))
+
+# ============================================================================
+# AUDIT LOG (api/services/audit.py)
+# ============================================================================
+AUDIT_LOG_BATCH_SIZE = 200          # Bu kadar kayıt birikince hemen yaz
+AUDIT_LOG_FLUSH_INTERVAL = 2.0      # saniye
+AUDIT_LOG_MAX_BUFFER = 5000         # Aşılırsa isteği yapan thread kendisi yazar
+
+# ============================================================================
+# PARTITIONING & RETENTION (apps/core/partitioning.py, manage_partitions)
+# ============================================================================
+# Notification / AuditLog aylık partition'lara bölünür (sadece PostgreSQL)
+PARTITION_MONTHS_AHEAD = 3
+# Plan bazlı saklama süresi (ay). Daha kısa süreli planlarda eski kayıtlar listelenmez,
+# partition en uzun süre dolunca DROP edilir
+NOTIFICATION_RETENTION_MONTHS = {
+    'free': 3,
+    'pro': 12,
+    'enterprise': 24,
+}
+AUDIT_LOG_RETENTION_MONTHS = {
+    'free': 6,
+    'pro': 24,
+    'enterprise': 60,
+}
+
 # ============================================================================
 # LOGGING
 # ============================================================================
@@ -305,6 +355,27 @@ if not DEBUG:
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10 MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10 MB
 
+# Büyük dosyalar (rush / ham görüntü) parça parça yüklenir: /api/uploads/ (api/services/uploads.py)
+UPLOAD_PART_SIZE = int(os.environ.get('UPLOAD_PART_SIZE', 64 * 1024 * 1024))  # 64 MB
+UPLOAD_EXPIRY_HOURS = int(os.environ.get('UPLOAD_EXPIRY_HOURS', 72))  # Tamamlanmayan yükleme bu süre sonra iptal
+UPLOAD_PART_URL_EXPIRY = int(os.environ.get('UPLOAD_PART_URL_EXPIRY', 6 * 3600))  # Presigned parça URL'i süresi (sn)
+
+# ============================================================================
+# OBJECT STORAGE (S3 / S3 uyumlu: MinIO, R2...)
+# ============================================================================
+# Bucket tanımlı değilse dosyalar MEDIA_ROOT'a yazılır (dev/test)
+AWS_STORAGE_BUCKET_NAME = os.environ.get('AWS_STORAGE_BUCKET_NAME', '')
+AWS_S3_ENDPOINT_URL = os.environ.get('AWS_S3_ENDPOINT_URL') or None
+AWS_S3_REGION_NAME = os.environ.get('AWS_S3_REGION_NAME') or None
+AWS_QUERYSTRING_EXPIRE = int(os.environ.get('AWS_QUERYSTRING_EXPIRE', 3600))  # İndirme linki süresi (sn)
+AWS_DEFAULT_ACL = None
+
+if AWS_STORAGE_BUCKET_NAME:
+    STORAGES = {
+        'default': {'BACKEND': 'storages.backends.s3.S3Storage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    }
+
 # ============================================================================
 # FRONTEND URL (Email'lerdeki linkler için)
 # ============================================================================